@@ -0,0 +1,78 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Application configuration, read once per process from the environment and the .env file."""
+    db_backend: str
+    db_server: Optional[str]
+    db_database: Optional[str]
+    db_username: Optional[str]
+    db_password: Optional[str]
+    sqlite_path: str
+    host: str
+    port: int
+    workers: int
+    max_requests: Optional[int]
+    graceful_timeout: int
+    job_workers: int
+    job_max_pending: int
+    job_retention_seconds: int
+    matrix_storage: str
+    matrix_dtype: str
+    results_cache_size: int
+    results_snapshot_dir: Optional[str]
+    idempotency_retention_seconds: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()  # Load environment variables from .env file
+        matrix_storage = os.getenv('MATRIX_STORAGE', 'cells').lower()
+        if matrix_storage not in ('cells', 'blob'):
+            raise RuntimeError(f"Unsupported MATRIX_STORAGE: {matrix_storage}")
+        matrix_dtype = os.getenv('MATRIX_DTYPE', 'float64').lower()
+        if matrix_dtype not in ('float64', 'float32'):
+            raise RuntimeError(f"Unsupported MATRIX_DTYPE: {matrix_dtype}")
+        return cls(
+            db_backend=os.getenv('DB_BACKEND', 'sqlserver').lower(),
+            db_server=os.getenv('DB_SERVER'),
+            db_database=os.getenv('DB_DATABASE'),
+            db_username=os.getenv('DB_USERNAME'),
+            db_password=os.getenv('DB_PASSWORD'),
+            sqlite_path=os.getenv('SQLITE_PATH', 'ahp.db'),
+            host=os.getenv('HOST', '127.0.0.1'),
+            port=_int_env('PORT', 8000),
+            # WEB_CONCURRENCY is the conventional worker-count variable (also read by gunicorn)
+            workers=_int_env('WEB_CONCURRENCY', os.cpu_count() or 1),
+            # Recycle a worker after this many requests; unset disables recycling
+            max_requests=_int_env('MAX_REQUESTS', None),
+            graceful_timeout=_int_env('GRACEFUL_TIMEOUT', 30),
+            # Background job pool, per API worker process
+            job_workers=_int_env('JOB_WORKERS', 2),
+            job_max_pending=_int_env('JOB_MAX_PENDING', 32),
+            job_retention_seconds=_int_env('JOB_RETENTION_SECONDS', 3600),
+            # Comparison matrix layout: "cells" (one row per cell) or "blob" (one row per matrix)
+            matrix_storage=matrix_storage,
+            matrix_dtype=matrix_dtype,
+            # Completed decisions' results: in-memory entries per worker, optional shared snapshots on disk
+            results_cache_size=_int_env('RESULTS_CACHE_SIZE', 128),
+            results_snapshot_dir=os.getenv('RESULTS_SNAPSHOT_DIR') or None,
+            # How long a batch response is kept for replay under its Idempotency-Key
+            idempotency_retention_seconds=_int_env('IDEMPOTENCY_RETENTION_SECONDS', 86400),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading them on first use."""
+    return Settings.from_env()
@@ -0,0 +1,58 @@
+"""
+Copy row-per-cell comparison matrices into the blob tables (criteria_matrices / alternative_matrices).
+
+Run from the backend root after applying migrations/003_add_matrix_blobs.sql (SQLite creates the
+tables itself), then set MATRIX_STORAGE=blob:
+
+    python databases/migrate_matrix_storage.py
+
+The cell tables are left untouched; drop them once nothing reads them any more. Readers that need
+the old shape can use the v_criteria_comparisons / v_alternative_comparisons views.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositories.base_repository import BaseRepository
+from repositories.factory import create_repository
+
+
+def migrate(repository: BaseRepository) -> int:
+    """Copy every complete cell matrix into blob storage, one transaction per decision. Returns the count."""
+    repository.cursor.execute(
+        "SELECT DISTINCT decision_id, NULL FROM criteria_comparisons "
+        "UNION SELECT DISTINCT decision_id, criteria_id FROM alternative_comparisons"
+    )
+    matrices = {}
+    for decision_id, criteria_id in repository.cursor.fetchall():
+        matrices.setdefault(decision_id, []).append(criteria_id)
+
+    copied = 0
+    for decision_id, criteria_ids in sorted(matrices.items()):
+        with repository.transaction():
+            for criteria_id in criteria_ids:
+                repository.matrix_storage = "cells"
+                if criteria_id is None:
+                    stored = repository.get_criteria_comparison_matrix(decision_id)
+                else:
+                    stored = repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+                if stored is None:
+                    continue
+
+                repository.matrix_storage = "blob"
+                ids, matrix = stored
+                if criteria_id is None:
+                    repository.save_criteria_comparison_matrix(decision_id, ids, matrix)
+                else:
+                    repository.save_alternative_comparison_matrix(decision_id, criteria_id, ids, matrix)
+                copied += 1
+    return copied
+
+
+if __name__ == "__main__":
+    repository = create_repository()
+    try:
+        print(f"Copied {migrate(repository)} matrices to blob storage")
+    finally:
+        repository.close()
@@ -0,0 +1,4 @@
+-- Adds the matrix version used to detect concurrent matrix edits (incremental judgment updates).
+-- Safe to run more than once.
+IF COL_LENGTH('dbo.decision_problems', 'matrix_version') IS NULL
+    ALTER TABLE dbo.decision_problems ADD matrix_version INT NOT NULL DEFAULT 0;
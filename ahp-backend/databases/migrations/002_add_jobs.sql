@@ -0,0 +1,13 @@
+-- Adds the table holding background job status and results (services/job_queue.py).
+-- Safe to run more than once.
+IF OBJECT_ID('dbo.jobs', 'U') IS NULL
+    CREATE TABLE dbo.jobs (
+        id CHAR(32) PRIMARY KEY,
+        kind NVARCHAR(50) NOT NULL,
+        status NVARCHAR(20) NOT NULL DEFAULT 'queued',
+        progress FLOAT NOT NULL DEFAULT 0,
+        result NVARCHAR(MAX) NULL,
+        error NVARCHAR(MAX) NULL,
+        created_at DATETIME DEFAULT GETDATE(),
+        updated_at DATETIME DEFAULT GETDATE()
+    );
@@ -0,0 +1,119 @@
+-- Adds compact blob matrix storage (MATRIX_STORAGE=blob) and row-per-cell views over it.
+-- Safe to run more than once. Existing matrices are copied by databases/migrate_matrix_storage.py.
+IF OBJECT_ID('dbo.criteria_matrices', 'U') IS NULL
+CREATE TABLE dbo.criteria_matrices (
+    decision_id INT PRIMARY KEY,
+    size INT NOT NULL,
+    dtype NVARCHAR(2) NOT NULL,
+    ids VARBINARY(MAX) NOT NULL,
+    matrix VARBINARY(MAX) NOT NULL,
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT FK_criteria_matrices_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id)
+);
+
+IF OBJECT_ID('dbo.alternative_matrices', 'U') IS NULL
+CREATE TABLE dbo.alternative_matrices (
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    size INT NOT NULL,
+    dtype NVARCHAR(2) NOT NULL,
+    ids VARBINARY(MAX) NOT NULL,
+    matrix VARBINARY(MAX) NOT NULL,
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_alternative_matrices PRIMARY KEY (decision_id, criteria_id),
+    CONSTRAINT FK_alternative_matrices_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_alternative_matrices_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id)
+);
+GO
+
+IF OBJECT_ID('dbo.v_alternative_comparisons', 'V') IS NOT NULL DROP VIEW dbo.v_alternative_comparisons;
+IF OBJECT_ID('dbo.v_criteria_comparisons', 'V') IS NOT NULL DROP VIEW dbo.v_criteria_comparisons;
+IF OBJECT_ID('dbo.fn_blob_float', 'FN') IS NOT NULL DROP FUNCTION dbo.fn_blob_float;
+IF OBJECT_ID('dbo.fn_blob_int32', 'FN') IS NOT NULL DROP FUNCTION dbo.fn_blob_int32;
+GO
+
+-- Decoders for the blob matrices (SQL Server reads binary as big-endian, so bytes are reversed first)
+CREATE FUNCTION dbo.fn_blob_int32 (@blob VARBINARY(MAX), @index INT)
+RETURNS INT
+AS
+BEGIN
+    DECLARE @b VARBINARY(4) = SUBSTRING(@blob, 4 * @index + 1, 4);
+    RETURN CAST(SUBSTRING(@b, 4, 1) + SUBSTRING(@b, 3, 1) + SUBSTRING(@b, 2, 1) + SUBSTRING(@b, 1, 1) AS INT);
+END;
+GO
+
+CREATE FUNCTION dbo.fn_blob_float (@blob VARBINARY(MAX), @dtype NVARCHAR(2), @index INT)
+RETURNS FLOAT
+AS
+BEGIN
+    DECLARE @size INT = CASE WHEN @dtype = N'f4' THEN 4 ELSE 8 END;
+    DECLARE @le VARBINARY(8) = SUBSTRING(@blob, @size * @index + 1, @size);
+    DECLARE @be VARBINARY(8) = 0x;
+    DECLARE @i INT = @size;
+    WHILE @i > 0
+    BEGIN
+        SET @be = @be + SUBSTRING(@le, @i, 1);
+        SET @i = @i - 1;
+    END;
+
+    -- IEEE 754: sign bit, biased exponent, fraction
+    DECLARE @bits BIGINT, @sign FLOAT = 1, @exponent INT, @fraction FLOAT;
+    DECLARE @fraction_bits INT = CASE WHEN @size = 4 THEN 23 ELSE 52 END;
+    DECLARE @bias INT = CASE WHEN @size = 4 THEN 127 ELSE 1023 END;
+    DECLARE @scale BIGINT = POWER(CAST(2 AS BIGINT), @fraction_bits);
+
+    IF @size = 4
+    BEGIN
+        SET @bits = CAST(@be AS INT);
+        IF @bits < 0 SELECT @sign = -1, @bits = @bits + 2147483648;
+    END
+    ELSE
+    BEGIN
+        SET @bits = CAST(@be AS BIGINT);
+        IF @bits < 0 SELECT @sign = -1, @bits = (@bits + 9223372036854775807) + 1;
+    END;
+
+    SET @exponent = @bits / @scale;
+    SET @fraction = CAST(@bits % @scale AS FLOAT) / @scale;
+    IF @exponent = 2 * @bias + 1 RETURN NULL; -- NaN (unset cell) or infinity
+    IF @exponent = 0 RETURN @sign * @fraction * POWER(CAST(2 AS FLOAT), 1 - @bias);
+    RETURN @sign * (1 + @fraction) * POWER(CAST(2 AS FLOAT), @exponent - @bias);
+END;
+GO
+
+-- Row-per-cell views over the blob tables, shaped like criteria_comparisons / alternative_comparisons
+-- (matrices up to 10,000 x 10,000)
+CREATE VIEW dbo.v_criteria_comparisons AS
+WITH digits AS (
+    SELECT d FROM (VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9)) AS v (d)
+), tally AS (
+    SELECT a.d + 10 * b.d + 100 * c.d + 1000 * e.d AS n
+    FROM digits a CROSS JOIN digits b CROSS JOIN digits c CROSS JOIN digits e
+)
+SELECT
+    m.decision_id,
+    dbo.fn_blob_int32(m.ids, r.n) AS row_criteria_id,
+    dbo.fn_blob_int32(m.ids, c.n) AS column_criteria_id,
+    dbo.fn_blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM dbo.criteria_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+GO
+
+CREATE VIEW dbo.v_alternative_comparisons AS
+WITH digits AS (
+    SELECT d FROM (VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9)) AS v (d)
+), tally AS (
+    SELECT a.d + 10 * b.d + 100 * c.d + 1000 * e.d AS n
+    FROM digits a CROSS JOIN digits b CROSS JOIN digits c CROSS JOIN digits e
+)
+SELECT
+    m.decision_id,
+    m.criteria_id,
+    dbo.fn_blob_int32(m.ids, r.n) AS row_alternative_id,
+    dbo.fn_blob_int32(m.ids, c.n) AS column_alternative_id,
+    dbo.fn_blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM dbo.alternative_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+GO
@@ -0,0 +1,28 @@
+-- Adds the tables for ratings (absolute measurement) mode.
+-- Safe to run more than once.
+IF OBJECT_ID('dbo.rating_levels', 'U') IS NULL
+CREATE TABLE dbo.rating_levels (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    name NVARCHAR(100) NOT NULL,
+    display_order INT NOT NULL DEFAULT 0,
+    priority FLOAT NOT NULL, -- idealized: the best level of each criterion has priority 1
+    CONSTRAINT FK_rating_levels_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_rating_levels_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id),
+    CONSTRAINT UQ_rating_levels UNIQUE (decision_id, criteria_id, name)
+);
+
+IF OBJECT_ID('dbo.alternative_ratings', 'U') IS NULL
+CREATE TABLE dbo.alternative_ratings (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    alternative_id INT NOT NULL,
+    level_id INT NOT NULL,
+    CONSTRAINT FK_alternative_ratings_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_alternative_ratings_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id),
+    CONSTRAINT FK_alternative_ratings_alternative FOREIGN KEY (alternative_id) REFERENCES dbo.alternatives (id),
+    CONSTRAINT FK_alternative_ratings_level FOREIGN KEY (level_id) REFERENCES dbo.rating_levels (id),
+    CONSTRAINT UQ_alternative_ratings UNIQUE (decision_id, criteria_id, alternative_id)
+);
@@ -0,0 +1,9 @@
+-- Adds the table that stores batch-create responses for Idempotency-Key replays.
+-- Safe to run more than once.
+IF OBJECT_ID('dbo.idempotency_keys', 'U') IS NULL
+    CREATE TABLE dbo.idempotency_keys (
+        id NVARCHAR(255) PRIMARY KEY,
+        request_hash CHAR(64) NOT NULL,
+        response NVARCHAR(MAX) NOT NULL,
+        created_at DATETIME DEFAULT GETDATE()
+    );
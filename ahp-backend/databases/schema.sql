@@ -1,6 +1,16 @@
 -- Database Schema for AHP Decision Support System
 
 -- Drop tables if they exist (for clean recreation)
+IF OBJECT_ID('dbo.v_alternative_comparisons', 'V') IS NOT NULL DROP VIEW dbo.v_alternative_comparisons;
+IF OBJECT_ID('dbo.v_criteria_comparisons', 'V') IS NOT NULL DROP VIEW dbo.v_criteria_comparisons;
+IF OBJECT_ID('dbo.fn_blob_float', 'FN') IS NOT NULL DROP FUNCTION dbo.fn_blob_float;
+IF OBJECT_ID('dbo.fn_blob_int32', 'FN') IS NOT NULL DROP FUNCTION dbo.fn_blob_int32;
+IF OBJECT_ID('dbo.idempotency_keys', 'U') IS NOT NULL DROP TABLE dbo.idempotency_keys;
+IF OBJECT_ID('dbo.jobs', 'U') IS NOT NULL DROP TABLE dbo.jobs;
+IF OBJECT_ID('dbo.alternative_ratings', 'U') IS NOT NULL DROP TABLE dbo.alternative_ratings;
+IF OBJECT_ID('dbo.rating_levels', 'U') IS NOT NULL DROP TABLE dbo.rating_levels;
+IF OBJECT_ID('dbo.alternative_matrices', 'U') IS NOT NULL DROP TABLE dbo.alternative_matrices;
+IF OBJECT_ID('dbo.criteria_matrices', 'U') IS NOT NULL DROP TABLE dbo.criteria_matrices;
 IF OBJECT_ID('dbo.alternative_scores', 'U') IS NOT NULL DROP TABLE dbo.alternative_scores;
 IF OBJECT_ID('dbo.criteria_weights', 'U') IS NOT NULL DROP TABLE dbo.criteria_weights;
 IF OBJECT_ID('dbo.alternative_comparisons', 'U') IS NOT NULL DROP TABLE dbo.alternative_comparisons;
@@ -34,6 +44,7 @@ CREATE TABLE dbo.decision_problems (
     description NVARCHAR(MAX) NULL,
     user_id INT NULL, -- For future user authentication
     status NVARCHAR(20) DEFAULT 'in_progress', -- in_progress, completed, archived
+    matrix_version INT NOT NULL DEFAULT 0, -- bumped on every comparison matrix write
     created_at DATETIME DEFAULT GETDATE(),
     updated_at DATETIME DEFAULT GETDATE()
 );
@@ -126,6 +137,78 @@ CREATE TABLE dbo.consistency_checks (
     CONSTRAINT UQ_consistency_checks UNIQUE (decision_id, criteria_id)
 );
 
+-- Compact matrix storage (MATRIX_STORAGE=blob): one row per matrix instead of one per cell.
+-- ids holds the matrix's row/column IDs as little-endian int32; matrix holds row-major
+-- little-endian float64 (dtype 'f8') or float32 ('f4') values.
+CREATE TABLE dbo.criteria_matrices (
+    decision_id INT PRIMARY KEY,
+    size INT NOT NULL,
+    dtype NVARCHAR(2) NOT NULL,
+    ids VARBINARY(MAX) NOT NULL,
+    matrix VARBINARY(MAX) NOT NULL,
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT FK_criteria_matrices_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id)
+);
+
+CREATE TABLE dbo.alternative_matrices (
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    size INT NOT NULL,
+    dtype NVARCHAR(2) NOT NULL,
+    ids VARBINARY(MAX) NOT NULL,
+    matrix VARBINARY(MAX) NOT NULL,
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_alternative_matrices PRIMARY KEY (decision_id, criteria_id),
+    CONSTRAINT FK_alternative_matrices_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_alternative_matrices_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id)
+);
+
+-- Background jobs (status and results are shared by all API worker processes)
+CREATE TABLE dbo.jobs (
+    id CHAR(32) PRIMARY KEY,
+    kind NVARCHAR(50) NOT NULL, -- weights, recompute
+    status NVARCHAR(20) NOT NULL DEFAULT 'queued', -- queued, running, completed, failed
+    progress FLOAT NOT NULL DEFAULT 0,
+    result NVARCHAR(MAX) NULL, -- JSON
+    error NVARCHAR(MAX) NULL,
+    created_at DATETIME DEFAULT GETDATE(),
+    updated_at DATETIME DEFAULT GETDATE()
+);
+
+-- Ratings (absolute measurement) mode: alternatives are rated against per-criterion intensity levels
+CREATE TABLE dbo.rating_levels (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    name NVARCHAR(100) NOT NULL,
+    display_order INT NOT NULL DEFAULT 0,
+    priority FLOAT NOT NULL, -- idealized: the best level of each criterion has priority 1
+    CONSTRAINT FK_rating_levels_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_rating_levels_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id),
+    CONSTRAINT UQ_rating_levels UNIQUE (decision_id, criteria_id, name)
+);
+
+CREATE TABLE dbo.alternative_ratings (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    decision_id INT NOT NULL,
+    criteria_id INT NOT NULL,
+    alternative_id INT NOT NULL,
+    level_id INT NOT NULL,
+    CONSTRAINT FK_alternative_ratings_decision FOREIGN KEY (decision_id) REFERENCES dbo.decision_problems (id),
+    CONSTRAINT FK_alternative_ratings_criteria FOREIGN KEY (criteria_id) REFERENCES dbo.criteria (id),
+    CONSTRAINT FK_alternative_ratings_alternative FOREIGN KEY (alternative_id) REFERENCES dbo.alternatives (id),
+    CONSTRAINT FK_alternative_ratings_level FOREIGN KEY (level_id) REFERENCES dbo.rating_levels (id),
+    CONSTRAINT UQ_alternative_ratings UNIQUE (decision_id, criteria_id, alternative_id)
+);
+
+-- Responses of batch requests sent with an Idempotency-Key, replayed when a client retries
+CREATE TABLE dbo.idempotency_keys (
+    id NVARCHAR(255) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL, -- SHA-256 of the request body
+    response NVARCHAR(MAX) NOT NULL, -- JSON
+    created_at DATETIME DEFAULT GETDATE()
+);
+
 INSERT INTO dbo.criteria (name, description) VALUES 
 (N'Chi phí/ngày', 'Cost per day for the destination'),
 (N'Độ an toàn', 'Safety level of the destination'),
@@ -140,3 +223,90 @@ INSERT INTO dbo.alternatives (name, description) VALUES
 (N'Hạ Long', 'Bay with limestone islands in northern Vietnam'),
 (N'Nha Trang', 'Coastal city in central Vietnam'),
 (N'Phú Quốc', 'Island in southern Vietnam');
+GO
+
+-- Decoders for the blob matrices (SQL Server reads binary as big-endian, so bytes are reversed first)
+CREATE FUNCTION dbo.fn_blob_int32 (@blob VARBINARY(MAX), @index INT)
+RETURNS INT
+AS
+BEGIN
+    DECLARE @b VARBINARY(4) = SUBSTRING(@blob, 4 * @index + 1, 4);
+    RETURN CAST(SUBSTRING(@b, 4, 1) + SUBSTRING(@b, 3, 1) + SUBSTRING(@b, 2, 1) + SUBSTRING(@b, 1, 1) AS INT);
+END;
+GO
+
+CREATE FUNCTION dbo.fn_blob_float (@blob VARBINARY(MAX), @dtype NVARCHAR(2), @index INT)
+RETURNS FLOAT
+AS
+BEGIN
+    DECLARE @size INT = CASE WHEN @dtype = N'f4' THEN 4 ELSE 8 END;
+    DECLARE @le VARBINARY(8) = SUBSTRING(@blob, @size * @index + 1, @size);
+    DECLARE @be VARBINARY(8) = 0x;
+    DECLARE @i INT = @size;
+    WHILE @i > 0
+    BEGIN
+        SET @be = @be + SUBSTRING(@le, @i, 1);
+        SET @i = @i - 1;
+    END;
+
+    -- IEEE 754: sign bit, biased exponent, fraction
+    DECLARE @bits BIGINT, @sign FLOAT = 1, @exponent INT, @fraction FLOAT;
+    DECLARE @fraction_bits INT = CASE WHEN @size = 4 THEN 23 ELSE 52 END;
+    DECLARE @bias INT = CASE WHEN @size = 4 THEN 127 ELSE 1023 END;
+    DECLARE @scale BIGINT = POWER(CAST(2 AS BIGINT), @fraction_bits);
+
+    IF @size = 4
+    BEGIN
+        SET @bits = CAST(@be AS INT);
+        IF @bits < 0 SELECT @sign = -1, @bits = @bits + 2147483648;
+    END
+    ELSE
+    BEGIN
+        SET @bits = CAST(@be AS BIGINT);
+        IF @bits < 0 SELECT @sign = -1, @bits = (@bits + 9223372036854775807) + 1;
+    END;
+
+    SET @exponent = @bits / @scale;
+    SET @fraction = CAST(@bits % @scale AS FLOAT) / @scale;
+    IF @exponent = 2 * @bias + 1 RETURN NULL; -- NaN (unset cell) or infinity
+    IF @exponent = 0 RETURN @sign * @fraction * POWER(CAST(2 AS FLOAT), 1 - @bias);
+    RETURN @sign * (1 + @fraction) * POWER(CAST(2 AS FLOAT), @exponent - @bias);
+END;
+GO
+
+-- Row-per-cell views over the blob tables, shaped like criteria_comparisons / alternative_comparisons
+-- (matrices up to 10,000 x 10,000)
+CREATE VIEW dbo.v_criteria_comparisons AS
+WITH digits AS (
+    SELECT d FROM (VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9)) AS v (d)
+), tally AS (
+    SELECT a.d + 10 * b.d + 100 * c.d + 1000 * e.d AS n
+    FROM digits a CROSS JOIN digits b CROSS JOIN digits c CROSS JOIN digits e
+)
+SELECT
+    m.decision_id,
+    dbo.fn_blob_int32(m.ids, r.n) AS row_criteria_id,
+    dbo.fn_blob_int32(m.ids, c.n) AS column_criteria_id,
+    dbo.fn_blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM dbo.criteria_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+GO
+
+CREATE VIEW dbo.v_alternative_comparisons AS
+WITH digits AS (
+    SELECT d FROM (VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9)) AS v (d)
+), tally AS (
+    SELECT a.d + 10 * b.d + 100 * c.d + 1000 * e.d AS n
+    FROM digits a CROSS JOIN digits b CROSS JOIN digits c CROSS JOIN digits e
+)
+SELECT
+    m.decision_id,
+    m.criteria_id,
+    dbo.fn_blob_int32(m.ids, r.n) AS row_alternative_id,
+    dbo.fn_blob_int32(m.ids, c.n) AS column_alternative_id,
+    dbo.fn_blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM dbo.alternative_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+GO
@@ -0,0 +1,215 @@
+-- SQLite Schema for AHP Decision Support System
+-- Mirrors databases/schema.sql; applied automatically by SQLiteRepository on first connection.
+
+-- 1. Main reference tables
+CREATE TABLE IF NOT EXISTS criteria (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS alternatives (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 2. Decision problem tracking
+CREATE TABLE IF NOT EXISTS decision_problems (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT NULL,
+    user_id INTEGER NULL, -- For future user authentication
+    status TEXT DEFAULT 'in_progress', -- in_progress, completed, archived
+    matrix_version INTEGER NOT NULL DEFAULT 0, -- bumped on every comparison matrix write
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 3. Junction tables for many-to-many relationships
+CREATE TABLE IF NOT EXISTS decision_criteria (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    display_order INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (decision_id, criteria_id)
+);
+
+CREATE TABLE IF NOT EXISTS decision_alternatives (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    alternative_id INTEGER NOT NULL REFERENCES alternatives (id),
+    display_order INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (decision_id, alternative_id)
+);
+
+-- 4. Pairwise comparison matrices
+CREATE TABLE IF NOT EXISTS criteria_comparisons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    row_criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    column_criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    value REAL NOT NULL,
+    UNIQUE (decision_id, row_criteria_id, column_criteria_id)
+);
+
+CREATE TABLE IF NOT EXISTS alternative_comparisons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    row_alternative_id INTEGER NOT NULL REFERENCES alternatives (id),
+    column_alternative_id INTEGER NOT NULL REFERENCES alternatives (id),
+    value REAL NOT NULL,
+    UNIQUE (decision_id, criteria_id, row_alternative_id, column_alternative_id)
+);
+
+-- 5. Results tables
+CREATE TABLE IF NOT EXISTS criteria_weights (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    weight REAL NOT NULL,
+    UNIQUE (decision_id, criteria_id)
+);
+
+CREATE TABLE IF NOT EXISTS alternative_scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    alternative_id INTEGER NOT NULL REFERENCES alternatives (id),
+    criteria_id INTEGER NULL REFERENCES criteria (id), -- NULL for global scores
+    score REAL NOT NULL,
+    is_final_score INTEGER NOT NULL DEFAULT 0, -- 1 for final aggregate scores
+    rank_order INTEGER NULL -- For storing the final rank
+);
+
+-- SQLite treats NULLs as distinct in UNIQUE constraints, unlike SQL Server,
+-- so the nullable criteria_id is folded into an expression index instead.
+CREATE UNIQUE INDEX IF NOT EXISTS UQ_alternative_scores
+    ON alternative_scores (decision_id, alternative_id, IFNULL(criteria_id, 0), is_final_score);
+
+CREATE TABLE IF NOT EXISTS consistency_checks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NULL REFERENCES criteria (id), -- NULL for criteria matrix consistency
+    lambda_max REAL NOT NULL,
+    consistency_index REAL NOT NULL,
+    consistency_ratio REAL NOT NULL,
+    is_consistent INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS UQ_consistency_checks
+    ON consistency_checks (decision_id, IFNULL(criteria_id, 0));
+
+-- 6. Compact matrix storage (MATRIX_STORAGE=blob): one row per matrix instead of one per cell.
+-- ids holds the matrix's row/column IDs as little-endian int32; matrix holds row-major
+-- little-endian float64 (dtype 'f8') or float32 ('f4') values.
+CREATE TABLE IF NOT EXISTS criteria_matrices (
+    decision_id INTEGER PRIMARY KEY REFERENCES decision_problems (id),
+    size INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    ids BLOB NOT NULL,
+    matrix BLOB NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS alternative_matrices (
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    size INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    ids BLOB NOT NULL,
+    matrix BLOB NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (decision_id, criteria_id)
+);
+
+-- Row-per-cell views over the blob tables, shaped like criteria_comparisons / alternative_comparisons.
+-- blob_int32 and blob_float are registered on every connection by SQLiteRepository.
+CREATE VIEW IF NOT EXISTS v_criteria_comparisons AS
+WITH RECURSIVE tally (n) AS (
+    SELECT 0
+    UNION ALL
+    SELECT n + 1 FROM tally WHERE n + 1 < (SELECT IFNULL(MAX(size), 0) FROM criteria_matrices)
+)
+SELECT
+    m.decision_id,
+    blob_int32(m.ids, r.n) AS row_criteria_id,
+    blob_int32(m.ids, c.n) AS column_criteria_id,
+    blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM criteria_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+
+CREATE VIEW IF NOT EXISTS v_alternative_comparisons AS
+WITH RECURSIVE tally (n) AS (
+    SELECT 0
+    UNION ALL
+    SELECT n + 1 FROM tally WHERE n + 1 < (SELECT IFNULL(MAX(size), 0) FROM alternative_matrices)
+)
+SELECT
+    m.decision_id,
+    m.criteria_id,
+    blob_int32(m.ids, r.n) AS row_alternative_id,
+    blob_int32(m.ids, c.n) AS column_alternative_id,
+    blob_float(m.matrix, m.dtype, r.n * m.size + c.n) AS value
+FROM alternative_matrices m
+JOIN tally r ON r.n < m.size
+JOIN tally c ON c.n < m.size;
+
+-- 7. Background jobs (status and results are shared by all API worker processes)
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL, -- weights, recompute
+    status TEXT NOT NULL DEFAULT 'queued', -- queued, running, completed, failed
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT NULL, -- JSON
+    error TEXT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 8. Ratings (absolute measurement) mode: alternatives are rated against per-criterion intensity levels
+CREATE TABLE IF NOT EXISTS rating_levels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    name TEXT NOT NULL,
+    display_order INTEGER NOT NULL DEFAULT 0,
+    priority REAL NOT NULL, -- idealized: the best level of each criterion has priority 1
+    UNIQUE (decision_id, criteria_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS alternative_ratings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id INTEGER NOT NULL REFERENCES decision_problems (id),
+    criteria_id INTEGER NOT NULL REFERENCES criteria (id),
+    alternative_id INTEGER NOT NULL REFERENCES alternatives (id),
+    level_id INTEGER NOT NULL REFERENCES rating_levels (id),
+    UNIQUE (decision_id, criteria_id, alternative_id)
+);
+
+-- 9. Responses of batch requests sent with an Idempotency-Key, replayed when a client retries
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    id TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL, -- SHA-256 of the request body
+    response TEXT NOT NULL, -- JSON
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO criteria (name, description) VALUES
+('Chi phí/ngày', 'Cost per day for the destination'),
+('Độ an toàn', 'Safety level of the destination'),
+('Trải nghiệm văn hóa', 'Cultural experiences available'),
+('Đánh giá KH', 'Customer ratings'),
+('Khoảng cách', 'Distance from starting point'),
+('Phương Tiện', 'Transportation options available');
+
+INSERT OR IGNORE INTO alternatives (name, description) VALUES
+('Hội An', 'Ancient town in central Vietnam'),
+('Đà Lạt', 'Mountain resort city in southern Vietnam'),
+('Hạ Long', 'Bay with limestone islands in northern Vietnam'),
+('Nha Trang', 'Coastal city in central Vietnam'),
+('Phú Quốc', 'Island in southern Vietnam');
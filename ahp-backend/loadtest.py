@@ -0,0 +1,244 @@
+"""
+Closed-loop load test: virtual users replay the decision wizard flow back to back.
+
+Each flow creates a decision, posts the criteria matrix, one alternative matrix per criterion and
+the final ranking, then reads the ranking back. The report shows throughput, p50/p95/p99 latency
+per endpoint and, in-process, the number of SQL statements each flow ran.
+
+    python loadtest.py --users 8 --flows 200 --criteria 5 --alternatives 10
+    python loadtest.py --url http://127.0.0.1:8000 --users 16 --duration 60
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import tempfile
+import time
+from typing import List, Dict, Any, Optional
+
+import httpx
+import numpy as np
+
+SAATY_SCALE = np.array([1/9, 1/8, 1/7, 1/6, 1/5, 1/4, 1/3, 1/2, 1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+# Statement counter of the flow running in the current task; the app's worker threads inherit it
+_flow_statements: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "flow_statements", default=None
+)
+
+
+def _count_statement(statement: str):
+    counter = _flow_statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def random_matrix(rng: np.random.Generator, n: int) -> List[List[float]]:
+    """Reciprocal judgment matrix: ratios of random weights snapped to the Saaty scale."""
+    weights = rng.uniform(1, 9, n)
+    ratios = np.log(weights[:, np.newaxis] / weights[np.newaxis, :])
+    nearest = np.abs(ratios[..., np.newaxis] - np.log(SAATY_SCALE)).argmin(axis=-1)
+    matrix = SAATY_SCALE[nearest]
+    rows, columns = np.triu_indices(n, 1)
+    matrix[columns, rows] = 1 / matrix[rows, columns]
+    return matrix.tolist()
+
+
+class LoadTest:
+    """Runs flows from `users` concurrent virtual users and collects per-request timings."""
+
+    def __init__(self, client: httpx.AsyncClient, users: int, criteria: int, alternatives: int,
+                 flows: Optional[int] = None, duration: Optional[float] = None, seed: int = 0):
+        self.client = client
+        self.users = users
+        self.criteria = [f"Criterion {i + 1}" for i in range(criteria)]
+        self.alternatives = [f"Alternative {i + 1}" for i in range(alternatives)]
+        self.flows = flows
+        self.duration = duration
+        self.rng = np.random.default_rng(seed)
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statements: List[int] = []
+        self.started_flows = 0
+        self.completed_flows = 0
+        self.failed_flows = 0
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> Any:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def run_flow(self):
+        decision = await self._request("POST /api/ahp/decision", "POST", "/api/ahp/decision", json={
+            "title": f"Load test {self.started_flows}",
+            "criteria": self.criteria,
+            "alternatives": self.alternatives
+        })
+        decision_id = decision["id"]
+
+        criteria_result = await self._request(
+            "POST /api/ahp/criteria-matrix", "POST", f"/api/ahp/criteria-matrix?decision_id={decision_id}",
+            json={"criteria_names": decision["criteria"], "matrix": random_matrix(self.rng, len(self.criteria))}
+        )
+
+        alternative_weights = []
+        for criteria_id, criteria_name in zip(decision["criteria_ids"], decision["criteria"]):
+            result = await self._request("POST /api/ahp/alternative-matrix", "POST", "/api/ahp/alternative-matrix", json={
+                "decision_id": decision_id,
+                "criteria_id": criteria_id,
+                "criteria_name": criteria_name,
+                "alternatives": decision["alternatives"],
+                "matrix": random_matrix(self.rng, len(self.alternatives))
+            })
+            alternative_weights.append(result["weights"])
+
+        await self._request("POST /api/ahp/final-ranking", "POST", "/api/ahp/final-ranking", json={
+            "decision_id": decision_id,
+            "alternatives": decision["alternatives"],
+            "criteria_weights": criteria_result["weights"],
+            "alternative_weights_by_criteria": alternative_weights
+        })
+        await self._request(
+            "GET /api/ahp/decision/{id}/ranking", "GET", f"/api/ahp/decision/{decision_id}/ranking"
+        )
+
+    def _more_flows(self, deadline: Optional[float]) -> bool:
+        if self.flows is not None and self.started_flows >= self.flows:
+            return False
+        return deadline is None or time.perf_counter() < deadline
+
+    async def _virtual_user(self, deadline: Optional[float]):
+        # Closed loop: the next flow starts as soon as the previous one finishes
+        while self._more_flows(deadline):
+            self.started_flows += 1
+            counter = [0]
+            token = _flow_statements.set(counter)
+            try:
+                await self.run_flow()
+                self.completed_flows += 1
+                self.statements.append(counter[0])
+            except Exception as e:
+                self.failed_flows += 1
+                print(f"Flow failed: {e}")
+            finally:
+                _flow_statements.reset(token)
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else None
+        await asyncio.gather(*(self._virtual_user(deadline) for _ in range(self.users)))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, values in self.latencies.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "mean_ms": float(np.mean(values)),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99)
+            }
+        statements = None
+        if any(self.statements):
+            statements = {
+                "mean": float(np.mean(self.statements)),
+                "min": int(np.min(self.statements)),
+                "max": int(np.max(self.statements))
+            }
+        return {
+            "users": self.users,
+            "criteria": len(self.criteria),
+            "alternatives": len(self.alternatives),
+            "duration_s": elapsed,
+            "flows": self.completed_flows,
+            "failed_flows": self.failed_flows,
+            "flows_per_s": self.completed_flows / elapsed,
+            "requests_per_s": sum(len(v) for v in self.latencies.values()) / elapsed,
+            "endpoints": endpoints,
+            "db_statements_per_flow": statements
+        }
+
+
+async def run_in_process(users: int, criteria: int, alternatives: int, flows: Optional[int] = None,
+                         duration: Optional[float] = None, seed: int = 0) -> Dict[str, Any]:
+    """Run the load test against the app in this process, using the configured (SQLite) backend."""
+    from main import app
+    from repositories import sqlite_repository
+
+    sqlite_repository.statement_listener = _count_statement
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                return await LoadTest(client, users, criteria, alternatives, flows, duration, seed).run()
+    finally:
+        sqlite_repository.statement_listener = None
+
+
+async def run_against_url(url: str, users: int, criteria: int, alternatives: int, flows: Optional[int] = None,
+                          duration: Optional[float] = None, seed: int = 0) -> Dict[str, Any]:
+    """Run the load test against a running server (no statement counts)."""
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await LoadTest(client, users, criteria, alternatives, flows, duration, seed).run()
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"{report['flows']} flows ({report['failed_flows']} failed) in {report['duration_s']:.1f}s "
+        f"with {report['users']} users, {report['criteria']} criteria x {report['alternatives']} alternatives"
+    )
+    print(f"Throughput: {report['flows_per_s']:.2f} flows/s, {report['requests_per_s']:.1f} requests/s")
+    print(f"{'Endpoint':<36} {'Requests':>8} {'Errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<36} {stats['requests']:>8} {stats['errors']:>6} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+    statements = report["db_statements_per_flow"]
+    if statements:
+        print(f"DB statements per flow: {statements['mean']:.1f} mean ({statements['min']}-{statements['max']})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Closed-loop load test of the decision wizard flow")
+    parser.add_argument("--users", type=int, default=4, help="concurrent virtual users")
+    parser.add_argument("--flows", type=int, default=None, help="total flows to run (default 50 without --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="run for this many seconds")
+    parser.add_argument("--criteria", type=int, default=4)
+    parser.add_argument("--alternatives", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="test a running server instead of the app in this process")
+    parser.add_argument("--sqlite-path", help="SQLite file for in-process runs (default: a temporary file)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+    if args.flows is None and args.duration is None:
+        args.flows = 50
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    options = dict(users=args.users, criteria=args.criteria, alternatives=args.alternatives,
+                   flows=args.flows, duration=args.duration, seed=args.seed)
+    if args.url:
+        report = asyncio.run(run_against_url(args.url, **options))
+    else:
+        # The in-process run always uses SQLite so it needs no database server
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = args.sqlite_path or os.path.join(tempfile.mkdtemp(), "loadtest.db")
+        os.environ["WEB_CONCURRENCY"] = "1"
+        report = asyncio.run(run_in_process(**options))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -1,6 +1,8 @@
-from fastapi import FastAPI, Depends, HTTPException
+import json
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 # Import modules
@@ -9,13 +11,33 @@ from models.schemas import (
     AlternativeComparisonInput, RankedAlternative,
     DecisionProblemInput, DecisionProblemOutput,
     StepByStepCalculation, AlternativeMatrixInput,
-    FinalRankingInput
+    FinalRankingInput, JudgmentUpdateInput,
+    AlternativeJudgmentUpdateInput, ConsistencySuggestionInput,
+    ConsistencySuggestionsOutput, JobSubmitInput,
+    JobStatus, JobResult, RatingLevelsInput,
+    RatingLevelsOutput, AlternativeRatingsInput,
+    AlternativeAddInput, AlternativeChangeOutput,
+    DecisionBatchInput
 )
 from services.ahp_service import AHPService
-from repositories.db_repository import DBRepository
+from services.job_queue import JobQueue
+from services.results_cache import results_cache
+from repositories.base_repository import BaseRepository
+from repositories.factory import create_repository
+from config import get_settings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One job pool per API worker process; worker processes are only spawned on first submit
+    settings = get_settings()
+    app.state.job_queue = JobQueue(
+        settings.job_workers, settings.job_max_pending, settings.job_retention_seconds
+    )
+    yield
+    app.state.job_queue.shutdown()
 
 # === FastAPI App Initialization ===
-app = FastAPI(title="AHP Decision Support API")
+app = FastAPI(title="AHP Decision Support API", lifespan=lifespan)
 
 # === CORS Configuration ===
 origins = [
@@ -32,16 +54,41 @@ app.add_middleware(
 )
 
 # Dependency Injection
-def get_db_repository():
+@contextmanager
+def repository_session():
     try:
-        repo = DBRepository()
-        return repo
+        repo = create_repository()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
+    try:
+        yield repo
+    finally:
+        repo.close()
 
-def get_ahp_service(db_repository: DBRepository = Depends(get_db_repository)):
+def get_db_repository():
+    with repository_session() as repo:
+        yield repo
+
+def get_ahp_service(db_repository: BaseRepository = Depends(get_db_repository)):
     return AHPService(db_repository)
 
+def get_calculation_service():
+    """AHP service for pure calculations that never touch the database."""
+    return AHPService(None)
+
+def get_cached_results(decision_id: int) -> Optional[Dict[str, Any]]:
+    """Cached results of a completed decision; routes open a repository only when this is None."""
+    return results_cache.get(decision_id)
+
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+def get_job_record(job_id: str, db_repository: BaseRepository = Depends(get_db_repository)):
+    job = db_repository.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 # === API Endpoints ===
 @app.post("/api/ahp/decision", response_model=DecisionProblemOutput)
 def create_decision_problem(
@@ -52,35 +99,101 @@ def create_decision_problem(
     decision_id = ahp_service.create_decision_problem(input_data)
     return ahp_service.get_decision_problem(decision_id)
 
+@app.post("/api/ahp/decisions/batch", response_model=List[DecisionProblemOutput])
+def create_decision_problems(
+    input_data: DecisionBatchInput,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """
+    Create many decision problems in one transaction. Send an Idempotency-Key header to make
+    retries safe: repeating a request with the same key returns the first response.
+    """
+    return ahp_service.create_decision_problems(input_data.decisions, idempotency_key)
+
 @app.get("/api/ahp/decision/{decision_id}", response_model=DecisionProblemOutput)
 def get_decision_problem(
     decision_id: int, 
-    ahp_service: AHPService = Depends(get_ahp_service)
+    cached: Optional[Dict[str, Any]] = Depends(get_cached_results)
 ):
-    """Get decision problem details by ID."""
-    return ahp_service.get_decision_problem(decision_id)
+    """Get decision problem details by ID. Completed decisions are served from the results cache."""
+    if cached is not None:
+        return cached["decision"]
+    with repository_session() as db_repository:
+        ahp_service = AHPService(db_repository)
+        decision = ahp_service.get_decision_problem(decision_id)
+        if decision.status == "completed":
+            ahp_service.get_decision_results(decision_id)  # Fill the cache for the next read
+        return decision
 
 @app.get("/api/ahp/decision/{decision_id}/criteria")
 def get_decision_criteria(
     decision_id: int, 
-    db_repository: DBRepository = Depends(get_db_repository)
+    cached: Optional[Dict[str, Any]] = Depends(get_cached_results)
 ):
     """Get all criteria for a specific decision problem with weights if available."""
-    try:
-        # Get decision problem to verify it exists
-        decision_data = db_repository.get_decision_problem(decision_id)
-        
-        # Get criteria with weights
-        criteria_data = db_repository.get_criteria_with_weights(decision_id)
-        
-        return {
-            "decision_id": decision_id,
-            "criteria": criteria_data
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving criteria: {str(e)}")
+    if cached is not None:
+        return {"decision_id": decision_id, "criteria": cached["criteria"]}
+    with repository_session() as db_repository:
+        try:
+            # Also verifies the decision exists
+            results = AHPService(db_repository).get_decision_results(decision_id)
+            if results is not None:
+                criteria_data = results["criteria"]
+            else:
+                criteria_data = db_repository.get_criteria_with_weights(decision_id)
+
+            return {
+                "decision_id": decision_id,
+                "criteria": criteria_data
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error retrieving criteria: {str(e)}")
+
+@app.get("/api/ahp/decision/{decision_id}/ranking", response_model=List[RankedAlternative])
+def get_decision_ranking(
+    decision_id: int,
+    cached: Optional[Dict[str, Any]] = Depends(get_cached_results)
+):
+    """Get the stored final ranking of a decision. Completed decisions are served from the results cache."""
+    if cached is None:
+        with repository_session() as db_repository:
+            ahp_service = AHPService(db_repository)
+            cached = ahp_service.get_decision_results(decision_id)
+            ranking = cached["ranking"] if cached is not None else ahp_service.get_final_ranking(decision_id)
+    else:
+        ranking = cached["ranking"]
+    if not ranking:
+        raise HTTPException(status_code=404, detail="No final ranking stored for this decision")
+    return ranking
+
+@app.post("/api/ahp/decision/{decision_id}/alternatives", response_model=AlternativeChangeOutput)
+def add_alternative(
+    decision_id: int,
+    input_data: AlternativeAddInput,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Add an alternative with one row of judgments per criterion; matrices are extended in place."""
+    return ahp_service.add_alternative(decision_id, input_data)
+
+@app.delete("/api/ahp/decision/{decision_id}/alternatives/{alternative_id}", response_model=AlternativeChangeOutput)
+def remove_alternative(
+    decision_id: int,
+    alternative_id: int,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Remove an alternative from a decision and re-rank the remaining ones."""
+    return ahp_service.remove_alternative(decision_id, alternative_id)
+
+@app.post("/api/ahp/decision/{decision_id}/reopen", response_model=DecisionProblemOutput)
+def reopen_decision(
+    decision_id: int,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Move a completed decision back to in_progress and drop its cached results."""
+    return ahp_service.reopen_decision(decision_id)
 
 @app.post("/api/ahp/criteria-matrix", response_model=StepByStepCalculation)
 def compute_criteria_weights(
@@ -91,6 +204,17 @@ def compute_criteria_weights(
     """Compute criteria weights from pairwise comparison matrix with detailed steps."""
     return ahp_service.compute_criteria_weights(decision_id, input_data)
 
+@app.patch("/api/ahp/criteria-matrix", response_model=StepByStepCalculation)
+def update_criteria_judgment(
+    decision_id: int,
+    input_data: JudgmentUpdateInput,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Change one criteria judgment and incrementally recompute weights and consistency."""
+    return ahp_service.update_judgment(
+        decision_id, None, input_data.row, input_data.column, input_data.value
+    )
+
 @app.post("/api/ahp/alternative-matrix", response_model=StepByStepCalculation)
 def compute_alternative_weights(
     input_data: AlternativeMatrixInput, 
@@ -105,6 +229,103 @@ def compute_alternative_weights(
         input_data.matrix
     )
 
+@app.patch("/api/ahp/alternative-matrix", response_model=StepByStepCalculation)
+def update_alternative_judgment(
+    input_data: AlternativeJudgmentUpdateInput,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Change one alternative judgment for a criterion and incrementally recompute its weights."""
+    return ahp_service.update_judgment(
+        input_data.decision_id,
+        input_data.criteria_id,
+        input_data.row,
+        input_data.column,
+        input_data.value
+    )
+
+@app.post("/api/ahp/consistency-suggestions", response_model=ConsistencySuggestionsOutput)
+def suggest_consistency_improvements(
+    input_data: ConsistencySuggestionInput,
+    ahp_service: AHPService = Depends(get_calculation_service)
+):
+    """Rank the judgments most responsible for inconsistency with the best single-cell fix for each."""
+    return ahp_service.suggest_consistency_improvements(
+        input_data.matrix, input_data.labels, input_data.top_k
+    )
+
+@app.websocket("/api/ahp/decision/{decision_id}/session")
+async def matrix_editing_session(websocket: WebSocket, decision_id: int):
+    """Live matrix-editing session: stream weights and CR for cell edits, persist on commit or idle."""
+    # Imported on first use so HTTP-only workers don't pay for it at startup
+    from services.matrix_session import MatrixSession
+    await MatrixSession(websocket, decision_id).run()
+
+@app.post("/api/ahp/jobs", response_model=JobStatus, status_code=202)
+def submit_job(input_data: JobSubmitInput, job_queue: JobQueue = Depends(get_job_queue)):
+    """
+    Queue heavy work for the background process pool and return the job ID immediately.
+    "weights" computes weights and CR for a batch of matrices; "recompute" recomputes and stores
+    all weights and scores of a decision. Returns 429 with Retry-After when the queue is full.
+    """
+    if input_data.kind == "weights":
+        if not input_data.matrices:
+            raise HTTPException(status_code=400, detail="Weights jobs need matrices")
+        job_id = job_queue.submit_weights(input_data.matrices)
+    elif input_data.kind == "recompute":
+        if input_data.decision_id is None:
+            raise HTTPException(status_code=400, detail="Recompute jobs need a decision_id")
+        job_id = job_queue.submit_recompute(input_data.decision_id)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {input_data.kind}")
+    return JobStatus(id=job_id, kind=input_data.kind, status="queued", progress=0.0)
+
+@app.get("/api/ahp/jobs/{job_id}", response_model=JobStatus)
+def get_job_status(job: Dict = Depends(get_job_record)):
+    """Get a job's status and progress (fraction of finished chunks)."""
+    return JobStatus(**{k: job[k] for k in ("id", "kind", "status", "progress", "error")})
+
+@app.get("/api/ahp/jobs/{job_id}/result", response_model=JobResult)
+def get_job_result(job: Dict = Depends(get_job_record)):
+    """Get a completed job's result; 409 while it is still queued or running, or if it failed."""
+    if job["status"] != "completed":
+        detail = f"Job failed: {job['error']}" if job["status"] == "failed" else f"Job is {job['status']}"
+        raise HTTPException(status_code=409, detail=detail)
+    return JobResult(id=job["id"], kind=job["kind"], result=json.loads(job["result"]))
+
+@app.post("/api/ahp/decision/{decision_id}/rating-levels", response_model=RatingLevelsOutput)
+def set_rating_levels(
+    decision_id: int,
+    input_data: RatingLevelsInput,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Define a criterion's rating levels (ratings mode) from a pairwise comparison of the levels."""
+    return ahp_service.set_rating_levels(decision_id, input_data)
+
+@app.get("/api/ahp/decision/{decision_id}/rating-levels", response_model=List[RatingLevelsOutput])
+def get_rating_levels(
+    decision_id: int,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Get the rating levels of every criterion of a decision."""
+    return ahp_service.get_rating_levels(decision_id)
+
+@app.put("/api/ahp/decision/{decision_id}/ratings")
+def rate_alternatives(
+    decision_id: int,
+    input_data: AlternativeRatingsInput,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Assign each alternative a rating level per criterion instead of comparing alternatives pairwise."""
+    return {"decision_id": decision_id, "ratings": ahp_service.rate_alternatives(decision_id, input_data)}
+
+@app.post("/api/ahp/decision/{decision_id}/ratings-ranking", response_model=List[RankedAlternative])
+def calculate_ratings_ranking(
+    decision_id: int,
+    ahp_service: AHPService = Depends(get_ahp_service)
+):
+    """Rank all alternatives from their ratings and the stored criteria weights."""
+    return ahp_service.calculate_ratings_ranking(decision_id)
+
 @app.post("/api/ahp/final-ranking", response_model=List[RankedAlternative])
 def calculate_final_ranking(
     input_data: FinalRankingInput, 
@@ -150,31 +371,17 @@ def rank_alternatives(
     )
 
 @app.get("/api/ahp/criteria")
-def get_all_criteria(db_repository: DBRepository = Depends(get_db_repository)):
+def get_all_criteria(db_repository: BaseRepository = Depends(get_db_repository)):
     """Get all available criteria."""
     try:
-        query = "SELECT id, name, description FROM criteria ORDER BY name"
-        db_repository.cursor.execute(query)
-        criteria = db_repository.cursor.fetchall()
-        
-        return [
-            {"id": c[0], "name": c[1], "description": c[2]}
-            for c in criteria
-        ]
+        return db_repository.get_all_criteria()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving criteria: {str(e)}")
 
 @app.get("/api/ahp/alternatives")
-def get_all_alternatives(db_repository: DBRepository = Depends(get_db_repository)):
+def get_all_alternatives(db_repository: BaseRepository = Depends(get_db_repository)):
     """Get all available alternatives."""
     try:
-        query = "SELECT id, name, description FROM alternatives ORDER BY name"
-        db_repository.cursor.execute(query)
-        alternatives = db_repository.cursor.fetchall()
-        
-        return [
-            {"id": a[0], "name": a[1], "description": a[2]}
-            for a in alternatives
-        ]
+        return db_repository.get_all_alternatives()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving alternatives: {str(e)}")
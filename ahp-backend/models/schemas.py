@@ -17,10 +17,25 @@ class DecisionProblemOutput(BaseModel):
     criteria_ids: List[int]
     alternative_ids: List[int]
 
+class DecisionBatchInput(BaseModel):
+    decisions: List[DecisionProblemInput]
+
 class PairwiseMatrixInput(BaseModel):
     criteria_names: List[str]
     matrix: List[List[float]]
 
+class JudgmentUpdateInput(BaseModel):
+    row: int
+    column: int
+    value: float
+
+class AlternativeJudgmentUpdateInput(BaseModel):
+    decision_id: int
+    criteria_id: int
+    row: int
+    column: int
+    value: float
+
 class AlternativeMatrixInput(BaseModel):
     decision_id: int
     criteria_id: int
@@ -36,6 +51,27 @@ class ConsistencyCheck(BaseModel):
     cr: float
     is_consistent: bool
 
+class ConsistencySuggestionInput(BaseModel):
+    matrix: List[List[float]]
+    labels: Optional[List[str]] = None
+    top_k: int = 10
+
+class JudgmentSuggestion(BaseModel):
+    row: int
+    column: int
+    row_label: Optional[str] = None
+    column_label: Optional[str] = None
+    current_value: float
+    error: float
+    ideal_value: float
+    suggested_value: float
+    resulting_cr: float
+
+class ConsistencySuggestionsOutput(BaseModel):
+    cr: float
+    is_consistent: bool
+    suggestions: List[JudgmentSuggestion]
+
 class StepByStepCalculation(BaseModel):
     step_name: str
     original_matrix: List[List[float]]
@@ -74,3 +110,62 @@ class RankedAlternative(BaseModel):
     rank: int
     local_weights: Optional[Dict[str, float]] = None
     consistency_checks: Optional[Dict[str, Dict[str, Any]]] = None
+
+class AlternativeJudgmentsRow(BaseModel):
+    criteria_id: int
+    values: List[float]  # values[j]: the new alternative compared with the j-th alternative (display order)
+
+class AlternativeAddInput(BaseModel):
+    name: str
+    judgments: List[AlternativeJudgmentsRow] = []  # one row per criterion with a stored alternative matrix
+
+class CriterionAlternativeWeights(BaseModel):
+    criteria_id: int
+    alternative_ids: List[int]
+    weights: List[float]
+    consistency_check: ConsistencyCheck
+
+class AlternativeChangeOutput(BaseModel):
+    decision: DecisionProblemOutput
+    alternative_weights: List[CriterionAlternativeWeights]
+    ranking: List[RankedAlternative]  # empty until every criterion has weights and an alternative matrix
+
+class RatingLevelsInput(BaseModel):
+    criteria_id: int
+    levels: List[str]  # e.g. ["Excellent", "Good", "Fair", "Poor"]
+    matrix: List[List[float]]  # pairwise comparison of the levels
+
+class RatingLevel(BaseModel):
+    id: int
+    name: str
+    priority: float  # idealized: the best level scores 1
+
+class RatingLevelsOutput(BaseModel):
+    criteria_id: int
+    levels: List[RatingLevel]
+    consistency_check: Optional[ConsistencyCheck] = None
+
+class CriterionRatings(BaseModel):
+    criteria_id: int
+    alternative_ids: List[int]
+    level_ids: List[int]  # level_ids[i] is the rating of alternative_ids[i]
+
+class AlternativeRatingsInput(BaseModel):
+    ratings: List[CriterionRatings]
+
+class JobSubmitInput(BaseModel):
+    kind: str  # "weights" (needs matrices) or "recompute" (needs decision_id)
+    matrices: Optional[List[List[List[float]]]] = None
+    decision_id: Optional[int] = None
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, completed, failed
+    progress: float
+    error: Optional[str] = None
+
+class JobResult(BaseModel):
+    id: str
+    kind: str
+    result: Any
@@ -0,0 +1,335 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+
+
+class BaseRepository(ABC):
+    """
+    Storage interface used by the AHP service and API routes.
+    Concrete backends (SQL Server, SQLite) implement every method with the same behavior.
+    """
+
+    @abstractmethod
+    def create_decision_problem(self, title: str, description: str = None) -> int:
+        """Create a new decision problem and return its ID."""
+
+    @abstractmethod
+    def create_decision_problems(
+        self, decisions: List[Tuple[str, Optional[str], List[str], List[str]]]
+    ) -> List[Tuple[int, List[int], List[int]]]:
+        """
+        Create many decisions given as (title, description, criteria_names, alternative_names) with
+        bulk statements. Returns (decision_id, criteria_ids, alternative_ids) for each, in order.
+        """
+
+    @abstractmethod
+    def save_criteria_to_db(self, criteria_names: List[str]) -> List[int]:
+        """Save criteria to database if they don't exist and return their IDs."""
+
+    @abstractmethod
+    def save_alternatives_to_db(self, alternatives: List[str]) -> List[int]:
+        """Save alternatives to database if they don't exist and return their IDs."""
+
+    @abstractmethod
+    def link_criteria_to_decision(self, decision_id: int, criteria_ids: List[int]):
+        """Link criteria to a decision problem."""
+
+    @abstractmethod
+    def link_alternatives_to_decision(self, decision_id: int, alternative_ids: List[int]):
+        """Link alternatives to a decision problem."""
+
+    @abstractmethod
+    def append_alternative_to_decision(self, decision_id: int, alternative_id: int):
+        """Link one more alternative to a decision, after the existing ones in display order."""
+
+    @abstractmethod
+    def remove_alternative_from_decision(self, decision_id: int, alternative_id: int):
+        """Unlink an alternative and delete its comparisons, scores and ratings in the decision."""
+
+    @abstractmethod
+    def save_criteria_comparison_matrix(self, decision_id: int, criteria_ids: List[int], matrix: List[List[float]]):
+        """Save criteria pairwise comparison matrix."""
+
+    @abstractmethod
+    def save_criteria_comparison_cells(self, decision_id: int, cells: List[Tuple[int, int, float]]):
+        """Upsert individual criteria comparison cells given as (row_id, column_id, value)."""
+
+    @abstractmethod
+    def get_criteria_comparison_matrix(self, decision_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored criteria matrix as (criteria_ids, matrix), or None if it is not complete."""
+
+    @abstractmethod
+    def get_matrix_version(self, decision_id: int) -> int:
+        """Get the decision's matrix version, bumped on every comparison matrix write."""
+
+    @abstractmethod
+    def claim_matrix_version(self, decision_id: int, expected_version: int) -> bool:
+        """Bump the matrix version only if it still equals expected_version. Returns False on conflict."""
+
+    @abstractmethod
+    def save_criteria_weights(self, decision_id: int, criteria_ids: List[int], weights: List[float]):
+        """Save calculated criteria weights."""
+
+    @abstractmethod
+    def save_consistency_check(self, decision_id: int, criteria_id: Optional[int],
+                              lambda_max: float, ci: float, cr: float, is_consistent: bool):
+        """Save consistency check results."""
+
+    @abstractmethod
+    def save_alternative_comparison_matrix(self, decision_id: int, criteria_id: int,
+                                          alternative_ids: List[int], matrix: List[List[float]]):
+        """Save alternative pairwise comparison matrix for a specific criterion."""
+
+    @abstractmethod
+    def save_alternative_comparison_cells(self, decision_id: int, criteria_id: int,
+                                         cells: List[Tuple[int, int, float]]):
+        """Upsert individual alternative comparison cells given as (row_id, column_id, value)."""
+
+    @abstractmethod
+    def get_alternative_comparison_matrix(self, decision_id: int,
+                                         criteria_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored alternative matrix for a criterion as (alternative_ids, matrix), or None."""
+
+    @abstractmethod
+    def save_alternative_scores(self, decision_id: int, alternative_ids: List[int],
+                               criteria_id: Optional[int], scores: List[float], is_final: bool = False):
+        """Save calculated alternative scores for a specific criterion or final scores."""
+
+    @abstractmethod
+    def get_decision_problem(self, decision_id: int) -> Dict[str, Any]:
+        """Get decision problem details including criteria and alternatives."""
+
+    @abstractmethod
+    def get_criteria_weights(self, decision_id: int) -> Dict[int, float]:
+        """Get calculated criteria weights for a decision problem."""
+
+    @abstractmethod
+    def get_alternative_scores(self, decision_id: int, is_final: bool = True) -> List[Dict[str, Any]]:
+        """Get alternative scores for a decision problem."""
+
+    @abstractmethod
+    def update_decision_status(self, decision_id: int, status: str):
+        """Update the status of a decision problem."""
+
+    @abstractmethod
+    def get_criteria_with_weights(self, decision_id: int) -> List[Dict[str, Any]]:
+        """Get criteria with weights for a decision problem."""
+
+    @abstractmethod
+    def get_all_criteria(self) -> List[Dict[str, Any]]:
+        """Get all available criteria ordered by name."""
+
+    @abstractmethod
+    def get_all_alternatives(self) -> List[Dict[str, Any]]:
+        """Get all available alternatives ordered by name."""
+
+    @abstractmethod
+    def save_rating_levels(self, decision_id: int, criteria_id: int,
+                           names: List[str], priorities: List[float]) -> List[int]:
+        """Replace a criterion's rating levels (kept by name) and return their IDs in order."""
+
+    @abstractmethod
+    def get_rating_levels(self, decision_id: int) -> List[Dict[str, Any]]:
+        """Get all rating levels of a decision ordered by criterion and display order."""
+
+    @abstractmethod
+    def save_alternative_ratings(self, decision_id: int, ratings: List[Tuple[int, int, int]]):
+        """Upsert ratings given as (alternative_id, criteria_id, level_id)."""
+
+    @abstractmethod
+    def get_alternative_ratings(self, decision_id: int) -> List[Tuple[int, int, int]]:
+        """Get all ratings of a decision as (alternative_id, criteria_id, level_id)."""
+
+    @abstractmethod
+    def create_job(self, job_id: str, kind: str):
+        """Record a newly submitted background job as queued."""
+
+    @abstractmethod
+    def mark_job_running(self, job_id: str):
+        """Move a job from queued to running (no-op if it already moved on)."""
+
+    @abstractmethod
+    def update_job(self, job_id: str, status: str, progress: float,
+                   result: Optional[str] = None, error: Optional[str] = None):
+        """Update a job's status and progress; result is JSON text."""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record (id, kind, status, progress, result, error), or None."""
+
+    @abstractmethod
+    def delete_finished_jobs(self, before: datetime):
+        """Delete completed and failed jobs last updated before the given time."""
+
+    @abstractmethod
+    def get_idempotency_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the stored request_hash and response of an idempotency key, or None."""
+
+    @abstractmethod
+    def save_idempotency_record(self, key: str, request_hash: str, response: str):
+        """Store the response for an idempotency key; fails if the key is already stored."""
+
+    @abstractmethod
+    def delete_idempotency_records(self, before: datetime):
+        """Delete idempotency records created before the given time."""
+
+    @abstractmethod
+    def close(self):
+        """Release the underlying database connection."""
+
+    @abstractmethod
+    def _read_matrix_blob(self, decision_id: int, criteria_id: Optional[int]) -> Optional[Tuple[bytes, bytes, str]]:
+        """Read the (ids, matrix, dtype) blob row of a matrix; criteria_id None is the criteria matrix."""
+
+    @abstractmethod
+    def _write_matrix_blob(self, decision_id: int, criteria_id: Optional[int], size: int, dtype: str,
+                           ids: bytes, matrix: bytes):
+        """Insert or replace the blob row of a matrix."""
+
+    @contextmanager
+    def transaction(self):
+        """Group several repository writes into a single commit; everything is rolled back on error."""
+        self._in_transaction = True
+        try:
+            yield self
+        except Exception:
+            self._in_transaction = False
+            self.conn.rollback()
+            raise
+        self._in_transaction = False
+        self.conn.commit()
+
+    def _commit(self):
+        """Commit unless the write is part of an enclosing transaction()."""
+        if not getattr(self, "_in_transaction", False):
+            self.conn.commit()
+
+    def save_matrix_update(self, decision_id: int, criteria_id: Optional[int], expected_version: int,
+                           cells: List[Tuple[int, int, float]], ids: List[int], weights: List[float],
+                           lambda_max: float, ci: float, cr: float, is_consistent: bool) -> Optional[int]:
+        """
+        Persist changed cells with the matching weights and consistency check in one transaction,
+        guarded by the decision's matrix version. Returns the new version, or None if another
+        writer changed the decision's matrices since expected_version was read.
+        """
+        with self.transaction():
+            if not self.claim_matrix_version(decision_id, expected_version):
+                return None
+            if criteria_id is None:
+                self.save_criteria_comparison_cells(decision_id, cells)
+                self.save_criteria_weights(decision_id, ids, weights)
+            else:
+                self.save_alternative_comparison_cells(decision_id, criteria_id, cells)
+                self.save_alternative_scores(decision_id, ids, criteria_id, weights)
+            self.save_consistency_check(decision_id, criteria_id, lambda_max, ci, cr, is_consistent)
+        return expected_version + 1
+
+    @staticmethod
+    def _build_matrix(ordered_ids: List[int],
+                      cells: List[Tuple[int, int, float]]) -> Optional[Tuple[List[int], np.ndarray]]:
+        """
+        Assemble (row_id, column_id, value) cells into a square matrix ordered by ordered_ids.
+        IDs without any stored cell are skipped; returns None if the remaining matrix has gaps.
+        """
+        present = {cell[0] for cell in cells}
+        ids = [id_ for id_ in ordered_ids if id_ in present]
+        if not ids:
+            return None
+
+        index = {id_: i for i, id_ in enumerate(ids)}
+        matrix = np.full((len(ids), len(ids)), np.nan)
+        for row_id, col_id, value in cells:
+            if row_id in index and col_id in index:
+                matrix[index[row_id], index[col_id]] = value
+
+        if np.isnan(matrix).any():
+            return None
+        return ids, matrix
+
+    # === Blob matrix storage (MATRIX_STORAGE=blob) ===
+    # One row per matrix: IDs as little-endian int32 and values as row-major little-endian
+    # float64 ("f8") or float32 ("f4"), read back with np.frombuffer.
+
+    @staticmethod
+    def _decode_matrix(ids: bytes, matrix: bytes, dtype: str) -> Tuple[List[int], np.ndarray]:
+        """Decode blobs into (ids, matrix); the matrix is a read-only view over the bytes."""
+        id_list = np.frombuffer(ids, dtype="<i4").tolist()
+        values = np.frombuffer(matrix, dtype="<" + dtype).reshape(len(id_list), len(id_list))
+        return id_list, values
+
+    def _store_matrix_blob(self, decision_id: int, criteria_id: Optional[int], ids: List[int], matrix: np.ndarray):
+        dtype = np.dtype(self.matrix_dtype).str[1:]
+        self._write_matrix_blob(
+            decision_id, criteria_id, len(ids), dtype,
+            np.asarray(ids, dtype="<i4").tobytes(),
+            np.ascontiguousarray(matrix, dtype="<" + dtype).tobytes()
+        )
+
+    def _save_matrix_blob(self, decision_id: int, criteria_id: Optional[int],
+                          ids: List[int], matrix: List[List[float]]):
+        """Write an ids x ids block of values into a blob matrix, keeping cells of other IDs."""
+        matrix = np.asarray(matrix, dtype=float)
+        stored = self._read_matrix_blob(decision_id, criteria_id)
+        if stored is not None:
+            stored_ids, _ = self._decode_matrix(*stored)
+            if not set(stored_ids) <= set(ids):
+                rows, cols = np.meshgrid(ids, ids, indexing="ij")
+                cells = zip(rows.ravel().tolist(), cols.ravel().tolist(), matrix.ravel().tolist())
+                self._save_matrix_blob_cells(decision_id, criteria_id, list(cells))
+                return
+        # Every stored cell is overwritten, so the block replaces the row
+        self._store_matrix_blob(decision_id, criteria_id, ids, matrix)
+
+    def _save_matrix_blob_cells(self, decision_id: int, criteria_id: Optional[int],
+                                cells: List[Tuple[int, int, float]]):
+        """Write (row_id, column_id, value) cells into a blob matrix; new IDs add NaN-filled rows."""
+        stored = self._read_matrix_blob(decision_id, criteria_id)
+        ids, values = self._decode_matrix(*stored) if stored is not None else ([], np.empty((0, 0)))
+        position = {id_: i for i, id_ in enumerate(ids)}
+        for row_id, col_id, _ in cells:
+            for id_ in (row_id, col_id):
+                if id_ not in position:
+                    position[id_] = len(ids)
+                    ids.append(id_)
+
+        matrix = np.full((len(ids), len(ids)), np.nan)
+        matrix[:len(values), :len(values)] = values
+        if cells:
+            rows, cols, new_values = zip(*cells)
+            matrix[[position[r] for r in rows], [position[c] for c in cols]] = new_values
+        self._store_matrix_blob(decision_id, criteria_id, ids, matrix)
+
+    def _remove_from_matrix_blob(self, decision_id: int, criteria_id: Optional[int], id_: int):
+        """Drop one ID's row and column from a blob matrix."""
+        stored = self._read_matrix_blob(decision_id, criteria_id)
+        if stored is None:
+            return
+        ids, values = self._decode_matrix(*stored)
+        if id_ not in ids:
+            return
+        keep = [i for i, other in enumerate(ids) if other != id_]
+        self._store_matrix_blob(decision_id, criteria_id, [ids[i] for i in keep], values[np.ix_(keep, keep)])
+
+    def _get_matrix_blob(self, decision_id: int, criteria_id: Optional[int],
+                         ordered_ids: List[int]) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Blob counterpart of _build_matrix: the matrix in display order, or None if it has gaps."""
+        stored = self._read_matrix_blob(decision_id, criteria_id)
+        if stored is None:
+            return None
+        ids, matrix = self._decode_matrix(*stored)
+        position = {id_: i for i, id_ in enumerate(ids)}
+        ordered = [id_ for id_ in ordered_ids if id_ in position]
+        if not ordered:
+            return None
+
+        # Zero-copy when the stored order already is the display order
+        if ordered != ids:
+            index = [position[id_] for id_ in ordered]
+            matrix = matrix[np.ix_(index, index)]
+        if matrix.dtype != np.float64:
+            matrix = matrix.astype(np.float64)
+        if np.isnan(matrix).any():
+            return None
+        return ordered, matrix
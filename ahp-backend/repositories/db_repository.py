@@ -1,24 +1,33 @@
 import pyodbc
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import numpy as np
 from datetime import datetime
 from fastapi import HTTPException
-import os
-from dotenv import load_dotenv
+from config import get_settings
+from repositories.base_repository import BaseRepository
+
+class DBRepository(BaseRepository):
+    """SQL Server implementation of the repository (pyodbc)."""
+
+    # SQL Server allows 2100 parameters per statement and 1000 rows per INSERT ... VALUES
+    MAX_PARAMETERS = 2000
+    MAX_INSERT_ROWS = 1000
 
-class DBRepository:
     def __init__(self):
-        load_dotenv()  # Load environment variables from .env file
+        settings = get_settings()
+        self.matrix_storage = settings.matrix_storage
+        self.matrix_dtype = settings.matrix_dtype
         self.conn = self._get_db_connection()
         self.cursor = self.conn.cursor()
     
     def _get_db_connection(self):
-        """Establish database connection using environment variables."""
+        """Establish database connection using the configured settings."""
         try:
-            server = os.getenv('DB_SERVER')
-            database = os.getenv('DB_DATABASE')
-            username = os.getenv('DB_USERNAME')
-            password = os.getenv('DB_PASSWORD')
+            settings = get_settings()
+            server = settings.db_server
+            database = settings.db_database
+            username = settings.db_username
+            password = settings.db_password
             
             # Check if using Windows authentication or SQL authentication
             if username and password:
@@ -45,14 +54,13 @@ class DBRepository:
     def create_decision_problem(self, title: str, description: str = None) -> int:
         """Create a new decision problem and return its ID."""
         try:
+            # OUTPUT returns this row's ID even while other sessions insert decisions
             self.cursor.execute(
-                "INSERT INTO decision_problems (title, description, status) VALUES (?, ?, ?)",
+                "INSERT INTO decision_problems (title, description, status) OUTPUT INSERTED.id VALUES (?, ?, ?)",
                 (title, description, 'in_progress')
             )
-            self.conn.commit()
-            
-            self.cursor.execute("SELECT TOP 1 id FROM decision_problems ORDER BY id DESC")
             result = self.cursor.fetchone()
+            self._commit()
             
             if not result:
                 raise HTTPException(status_code=500, detail="Failed to retrieve decision problem ID")
@@ -61,52 +69,90 @@ class DBRepository:
         except pyodbc.Error as e:
             self.conn.rollback()
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    def _resolve_names(self, table: str, names: List[str]) -> List[int]:
+        """Return IDs for names in the given lookup table, inserting missing ones in bulk."""
+        unique_names = list(dict.fromkeys(names))
+        ids_by_name = {}
+        for start in range(0, len(unique_names), self.MAX_PARAMETERS):
+            chunk = unique_names[start:start + self.MAX_PARAMETERS]
+            values = ", ".join("(?)" for _ in chunk)
+            # HOLDLOCK stops two sessions from inserting the same name concurrently
+            self.cursor.execute(
+                f"MERGE INTO {table} WITH (HOLDLOCK) AS t USING (VALUES {values}) AS s (name) "
+                f"ON t.name = s.name WHEN NOT MATCHED THEN INSERT (name) VALUES (s.name);",
+                chunk
+            )
+            # Joining on the sent names keeps the mapping right under case-insensitive collations
+            self.cursor.execute(
+                f"SELECT s.name, t.id FROM (VALUES {values}) AS s (name) JOIN {table} t ON t.name = s.name",
+                chunk
+            )
+            ids_by_name.update((row[0], row[1]) for row in self.cursor.fetchall())
+        self._commit()
+        return [ids_by_name[name] for name in names]
+
+    def _insert_rows(self, table: str, columns: List[str], rows: List[tuple]):
+        """Insert rows with multi-row INSERT statements, chunked under SQL Server's parameter limit."""
+        per_statement = min(self.MAX_INSERT_ROWS, self.MAX_PARAMETERS // len(columns))
+        row_placeholder = "(" + ", ".join("?" for _ in columns) + ")"
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            self.cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join(row_placeholder for _ in chunk)}",
+                [value for row in chunk for value in row]
+            )
+
+    def create_decision_problems(
+        self, decisions: List[Tuple[str, Optional[str], List[str], List[str]]]
+    ) -> List[Tuple[int, List[int], List[int]]]:
+        """
+        Create many decisions given as (title, description, criteria_names, alternative_names) with
+        bulk statements. Returns (decision_id, criteria_ids, alternative_ids) for each, in order.
+        """
+        # Every name is resolved once for the whole batch
+        criteria_names = [name for _, _, criteria, _ in decisions for name in criteria]
+        alternative_names = [name for _, _, _, alternatives in decisions for name in alternatives]
+        criteria_ids = dict(zip(criteria_names, self._resolve_names("criteria", criteria_names)))
+        alternative_ids = dict(zip(alternative_names, self._resolve_names("alternatives", alternative_names)))
+
+        # MERGE (unlike INSERT) can OUTPUT source columns, so each new ID is matched to its input position
+        decision_ids = [None] * len(decisions)
+        per_statement = self.MAX_PARAMETERS // 2
+        for start in range(0, len(decisions), per_statement):
+            chunk = decisions[start:start + per_statement]
+            values = ", ".join(f"({start + i}, ?, ?)" for i in range(len(chunk)))
+            self.cursor.execute(
+                f"MERGE INTO decision_problems AS t USING (VALUES {values}) AS s (position, title, description) "
+                f"ON 1 = 0 WHEN NOT MATCHED THEN INSERT (title, description, status) "
+                f"VALUES (s.title, s.description, 'in_progress') OUTPUT s.position, INSERTED.id;",
+                [value for title, description, _, _ in chunk for value in (title, description)]
+            )
+            for position, decision_id in self.cursor.fetchall():
+                decision_ids[position] = decision_id
+
+        created = [
+            (decision_id, [criteria_ids[name] for name in criteria], [alternative_ids[name] for name in alternatives])
+            for decision_id, (_, _, criteria, alternatives) in zip(decision_ids, decisions)
+        ]
+        self._insert_rows(
+            "decision_criteria", ["decision_id", "criteria_id", "display_order"],
+            [(decision_id, criteria_id, i) for decision_id, ids, _ in created for i, criteria_id in enumerate(ids)]
+        )
+        self._insert_rows(
+            "decision_alternatives", ["decision_id", "alternative_id", "display_order"],
+            [(decision_id, alternative_id, i) for decision_id, _, ids in created for i, alternative_id in enumerate(ids)]
+        )
+        self._commit()
+        return created
     
     def save_criteria_to_db(self, criteria_names: List[str]) -> List[int]:
         """Save criteria to database if they don't exist and return their IDs."""
-        criteria_ids = []
-        
-        for name in criteria_names:
-            self.cursor.execute("SELECT id FROM criteria WHERE name = ?", (name,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                criteria_ids.append(result[0])
-            else:
-                self.cursor.execute(
-                    "INSERT INTO criteria (name) VALUES (?)", 
-                    (name,)
-                )
-                self.conn.commit()
-                
-                self.cursor.execute("SELECT TOP 1 id FROM criteria ORDER BY id DESC")
-                new_id = self.cursor.fetchone()[0]
-                criteria_ids.append(new_id)
-        
-        return criteria_ids
+        return self._resolve_names("criteria", criteria_names)
     
     def save_alternatives_to_db(self, alternatives: List[str]) -> List[int]:
         """Save alternatives to database if they don't exist and return their IDs."""
-        alternative_ids = []
-        
-        for name in alternatives:
-            self.cursor.execute("SELECT id FROM alternatives WHERE name = ?", (name,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                alternative_ids.append(result[0])
-            else:
-                self.cursor.execute(
-                    "INSERT INTO alternatives (name) VALUES (?)", 
-                    (name,)
-                )
-                self.conn.commit()
-                
-                self.cursor.execute("SELECT TOP 1 id FROM alternatives ORDER BY id DESC")
-                new_id = self.cursor.fetchone()[0]
-                alternative_ids.append(new_id)
-        
-        return alternative_ids
+        return self._resolve_names("alternatives", alternatives)
     
     def link_criteria_to_decision(self, decision_id: int, criteria_ids: List[int]):
         """Link criteria to a decision problem."""
@@ -115,7 +161,7 @@ class DBRepository:
                 "INSERT INTO decision_criteria (decision_id, criteria_id, display_order) VALUES (?, ?, ?)",
                 (decision_id, criteria_id, i)
             )
-        self.conn.commit()
+        self._commit()
     
     def link_alternatives_to_decision(self, decision_id: int, alternative_ids: List[int]):
         """Link alternatives to a decision problem."""
@@ -124,10 +170,42 @@ class DBRepository:
                 "INSERT INTO decision_alternatives (decision_id, alternative_id, display_order) VALUES (?, ?, ?)",
                 (decision_id, alternative_id, i)
             )
-        self.conn.commit()
+        self._commit()
     
+    def append_alternative_to_decision(self, decision_id: int, alternative_id: int):
+        """Link one more alternative to a decision, after the existing ones in display order."""
+        self.cursor.execute(
+            "INSERT INTO decision_alternatives (decision_id, alternative_id, display_order) "
+            "SELECT ?, ?, COALESCE(MAX(display_order) + 1, 0) FROM decision_alternatives WHERE decision_id = ?",
+            (decision_id, alternative_id, decision_id)
+        )
+        self._commit()
+
+    def remove_alternative_from_decision(self, decision_id: int, alternative_id: int):
+        """Unlink an alternative and delete its comparisons, scores and ratings in the decision."""
+        if self.matrix_storage == "blob":
+            self.cursor.execute("SELECT criteria_id FROM alternative_matrices WHERE decision_id = ?", (decision_id,))
+            for (criteria_id,) in self.cursor.fetchall():
+                self._remove_from_matrix_blob(decision_id, criteria_id, alternative_id)
+        else:
+            self.cursor.execute(
+                "DELETE FROM alternative_comparisons WHERE decision_id = ? "
+                "AND (row_alternative_id = ? OR column_alternative_id = ?)",
+                (decision_id, alternative_id, alternative_id)
+            )
+        for table in ("alternative_scores", "alternative_ratings", "decision_alternatives"):
+            self.cursor.execute(
+                f"DELETE FROM {table} WHERE decision_id = ? AND alternative_id = ?", (decision_id, alternative_id)
+            )
+        self._commit()
+
     def save_criteria_comparison_matrix(self, decision_id: int, criteria_ids: List[int], matrix: List[List[float]]):
         """Save criteria pairwise comparison matrix."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob(decision_id, None, criteria_ids, matrix)
+            self._bump_matrix_version(decision_id)
+            self._commit()
+            return
         for i, row_id in enumerate(criteria_ids):
             for j, col_id in enumerate(criteria_ids):
                 value = matrix[i][j]
@@ -152,8 +230,67 @@ class DBRepository:
                         "VALUES (?, ?, ?, ?)",
                         (decision_id, row_id, col_id, value)
                     )
-        self.conn.commit()
+        self._bump_matrix_version(decision_id)
+        self._commit()
     
+    def save_criteria_comparison_cells(self, decision_id: int, cells: List[Tuple[int, int, float]]):
+        """Upsert individual criteria comparison cells given as (row_id, column_id, value)."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob_cells(decision_id, None, cells)
+            self._commit()
+            return
+        for row_id, col_id, value in cells:
+            self.cursor.execute(
+                "UPDATE criteria_comparisons SET value = ? "
+                "WHERE decision_id = ? AND row_criteria_id = ? AND column_criteria_id = ?",
+                (value, decision_id, row_id, col_id)
+            )
+            if self.cursor.rowcount == 0:
+                self.cursor.execute(
+                    "INSERT INTO criteria_comparisons (decision_id, row_criteria_id, column_criteria_id, value) "
+                    "VALUES (?, ?, ?, ?)",
+                    (decision_id, row_id, col_id, value)
+                )
+        self._commit()
+
+    def get_criteria_comparison_matrix(self, decision_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored criteria matrix as (criteria_ids, matrix), or None if it is not complete."""
+        self.cursor.execute(
+            "SELECT criteria_id FROM decision_criteria WHERE decision_id = ? ORDER BY display_order",
+            (decision_id,)
+        )
+        ordered_ids = [r[0] for r in self.cursor.fetchall()]
+
+        if self.matrix_storage == "blob":
+            return self._get_matrix_blob(decision_id, None, ordered_ids)
+        self.cursor.execute(
+            "SELECT row_criteria_id, column_criteria_id, value FROM criteria_comparisons WHERE decision_id = ?",
+            (decision_id,)
+        )
+        return self._build_matrix(ordered_ids, self.cursor.fetchall())
+
+    def get_matrix_version(self, decision_id: int) -> int:
+        """Get the decision's matrix version, bumped on every comparison matrix write."""
+        self.cursor.execute("SELECT matrix_version FROM decision_problems WHERE id = ?", (decision_id,))
+        result = self.cursor.fetchone()
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Decision problem with ID {decision_id} not found")
+        return result[0]
+
+    def claim_matrix_version(self, decision_id: int, expected_version: int) -> bool:
+        """Bump the matrix version only if it still equals expected_version. Returns False on conflict."""
+        self.cursor.execute(
+            "UPDATE decision_problems SET matrix_version = matrix_version + 1 WHERE id = ? AND matrix_version = ?",
+            (decision_id, expected_version)
+        )
+        return self.cursor.rowcount == 1
+
+    def _bump_matrix_version(self, decision_id: int):
+        self.cursor.execute(
+            "UPDATE decision_problems SET matrix_version = matrix_version + 1 WHERE id = ?",
+            (decision_id,)
+        )
+
     def save_criteria_weights(self, decision_id: int, criteria_ids: List[int], weights: List[float]):
         """Save calculated criteria weights."""
         for criteria_id, weight in zip(criteria_ids, weights):
@@ -176,7 +313,7 @@ class DBRepository:
                     "INSERT INTO criteria_weights (decision_id, criteria_id, weight) VALUES (?, ?, ?)",
                     (decision_id, criteria_id, weight)
                 )
-        self.conn.commit()
+        self._commit()
     
     def save_consistency_check(self, decision_id: int, criteria_id: Optional[int], 
                               lambda_max: float, ci: float, cr: float, is_consistent: bool):
@@ -202,11 +339,16 @@ class DBRepository:
                 "consistency_ratio, is_consistent) VALUES (?, ?, ?, ?, ?, ?)",
                 (decision_id, criteria_id, lambda_max, ci, cr, 1 if is_consistent else 0)
             )
-        self.conn.commit()
+        self._commit()
     
     def save_alternative_comparison_matrix(self, decision_id: int, criteria_id: int, 
                                           alternative_ids: List[int], matrix: List[List[float]]):
         """Save alternative pairwise comparison matrix for a specific criterion."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob(decision_id, criteria_id, alternative_ids, matrix)
+            self._bump_matrix_version(decision_id)
+            self._commit()
+            return
         for i, row_id in enumerate(alternative_ids):
             for j, col_id in enumerate(alternative_ids):
                 value = matrix[i][j]
@@ -232,8 +374,48 @@ class DBRepository:
                         "column_alternative_id, value) VALUES (?, ?, ?, ?, ?)",
                         (decision_id, criteria_id, row_id, col_id, value)
                     )
-        self.conn.commit()
+        self._bump_matrix_version(decision_id)
+        self._commit()
     
+    def save_alternative_comparison_cells(self, decision_id: int, criteria_id: int,
+                                         cells: List[Tuple[int, int, float]]):
+        """Upsert individual alternative comparison cells given as (row_id, column_id, value)."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob_cells(decision_id, criteria_id, cells)
+            self._commit()
+            return
+        for row_id, col_id, value in cells:
+            self.cursor.execute(
+                "UPDATE alternative_comparisons SET value = ? WHERE decision_id = ? AND criteria_id = ? "
+                "AND row_alternative_id = ? AND column_alternative_id = ?",
+                (value, decision_id, criteria_id, row_id, col_id)
+            )
+            if self.cursor.rowcount == 0:
+                self.cursor.execute(
+                    "INSERT INTO alternative_comparisons (decision_id, criteria_id, row_alternative_id, "
+                    "column_alternative_id, value) VALUES (?, ?, ?, ?, ?)",
+                    (decision_id, criteria_id, row_id, col_id, value)
+                )
+        self._commit()
+
+    def get_alternative_comparison_matrix(self, decision_id: int,
+                                         criteria_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored alternative matrix for a criterion as (alternative_ids, matrix), or None."""
+        self.cursor.execute(
+            "SELECT alternative_id FROM decision_alternatives WHERE decision_id = ? ORDER BY display_order",
+            (decision_id,)
+        )
+        ordered_ids = [r[0] for r in self.cursor.fetchall()]
+
+        if self.matrix_storage == "blob":
+            return self._get_matrix_blob(decision_id, criteria_id, ordered_ids)
+        self.cursor.execute(
+            "SELECT row_alternative_id, column_alternative_id, value FROM alternative_comparisons "
+            "WHERE decision_id = ? AND criteria_id = ?",
+            (decision_id, criteria_id)
+        )
+        return self._build_matrix(ordered_ids, self.cursor.fetchall())
+
     def save_alternative_scores(self, decision_id: int, alternative_ids: List[int], 
                                criteria_id: Optional[int], scores: List[float], is_final: bool = False):
         """Save calculated alternative scores for a specific criterion or final scores."""
@@ -262,7 +444,7 @@ class DBRepository:
                     "VALUES (?, ?, ?, ?, ?, ?)",
                     (decision_id, alt_id, criteria_id, score, 1 if is_final else 0, rank)
                 )
-        self.conn.commit()
+        self._commit()
     
     def get_decision_problem(self, decision_id: int) -> Dict[str, Any]:
         """Get decision problem details including criteria and alternatives."""
@@ -333,7 +515,7 @@ class DBRepository:
             "UPDATE decision_problems SET status = ?, updated_at = ? WHERE id = ?",
             (status, datetime.now(), decision_id)
         )
-        self.conn.commit()
+        self._commit()
 
     def get_criteria_with_weights(self, decision_id: int) -> List[Dict[str, Any]]:
         """Get criteria with weights for a decision problem."""
@@ -363,3 +545,209 @@ class DBRepository:
             }
             for c in criteria
         ]
+
+    def get_all_criteria(self) -> List[Dict[str, Any]]:
+        """Get all available criteria ordered by name."""
+        self.cursor.execute("SELECT id, name, description FROM criteria ORDER BY name")
+        criteria = self.cursor.fetchall()
+        return [{"id": c[0], "name": c[1], "description": c[2]} for c in criteria]
+
+    def get_all_alternatives(self) -> List[Dict[str, Any]]:
+        """Get all available alternatives ordered by name."""
+        self.cursor.execute("SELECT id, name, description FROM alternatives ORDER BY name")
+        alternatives = self.cursor.fetchall()
+        return [{"id": a[0], "name": a[1], "description": a[2]} for a in alternatives]
+
+    def save_rating_levels(self, decision_id: int, criteria_id: int,
+                           names: List[str], priorities: List[float]) -> List[int]:
+        """Replace a criterion's rating levels (kept by name) and return their IDs in order."""
+        for i, name in enumerate(names):
+            self.cursor.execute(
+                "UPDATE rating_levels SET display_order = ?, priority = ? "
+                "WHERE decision_id = ? AND criteria_id = ? AND name = ?",
+                (i, float(priorities[i]), decision_id, criteria_id, name)
+            )
+            if self.cursor.rowcount == 0:
+                self.cursor.execute(
+                    "INSERT INTO rating_levels (decision_id, criteria_id, name, display_order, priority) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (decision_id, criteria_id, name, i, float(priorities[i]))
+                )
+
+        # Levels dropped from the list take their ratings with them
+        self.cursor.execute(
+            "SELECT id, name FROM rating_levels WHERE decision_id = ? AND criteria_id = ?",
+            (decision_id, criteria_id)
+        )
+        ids_by_name = {r[1]: r[0] for r in self.cursor.fetchall()}
+        kept = set(names)
+        removed = [(level_id,) for name, level_id in ids_by_name.items() if name not in kept]
+        if removed:
+            self.cursor.executemany("DELETE FROM alternative_ratings WHERE level_id = ?", removed)
+            self.cursor.executemany("DELETE FROM rating_levels WHERE id = ?", removed)
+        self._commit()
+        return [ids_by_name[name] for name in names]
+
+    def get_rating_levels(self, decision_id: int) -> List[Dict[str, Any]]:
+        """Get all rating levels of a decision ordered by criterion and display order."""
+        self.cursor.execute(
+            "SELECT id, criteria_id, name, priority FROM rating_levels WHERE decision_id = ? "
+            "ORDER BY criteria_id, display_order",
+            (decision_id,)
+        )
+        return [
+            {"id": r[0], "criteria_id": r[1], "name": r[2], "priority": r[3]}
+            for r in self.cursor.fetchall()
+        ]
+
+    def save_alternative_ratings(self, decision_id: int, ratings: List[Tuple[int, int, int]]):
+        """Upsert ratings given as (alternative_id, criteria_id, level_id)."""
+        if not ratings:
+            return
+        # Thousands of rows: replace them with two array-bound statements instead of a round trip per row
+        self.cursor.fast_executemany = True
+        try:
+            self.cursor.executemany(
+                "DELETE FROM alternative_ratings WHERE decision_id = ? AND criteria_id = ? AND alternative_id = ?",
+                [(decision_id, criteria_id, alternative_id) for alternative_id, criteria_id, _ in ratings]
+            )
+            self.cursor.executemany(
+                "INSERT INTO alternative_ratings (decision_id, alternative_id, criteria_id, level_id) "
+                "VALUES (?, ?, ?, ?)",
+                [(decision_id, alternative_id, criteria_id, level_id)
+                 for alternative_id, criteria_id, level_id in ratings]
+            )
+        finally:
+            self.cursor.fast_executemany = False
+        self._commit()
+
+    def get_alternative_ratings(self, decision_id: int) -> List[Tuple[int, int, int]]:
+        """Get all ratings of a decision as (alternative_id, criteria_id, level_id)."""
+        self.cursor.execute(
+            "SELECT alternative_id, criteria_id, level_id FROM alternative_ratings WHERE decision_id = ?",
+            (decision_id,)
+        )
+        return [tuple(r) for r in self.cursor.fetchall()]
+
+    def create_job(self, job_id: str, kind: str):
+        """Record a newly submitted background job as queued."""
+        now = datetime.now()
+        self.cursor.execute(
+            "INSERT INTO jobs (id, kind, status, progress, created_at, updated_at) VALUES (?, ?, 'queued', 0, ?, ?)",
+            (job_id, kind, now, now)
+        )
+        self._commit()
+
+    def mark_job_running(self, job_id: str):
+        """Move a job from queued to running (no-op if it already moved on)."""
+        self.cursor.execute(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (datetime.now(), job_id)
+        )
+        self._commit()
+
+    def update_job(self, job_id: str, status: str, progress: float,
+                   result: Optional[str] = None, error: Optional[str] = None):
+        """Update a job's status and progress; result is JSON text."""
+        self.cursor.execute(
+            "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, progress, result, error, datetime.now(), job_id)
+        )
+        self._commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record (id, kind, status, progress, result, error), or None."""
+        self.cursor.execute(
+            "SELECT id, kind, status, progress, result, error FROM jobs WHERE id = ?", (job_id,)
+        )
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": row[3],
+            "result": row[4],
+            "error": row[5]
+        }
+
+    def delete_finished_jobs(self, before: datetime):
+        """Delete completed and failed jobs last updated before the given time."""
+        self.cursor.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+            (before,)
+        )
+        self._commit()
+
+    def get_idempotency_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the stored request_hash and response of an idempotency key, or None."""
+        self.cursor.execute("SELECT request_hash, response FROM idempotency_keys WHERE id = ?", (key,))
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {"request_hash": row[0], "response": row[1]}
+
+    def save_idempotency_record(self, key: str, request_hash: str, response: str):
+        """Store the response for an idempotency key; fails if the key is already stored."""
+        self.cursor.execute(
+            "INSERT INTO idempotency_keys (id, request_hash, response, created_at) VALUES (?, ?, ?, ?)",
+            (key, request_hash, response, datetime.now())
+        )
+        self._commit()
+
+    def delete_idempotency_records(self, before: datetime):
+        """Delete idempotency records created before the given time."""
+        self.cursor.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (before,))
+        self._commit()
+
+    def _read_matrix_blob(self, decision_id: int, criteria_id: Optional[int]) -> Optional[Tuple[bytes, bytes, str]]:
+        """Read the (ids, matrix, dtype) blob row of a matrix; criteria_id None is the criteria matrix."""
+        if criteria_id is None:
+            self.cursor.execute(
+                "SELECT ids, matrix, dtype FROM criteria_matrices WHERE decision_id = ?", (decision_id,)
+            )
+        else:
+            self.cursor.execute(
+                "SELECT ids, matrix, dtype FROM alternative_matrices WHERE decision_id = ? AND criteria_id = ?",
+                (decision_id, criteria_id)
+            )
+        row = self.cursor.fetchone()
+        return (bytes(row[0]), bytes(row[1]), row[2]) if row else None
+
+    def _write_matrix_blob(self, decision_id: int, criteria_id: Optional[int], size: int, dtype: str,
+                           ids: bytes, matrix: bytes):
+        """Insert or replace the blob row of a matrix."""
+        now = datetime.now()
+        if criteria_id is None:
+            self.cursor.execute(
+                "UPDATE criteria_matrices SET size = ?, dtype = ?, ids = ?, matrix = ?, updated_at = ? "
+                "WHERE decision_id = ?",
+                (size, dtype, ids, matrix, now, decision_id)
+            )
+            if self.cursor.rowcount == 0:
+                self.cursor.execute(
+                    "INSERT INTO criteria_matrices (decision_id, size, dtype, ids, matrix, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (decision_id, size, dtype, ids, matrix, now)
+                )
+        else:
+            self.cursor.execute(
+                "UPDATE alternative_matrices SET size = ?, dtype = ?, ids = ?, matrix = ?, updated_at = ? "
+                "WHERE decision_id = ? AND criteria_id = ?",
+                (size, dtype, ids, matrix, now, decision_id, criteria_id)
+            )
+            if self.cursor.rowcount == 0:
+                self.cursor.execute(
+                    "INSERT INTO alternative_matrices (decision_id, criteria_id, size, dtype, ids, matrix, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (decision_id, criteria_id, size, dtype, ids, matrix, now)
+                )
+
+    def close(self):
+        """Release the underlying database connection."""
+        try:
+            self.cursor.close()
+            self.conn.close()
+        except pyodbc.Error:
+            pass
@@ -0,0 +1,19 @@
+from config import get_settings
+from repositories.base_repository import BaseRepository
+
+def create_repository() -> BaseRepository:
+    """
+    Create the repository selected by the DB_BACKEND setting.
+    Supported values: "sqlserver" (default) and "sqlite".
+    Backends are imported lazily so SQLite deployments do not need pyodbc installed.
+    """
+    backend = get_settings().db_backend
+
+    if backend == 'sqlite':
+        from repositories.sqlite_repository import SQLiteRepository
+        return SQLiteRepository()
+    if backend in ('sqlserver', 'mssql'):
+        from repositories.db_repository import DBRepository
+        return DBRepository()
+
+    raise RuntimeError(f"Unsupported DB_BACKEND: {backend}")
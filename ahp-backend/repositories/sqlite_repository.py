@@ -0,0 +1,643 @@
+import math
+import sqlite3
+import struct
+import threading
+from typing import List, Optional, Dict, Any, Tuple, Callable
+import numpy as np
+from datetime import datetime
+from fastapi import HTTPException
+import os
+
+from config import get_settings
+from repositories.base_repository import BaseRepository
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "databases", "schema_sqlite.sql")
+
+# Columns added after the first SQLite release; added to existing database files on startup
+ADDED_COLUMNS = [
+    ("decision_problems", "matrix_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+def _blob_int32(blob: bytes, index: int) -> int:
+    return struct.unpack_from("<i", blob, 4 * index)[0]
+
+def _blob_float(blob: bytes, dtype: str, index: int) -> Optional[float]:
+    size = int(dtype[1:])
+    value = struct.unpack_from("<d" if size == 8 else "<f", blob, size * index)[0]
+    return None if math.isnan(value) else value
+
+# Databases whose schema has already been applied in this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# When set, called with every SQL statement run on new connections (loadtest.py counts them)
+statement_listener: Optional[Callable[[str], None]] = None
+
+class SQLiteRepository(BaseRepository):
+    """
+    Embedded SQLite implementation of the repository.
+    Uses WAL journaling, parameterized statements (cached by sqlite3) and executemany for bulk writes.
+    """
+
+    def __init__(self, path: str = None):
+        settings = get_settings()
+        self.path = path or settings.sqlite_path
+        self.matrix_storage = settings.matrix_storage
+        self.matrix_dtype = settings.matrix_dtype
+        self.conn = self._get_db_connection()
+        self.cursor = self.conn.cursor()
+
+    def _get_db_connection(self):
+        """Open the SQLite database and make sure the schema exists."""
+        try:
+            uri = self.path.startswith("file:")
+            conn = sqlite3.connect(self.path, uri=uri, timeout=30, check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            # Used by the v_*_comparisons views to decode blob matrices
+            conn.create_function("blob_int32", 2, _blob_int32, deterministic=True)
+            conn.create_function("blob_float", 3, _blob_float, deterministic=True)
+            self._ensure_schema(conn)
+            if statement_listener is not None:
+                conn.set_trace_callback(statement_listener)
+            return conn
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Database connection failed: {e}")
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Apply databases/schema_sqlite.sql once per database path."""
+        # Every ":memory:" connection is a fresh database and always needs the schema
+        if self.path in _initialized_paths and self.path != ":memory:":
+            return
+        with _init_lock:
+            if self.path in _initialized_paths and self.path != ":memory:":
+                return
+            with open(SCHEMA_PATH, encoding="utf-8") as f:
+                conn.executescript(f.read())
+            for table, column, definition in ADDED_COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.commit()
+            _initialized_paths.add(self.path)
+
+    def _resolve_names(self, table: str, names: List[str]) -> List[int]:
+        """Return IDs for names in the given lookup table, inserting missing ones in bulk."""
+        unique_names = list(dict.fromkeys(names))
+        if not unique_names:
+            return []
+
+        self.cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} (name) VALUES (?)",
+            [(name,) for name in unique_names]
+        )
+        self._commit()
+
+        placeholders = ", ".join("?" for _ in unique_names)
+        self.cursor.execute(f"SELECT name, id FROM {table} WHERE name IN ({placeholders})", unique_names)
+        ids_by_name = dict(self.cursor.fetchall())
+        return [ids_by_name[name] for name in names]
+
+    def create_decision_problem(self, title: str, description: str = None) -> int:
+        """Create a new decision problem and return its ID."""
+        try:
+            self.cursor.execute(
+                "INSERT INTO decision_problems (title, description, status) VALUES (?, ?, ?)",
+                (title, description, 'in_progress')
+            )
+            decision_id = self.cursor.lastrowid
+            self._commit()
+
+            if not decision_id:
+                raise HTTPException(status_code=500, detail="Failed to retrieve decision problem ID")
+
+            return decision_id
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    def create_decision_problems(
+        self, decisions: List[Tuple[str, Optional[str], List[str], List[str]]]
+    ) -> List[Tuple[int, List[int], List[int]]]:
+        """
+        Create many decisions given as (title, description, criteria_names, alternative_names) with
+        bulk statements. Returns (decision_id, criteria_ids, alternative_ids) for each, in order.
+        """
+        # Every name is resolved once for the whole batch
+        criteria_names = [name for _, _, criteria, _ in decisions for name in criteria]
+        alternative_names = [name for _, _, _, alternatives in decisions for name in alternatives]
+        criteria_ids = dict(zip(criteria_names, self._resolve_names("criteria", criteria_names)))
+        alternative_ids = dict(zip(alternative_names, self._resolve_names("alternatives", alternative_names)))
+
+        created = []
+        for title, description, criteria, alternatives in decisions:
+            # In-process inserts are cheap; lastrowid gives each ID without a lookup query
+            self.cursor.execute(
+                "INSERT INTO decision_problems (title, description, status) VALUES (?, ?, ?)",
+                (title, description, 'in_progress')
+            )
+            created.append((
+                self.cursor.lastrowid,
+                [criteria_ids[name] for name in criteria],
+                [alternative_ids[name] for name in alternatives]
+            ))
+
+        self.cursor.executemany(
+            "INSERT INTO decision_criteria (decision_id, criteria_id, display_order) VALUES (?, ?, ?)",
+            [(decision_id, criteria_id, i) for decision_id, ids, _ in created for i, criteria_id in enumerate(ids)]
+        )
+        self.cursor.executemany(
+            "INSERT INTO decision_alternatives (decision_id, alternative_id, display_order) VALUES (?, ?, ?)",
+            [(decision_id, alternative_id, i) for decision_id, _, ids in created for i, alternative_id in enumerate(ids)]
+        )
+        self._commit()
+        return created
+
+    def save_criteria_to_db(self, criteria_names: List[str]) -> List[int]:
+        """Save criteria to database if they don't exist and return their IDs."""
+        return self._resolve_names("criteria", criteria_names)
+
+    def save_alternatives_to_db(self, alternatives: List[str]) -> List[int]:
+        """Save alternatives to database if they don't exist and return their IDs."""
+        return self._resolve_names("alternatives", alternatives)
+
+    def link_criteria_to_decision(self, decision_id: int, criteria_ids: List[int]):
+        """Link criteria to a decision problem."""
+        self.cursor.executemany(
+            "INSERT INTO decision_criteria (decision_id, criteria_id, display_order) VALUES (?, ?, ?)",
+            [(decision_id, criteria_id, i) for i, criteria_id in enumerate(criteria_ids)]
+        )
+        self._commit()
+
+    def link_alternatives_to_decision(self, decision_id: int, alternative_ids: List[int]):
+        """Link alternatives to a decision problem."""
+        self.cursor.executemany(
+            "INSERT INTO decision_alternatives (decision_id, alternative_id, display_order) VALUES (?, ?, ?)",
+            [(decision_id, alternative_id, i) for i, alternative_id in enumerate(alternative_ids)]
+        )
+        self._commit()
+
+    def append_alternative_to_decision(self, decision_id: int, alternative_id: int):
+        """Link one more alternative to a decision, after the existing ones in display order."""
+        self.cursor.execute(
+            "INSERT INTO decision_alternatives (decision_id, alternative_id, display_order) "
+            "SELECT ?, ?, COALESCE(MAX(display_order) + 1, 0) FROM decision_alternatives WHERE decision_id = ?",
+            (decision_id, alternative_id, decision_id)
+        )
+        self._commit()
+
+    def remove_alternative_from_decision(self, decision_id: int, alternative_id: int):
+        """Unlink an alternative and delete its comparisons, scores and ratings in the decision."""
+        if self.matrix_storage == "blob":
+            self.cursor.execute("SELECT criteria_id FROM alternative_matrices WHERE decision_id = ?", (decision_id,))
+            for (criteria_id,) in self.cursor.fetchall():
+                self._remove_from_matrix_blob(decision_id, criteria_id, alternative_id)
+        else:
+            self.cursor.execute(
+                "DELETE FROM alternative_comparisons WHERE decision_id = ? "
+                "AND (row_alternative_id = ? OR column_alternative_id = ?)",
+                (decision_id, alternative_id, alternative_id)
+            )
+        for table in ("alternative_scores", "alternative_ratings", "decision_alternatives"):
+            self.cursor.execute(
+                f"DELETE FROM {table} WHERE decision_id = ? AND alternative_id = ?", (decision_id, alternative_id)
+            )
+        self._commit()
+
+    def save_criteria_comparison_matrix(self, decision_id: int, criteria_ids: List[int], matrix: List[List[float]]):
+        """Save criteria pairwise comparison matrix."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob(decision_id, None, criteria_ids, matrix)
+            self._bump_matrix_version(decision_id)
+            self._commit()
+            return
+        self.cursor.executemany(
+            "INSERT INTO criteria_comparisons (decision_id, row_criteria_id, column_criteria_id, value) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, row_criteria_id, column_criteria_id) DO UPDATE SET value = excluded.value",
+            [
+                (decision_id, row_id, col_id, matrix[i][j])
+                for i, row_id in enumerate(criteria_ids)
+                for j, col_id in enumerate(criteria_ids)
+            ]
+        )
+        self._bump_matrix_version(decision_id)
+        self._commit()
+
+    def save_criteria_comparison_cells(self, decision_id: int, cells: List[Tuple[int, int, float]]):
+        """Upsert individual criteria comparison cells given as (row_id, column_id, value)."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob_cells(decision_id, None, cells)
+            self._commit()
+            return
+        self.cursor.executemany(
+            "INSERT INTO criteria_comparisons (decision_id, row_criteria_id, column_criteria_id, value) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, row_criteria_id, column_criteria_id) DO UPDATE SET value = excluded.value",
+            [(decision_id, row_id, col_id, value) for row_id, col_id, value in cells]
+        )
+        self._commit()
+
+    def get_criteria_comparison_matrix(self, decision_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored criteria matrix as (criteria_ids, matrix), or None if it is not complete."""
+        self.cursor.execute(
+            "SELECT criteria_id FROM decision_criteria WHERE decision_id = ? ORDER BY display_order",
+            (decision_id,)
+        )
+        ordered_ids = [r[0] for r in self.cursor.fetchall()]
+
+        if self.matrix_storage == "blob":
+            return self._get_matrix_blob(decision_id, None, ordered_ids)
+        self.cursor.execute(
+            "SELECT row_criteria_id, column_criteria_id, value FROM criteria_comparisons WHERE decision_id = ?",
+            (decision_id,)
+        )
+        return self._build_matrix(ordered_ids, self.cursor.fetchall())
+
+    def get_matrix_version(self, decision_id: int) -> int:
+        """Get the decision's matrix version, bumped on every comparison matrix write."""
+        self.cursor.execute("SELECT matrix_version FROM decision_problems WHERE id = ?", (decision_id,))
+        result = self.cursor.fetchone()
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Decision problem with ID {decision_id} not found")
+        return result[0]
+
+    def claim_matrix_version(self, decision_id: int, expected_version: int) -> bool:
+        """Bump the matrix version only if it still equals expected_version. Returns False on conflict."""
+        self.cursor.execute(
+            "UPDATE decision_problems SET matrix_version = matrix_version + 1 WHERE id = ? AND matrix_version = ?",
+            (decision_id, expected_version)
+        )
+        return self.cursor.rowcount == 1
+
+    def _bump_matrix_version(self, decision_id: int):
+        self.cursor.execute(
+            "UPDATE decision_problems SET matrix_version = matrix_version + 1 WHERE id = ?",
+            (decision_id,)
+        )
+
+    def save_criteria_weights(self, decision_id: int, criteria_ids: List[int], weights: List[float]):
+        """Save calculated criteria weights."""
+        self.cursor.executemany(
+            "INSERT INTO criteria_weights (decision_id, criteria_id, weight) VALUES (?, ?, ?) "
+            "ON CONFLICT (decision_id, criteria_id) DO UPDATE SET weight = excluded.weight",
+            [(decision_id, criteria_id, weight) for criteria_id, weight in zip(criteria_ids, weights)]
+        )
+        self._commit()
+
+    def save_consistency_check(self, decision_id: int, criteria_id: Optional[int],
+                              lambda_max: float, ci: float, cr: float, is_consistent: bool):
+        """Save consistency check results."""
+        self.cursor.execute(
+            "INSERT INTO consistency_checks (decision_id, criteria_id, lambda_max, consistency_index, "
+            "consistency_ratio, is_consistent) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, IFNULL(criteria_id, 0)) DO UPDATE SET "
+            "lambda_max = excluded.lambda_max, consistency_index = excluded.consistency_index, "
+            "consistency_ratio = excluded.consistency_ratio, is_consistent = excluded.is_consistent",
+            (decision_id, criteria_id, float(lambda_max), float(ci), float(cr), 1 if is_consistent else 0)
+        )
+        self._commit()
+
+    def save_alternative_comparison_matrix(self, decision_id: int, criteria_id: int,
+                                          alternative_ids: List[int], matrix: List[List[float]]):
+        """Save alternative pairwise comparison matrix for a specific criterion."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob(decision_id, criteria_id, alternative_ids, matrix)
+            self._bump_matrix_version(decision_id)
+            self._commit()
+            return
+        self.cursor.executemany(
+            "INSERT INTO alternative_comparisons (decision_id, criteria_id, row_alternative_id, "
+            "column_alternative_id, value) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, criteria_id, row_alternative_id, column_alternative_id) "
+            "DO UPDATE SET value = excluded.value",
+            [
+                (decision_id, criteria_id, row_id, col_id, matrix[i][j])
+                for i, row_id in enumerate(alternative_ids)
+                for j, col_id in enumerate(alternative_ids)
+            ]
+        )
+        self._bump_matrix_version(decision_id)
+        self._commit()
+
+    def save_alternative_comparison_cells(self, decision_id: int, criteria_id: int,
+                                         cells: List[Tuple[int, int, float]]):
+        """Upsert individual alternative comparison cells given as (row_id, column_id, value)."""
+        if self.matrix_storage == "blob":
+            self._save_matrix_blob_cells(decision_id, criteria_id, cells)
+            self._commit()
+            return
+        self.cursor.executemany(
+            "INSERT INTO alternative_comparisons (decision_id, criteria_id, row_alternative_id, "
+            "column_alternative_id, value) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, criteria_id, row_alternative_id, column_alternative_id) "
+            "DO UPDATE SET value = excluded.value",
+            [(decision_id, criteria_id, row_id, col_id, value) for row_id, col_id, value in cells]
+        )
+        self._commit()
+
+    def get_alternative_comparison_matrix(self, decision_id: int,
+                                         criteria_id: int) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Get the stored alternative matrix for a criterion as (alternative_ids, matrix), or None."""
+        self.cursor.execute(
+            "SELECT alternative_id FROM decision_alternatives WHERE decision_id = ? ORDER BY display_order",
+            (decision_id,)
+        )
+        ordered_ids = [r[0] for r in self.cursor.fetchall()]
+
+        if self.matrix_storage == "blob":
+            return self._get_matrix_blob(decision_id, criteria_id, ordered_ids)
+        self.cursor.execute(
+            "SELECT row_alternative_id, column_alternative_id, value FROM alternative_comparisons "
+            "WHERE decision_id = ? AND criteria_id = ?",
+            (decision_id, criteria_id)
+        )
+        return self._build_matrix(ordered_ids, self.cursor.fetchall())
+
+    def save_alternative_scores(self, decision_id: int, alternative_ids: List[int],
+                               criteria_id: Optional[int], scores: List[float], is_final: bool = False):
+        """Save calculated alternative scores for a specific criterion or final scores."""
+        self.cursor.executemany(
+            "INSERT INTO alternative_scores (decision_id, alternative_id, criteria_id, score, is_final_score, rank_order) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, alternative_id, IFNULL(criteria_id, 0), is_final_score) "
+            "DO UPDATE SET score = excluded.score, rank_order = excluded.rank_order",
+            [
+                (decision_id, alt_id, criteria_id, float(scores[i]), 1 if is_final else 0, i + 1 if is_final else None)
+                for i, alt_id in enumerate(alternative_ids)
+            ]
+        )
+        self._commit()
+
+    def get_decision_problem(self, decision_id: int) -> Dict[str, Any]:
+        """Get decision problem details including criteria and alternatives."""
+        self.cursor.execute("SELECT title, description, status FROM decision_problems WHERE id = ?", (decision_id,))
+        decision = self.cursor.fetchone()
+        if not decision:
+            raise HTTPException(status_code=404, detail=f"Decision problem with ID {decision_id} not found")
+
+        decision_data = {
+            "id": decision_id,
+            "title": decision[0],
+            "description": decision[1],
+            "status": decision[2]
+        }
+
+        self.cursor.execute(
+            "SELECT c.id, c.name FROM criteria c "
+            "JOIN decision_criteria dc ON c.id = dc.criteria_id "
+            "WHERE dc.decision_id = ? ORDER BY dc.display_order",
+            (decision_id,)
+        )
+        decision_data["criteria"] = [{"id": c[0], "name": c[1]} for c in self.cursor.fetchall()]
+
+        self.cursor.execute(
+            "SELECT a.id, a.name FROM alternatives a "
+            "JOIN decision_alternatives da ON a.id = da.alternative_id "
+            "WHERE da.decision_id = ? ORDER BY da.display_order",
+            (decision_id,)
+        )
+        decision_data["alternatives"] = [{"id": a[0], "name": a[1]} for a in self.cursor.fetchall()]
+
+        return decision_data
+
+    def get_criteria_weights(self, decision_id: int) -> Dict[int, float]:
+        """Get calculated criteria weights for a decision problem."""
+        self.cursor.execute(
+            "SELECT criteria_id, weight FROM criteria_weights WHERE decision_id = ?",
+            (decision_id,)
+        )
+        return {w[0]: w[1] for w in self.cursor.fetchall()}
+
+    def get_alternative_scores(self, decision_id: int, is_final: bool = True) -> List[Dict[str, Any]]:
+        """Get alternative scores for a decision problem."""
+        query = """
+            SELECT a.id, a.name, s.score, s.rank_order
+            FROM alternatives a
+            JOIN alternative_scores s ON a.id = s.alternative_id
+            WHERE s.decision_id = ? AND s.is_final_score = ?
+            ORDER BY s.rank_order
+        """
+        self.cursor.execute(query, (decision_id, 1 if is_final else 0))
+        return [
+            {"id": s[0], "name": s[1], "score": s[2], "rank": s[3]}
+            for s in self.cursor.fetchall()
+        ]
+
+    def update_decision_status(self, decision_id: int, status: str):
+        """Update the status of a decision problem."""
+        self.cursor.execute(
+            "UPDATE decision_problems SET status = ?, updated_at = ? WHERE id = ?",
+            (status, datetime.now().isoformat(sep=" ", timespec="seconds"), decision_id)
+        )
+        self._commit()
+
+    def get_criteria_with_weights(self, decision_id: int) -> List[Dict[str, Any]]:
+        """Get criteria with weights for a decision problem."""
+        query = """
+            SELECT
+                c.id,
+                c.name,
+                c.description,
+                dc.display_order,
+                cw.weight
+            FROM criteria c
+            JOIN decision_criteria dc ON c.id = dc.criteria_id
+            LEFT JOIN criteria_weights cw ON c.id = cw.criteria_id AND cw.decision_id = dc.decision_id
+            WHERE dc.decision_id = ?
+            ORDER BY dc.display_order
+        """
+        self.cursor.execute(query, (decision_id,))
+        return [
+            {
+                "id": c[0],
+                "name": c[1],
+                "description": c[2],
+                "display_order": c[3],
+                "weight": c[4]
+            }
+            for c in self.cursor.fetchall()
+        ]
+
+    def get_all_criteria(self) -> List[Dict[str, Any]]:
+        """Get all available criteria ordered by name."""
+        self.cursor.execute("SELECT id, name, description FROM criteria ORDER BY name")
+        return [{"id": c[0], "name": c[1], "description": c[2]} for c in self.cursor.fetchall()]
+
+    def get_all_alternatives(self) -> List[Dict[str, Any]]:
+        """Get all available alternatives ordered by name."""
+        self.cursor.execute("SELECT id, name, description FROM alternatives ORDER BY name")
+        return [{"id": a[0], "name": a[1], "description": a[2]} for a in self.cursor.fetchall()]
+
+    def save_rating_levels(self, decision_id: int, criteria_id: int,
+                           names: List[str], priorities: List[float]) -> List[int]:
+        """Replace a criterion's rating levels (kept by name) and return their IDs in order."""
+        self.cursor.executemany(
+            "INSERT INTO rating_levels (decision_id, criteria_id, name, display_order, priority) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, criteria_id, name) "
+            "DO UPDATE SET display_order = excluded.display_order, priority = excluded.priority",
+            [(decision_id, criteria_id, name, i, float(priorities[i])) for i, name in enumerate(names)]
+        )
+
+        # Levels dropped from the list take their ratings with them
+        self.cursor.execute(
+            "SELECT id, name FROM rating_levels WHERE decision_id = ? AND criteria_id = ?",
+            (decision_id, criteria_id)
+        )
+        ids_by_name = {r[1]: r[0] for r in self.cursor.fetchall()}
+        kept = set(names)
+        removed = [(level_id,) for name, level_id in ids_by_name.items() if name not in kept]
+        if removed:
+            self.cursor.executemany("DELETE FROM alternative_ratings WHERE level_id = ?", removed)
+            self.cursor.executemany("DELETE FROM rating_levels WHERE id = ?", removed)
+        self._commit()
+        return [ids_by_name[name] for name in names]
+
+    def get_rating_levels(self, decision_id: int) -> List[Dict[str, Any]]:
+        """Get all rating levels of a decision ordered by criterion and display order."""
+        self.cursor.execute(
+            "SELECT id, criteria_id, name, priority FROM rating_levels WHERE decision_id = ? "
+            "ORDER BY criteria_id, display_order",
+            (decision_id,)
+        )
+        return [
+            {"id": r[0], "criteria_id": r[1], "name": r[2], "priority": r[3]}
+            for r in self.cursor.fetchall()
+        ]
+
+    def save_alternative_ratings(self, decision_id: int, ratings: List[Tuple[int, int, int]]):
+        """Upsert ratings given as (alternative_id, criteria_id, level_id)."""
+        self.cursor.executemany(
+            "INSERT INTO alternative_ratings (decision_id, alternative_id, criteria_id, level_id) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (decision_id, criteria_id, alternative_id) DO UPDATE SET level_id = excluded.level_id",
+            [(decision_id, alternative_id, criteria_id, level_id) for alternative_id, criteria_id, level_id in ratings]
+        )
+        self._commit()
+
+    def get_alternative_ratings(self, decision_id: int) -> List[Tuple[int, int, int]]:
+        """Get all ratings of a decision as (alternative_id, criteria_id, level_id)."""
+        self.cursor.execute(
+            "SELECT alternative_id, criteria_id, level_id FROM alternative_ratings WHERE decision_id = ?",
+            (decision_id,)
+        )
+        return [tuple(r) for r in self.cursor.fetchall()]
+
+    def create_job(self, job_id: str, kind: str):
+        """Record a newly submitted background job as queued."""
+        now = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self.cursor.execute(
+            "INSERT INTO jobs (id, kind, status, progress, created_at, updated_at) VALUES (?, ?, 'queued', 0, ?, ?)",
+            (job_id, kind, now, now)
+        )
+        self._commit()
+
+    def mark_job_running(self, job_id: str):
+        """Move a job from queued to running (no-op if it already moved on)."""
+        self.cursor.execute(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (datetime.now().isoformat(sep=" ", timespec="seconds"), job_id)
+        )
+        self._commit()
+
+    def update_job(self, job_id: str, status: str, progress: float,
+                   result: Optional[str] = None, error: Optional[str] = None):
+        """Update a job's status and progress; result is JSON text."""
+        self.cursor.execute(
+            "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, progress, result, error, datetime.now().isoformat(sep=" ", timespec="seconds"), job_id)
+        )
+        self._commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record (id, kind, status, progress, result, error), or None."""
+        self.cursor.execute(
+            "SELECT id, kind, status, progress, result, error FROM jobs WHERE id = ?", (job_id,)
+        )
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": row[3],
+            "result": row[4],
+            "error": row[5]
+        }
+
+    def delete_finished_jobs(self, before: datetime):
+        """Delete completed and failed jobs last updated before the given time."""
+        self.cursor.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+            (before.isoformat(sep=" ", timespec="seconds"),)
+        )
+        self._commit()
+
+    def get_idempotency_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the stored request_hash and response of an idempotency key, or None."""
+        self.cursor.execute("SELECT request_hash, response FROM idempotency_keys WHERE id = ?", (key,))
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {"request_hash": row[0], "response": row[1]}
+
+    def save_idempotency_record(self, key: str, request_hash: str, response: str):
+        """Store the response for an idempotency key; fails if the key is already stored."""
+        self.cursor.execute(
+            "INSERT INTO idempotency_keys (id, request_hash, response, created_at) VALUES (?, ?, ?, ?)",
+            (key, request_hash, response, datetime.now().isoformat(sep=" ", timespec="seconds"))
+        )
+        self._commit()
+
+    def delete_idempotency_records(self, before: datetime):
+        """Delete idempotency records created before the given time."""
+        self.cursor.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < ?", (before.isoformat(sep=" ", timespec="seconds"),)
+        )
+        self._commit()
+
+    def _read_matrix_blob(self, decision_id: int, criteria_id: Optional[int]) -> Optional[Tuple[bytes, bytes, str]]:
+        """Read the (ids, matrix, dtype) blob row of a matrix; criteria_id None is the criteria matrix."""
+        if criteria_id is None:
+            self.cursor.execute(
+                "SELECT ids, matrix, dtype FROM criteria_matrices WHERE decision_id = ?", (decision_id,)
+            )
+        else:
+            self.cursor.execute(
+                "SELECT ids, matrix, dtype FROM alternative_matrices WHERE decision_id = ? AND criteria_id = ?",
+                (decision_id, criteria_id)
+            )
+        row = self.cursor.fetchone()
+        return tuple(row) if row else None
+
+    def _write_matrix_blob(self, decision_id: int, criteria_id: Optional[int], size: int, dtype: str,
+                           ids: bytes, matrix: bytes):
+        """Insert or replace the blob row of a matrix."""
+        now = datetime.now().isoformat(sep=" ", timespec="seconds")
+        if criteria_id is None:
+            self.cursor.execute(
+                "INSERT INTO criteria_matrices (decision_id, size, dtype, ids, matrix, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (decision_id) DO UPDATE SET size = excluded.size, dtype = excluded.dtype, "
+                "ids = excluded.ids, matrix = excluded.matrix, updated_at = excluded.updated_at",
+                (decision_id, size, dtype, ids, matrix, now)
+            )
+        else:
+            self.cursor.execute(
+                "INSERT INTO alternative_matrices (decision_id, criteria_id, size, dtype, ids, matrix, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (decision_id, criteria_id) DO UPDATE SET size = excluded.size, dtype = excluded.dtype, "
+                "ids = excluded.ids, matrix = excluded.matrix, updated_at = excluded.updated_at",
+                (decision_id, criteria_id, size, dtype, ids, matrix, now)
+            )
+
+    def close(self):
+        """Release the underlying database connection."""
+        try:
+            self.cursor.close()
+            self.conn.close()
+        except sqlite3.Error:
+            pass
@@ -1,5 +1,41 @@
+import argparse
+import os
+
 import uvicorn
 
+from config import get_settings
+
+
+def parse_args():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the AHP Decision Support API")
+    parser.add_argument("--prod", action="store_true",
+                        help="run several worker processes without auto-reload")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers,
+                        help="worker processes in --prod mode (default: WEB_CONCURRENCY or CPU count)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    # Run the FastAPI application with Uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    args = parse_args()
+    settings = get_settings()
+
+    # Workers re-read the settings on import; the results cache needs the real worker count
+    os.environ["WEB_CONCURRENCY"] = str(args.workers if args.prod else 1)
+
+    if args.prod:
+        # Each worker imports the app itself; the supervisor restarts workers that exit,
+        # so MAX_REQUESTS recycles them gracefully after finishing in-flight requests
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            limit_max_requests=settings.max_requests,
+            timeout_graceful_shutdown=settings.graceful_timeout,
+        )
+    else:
+        # Run the FastAPI application with Uvicorn (development, auto-reload)
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
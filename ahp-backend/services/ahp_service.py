@@ -1,14 +1,26 @@
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta
 from typing import List, Tuple, Dict, Any, Optional
 import numpy as np
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
 
 from models.schemas import (
     PairwiseMatrixInput, CriteriaWeightsOutput, 
     AlternativeComparisonInput, RankedAlternative,
     DecisionProblemInput, DecisionProblemOutput,
-    StepByStepCalculation, ConsistencyCheck
+    StepByStepCalculation, ConsistencyCheck,
+    JudgmentSuggestion, ConsistencySuggestionsOutput,
+    RatingLevelsInput, RatingLevel, RatingLevelsOutput,
+    AlternativeRatingsInput, AlternativeAddInput,
+    CriterionAlternativeWeights, AlternativeChangeOutput
 )
-from repositories.db_repository import DBRepository
+from config import get_settings
+from repositories.base_repository import BaseRepository
+from services.matrix_state import MatrixState, matrix_state_cache
+from services.results_cache import results_cache
 
 class AHPService:
     # Constants
@@ -16,8 +28,14 @@ class AHPService:
         1: 0.00, 2: 0.00, 3: 0.58, 4: 0.90, 5: 1.12,
         6: 1.24, 7: 1.32, 8: 1.41, 9: 1.45, 10: 1.49
     }
+    MAX_UPDATE_ATTEMPTS = 3
+    MAX_BATCH_SIZE = 1000
+    CR_TOLERANCE = 1e-12
+    # Judgments are often entered rounded (0.33 for 1/3), so reciprocity is checked loosely
+    RECIPROCAL_TOLERANCE = 0.02
+    SAATY_SCALE = np.array([1/9, 1/8, 1/7, 1/6, 1/5, 1/4, 1/3, 1/2, 1, 2, 3, 4, 5, 6, 7, 8, 9])
     
-    def __init__(self, db_repository: DBRepository):
+    def __init__(self, db_repository: Optional[BaseRepository]):
         self.db_repository = db_repository
     
     def create_decision_problem(self, input_data: DecisionProblemInput) -> int:
@@ -42,6 +60,74 @@ class AHPService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error creating decision problem: {str(e)}")
     
+    def _replay_batch(self, idempotency_key: str, request_hash: str) -> Optional[List[DecisionProblemOutput]]:
+        """Response stored for an idempotency key, or None; 422 if the key was used for another request."""
+        record = self.db_repository.get_idempotency_record(idempotency_key)
+        if record is None:
+            return None
+        if record["request_hash"] != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        return [DecisionProblemOutput(**decision) for decision in json.loads(record["response"])]
+
+    def create_decision_problems(self, inputs: List[DecisionProblemInput],
+                                 idempotency_key: Optional[str] = None) -> List[DecisionProblemOutput]:
+        """
+        Create many decision problems in one transaction: names are resolved once for the whole batch,
+        rows are inserted with bulk statements and everything is committed once. With an idempotency
+        key, a retried request returns the decisions created by the first attempt.
+        """
+        if not inputs or len(inputs) > self.MAX_BATCH_SIZE:
+            raise HTTPException(status_code=400, detail=f"A batch must hold 1 to {self.MAX_BATCH_SIZE} decisions")
+        for input_data in inputs:
+            if (len(set(input_data.criteria)) != len(input_data.criteria)
+                    or len(set(input_data.alternatives)) != len(input_data.alternatives)):
+                raise HTTPException(
+                    status_code=400, detail=f"Duplicate criteria or alternatives in decision '{input_data.title}'"
+                )
+
+        request_hash = hashlib.sha256(
+            json.dumps(jsonable_encoder(inputs), sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if idempotency_key:
+            replay = self._replay_batch(idempotency_key, request_hash)
+            if replay is not None:
+                return replay
+
+        try:
+            with self.db_repository.transaction():
+                created = self.db_repository.create_decision_problems(
+                    [(d.title, d.description, d.criteria, d.alternatives) for d in inputs]
+                )
+                outputs = [
+                    DecisionProblemOutput(
+                        id=decision_id,
+                        title=d.title,
+                        description=d.description,
+                        status="in_progress",
+                        criteria=d.criteria,
+                        alternatives=d.alternatives,
+                        criteria_ids=criteria_ids,
+                        alternative_ids=alternative_ids
+                    )
+                    for d, (decision_id, criteria_ids, alternative_ids) in zip(inputs, created)
+                ]
+                if idempotency_key:
+                    retention = get_settings().idempotency_retention_seconds
+                    self.db_repository.delete_idempotency_records(datetime.now() - timedelta(seconds=retention))
+                    self.db_repository.save_idempotency_record(
+                        idempotency_key, request_hash, json.dumps(jsonable_encoder(outputs))
+                    )
+            return outputs
+        except HTTPException:
+            raise
+        except Exception as e:
+            # A concurrent request with the same key committed first; everything here was rolled back
+            if idempotency_key:
+                replay = self._replay_batch(idempotency_key, request_hash)
+                if replay is not None:
+                    return replay
+            raise HTTPException(status_code=500, detail=f"Error creating decision problems: {str(e)}")
+
     def get_decision_problem(self, decision_id: int) -> DecisionProblemOutput:
         """Get decision problem details."""
         try:
@@ -63,6 +149,48 @@ class AHPService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error retrieving decision problem: {str(e)}")
     
+    def update_decision_status(self, decision_id: int, status: str):
+        """Change a decision's status; its cached results are dropped (reopening makes them editable again)."""
+        self.db_repository.update_decision_status(decision_id, status)
+        results_cache.invalidate(decision_id)
+
+    def reopen_decision(self, decision_id: int) -> DecisionProblemOutput:
+        """Move a completed decision back to in_progress so its judgments can be revised."""
+        self.get_decision_problem(decision_id)  # 404 for unknown decisions
+        self.update_decision_status(decision_id, "in_progress")
+        return self.get_decision_problem(decision_id)
+
+    def get_final_ranking(self, decision_id: int) -> List[RankedAlternative]:
+        """Build the ranking from the stored final scores (empty if none are stored)."""
+        scores = sorted(
+            self.db_repository.get_alternative_scores(decision_id, True), key=lambda s: s["score"], reverse=True
+        )
+        return [
+            RankedAlternative(alternative=s["name"], weight=s["score"], rank=i + 1)
+            for i, s in enumerate(scores)
+        ]
+
+    def get_decision_results(self, decision_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Detail, criteria weights and final ranking of a completed decision, read through the results
+        cache. Returns None while the decision is not completed (nothing is cached then).
+        """
+        cached = results_cache.get(decision_id)
+        if cached is not None:
+            return cached
+
+        generation = results_cache.generation()
+        decision = self.get_decision_problem(decision_id)
+        if decision.status != "completed":
+            return None
+        results = {
+            "decision": jsonable_encoder(decision),
+            "criteria": self.db_repository.get_criteria_with_weights(decision_id),
+            "ranking": jsonable_encoder(self.get_final_ranking(decision_id))
+        }
+        results_cache.put(decision_id, results, generation)
+        return results
+
     def calculate_column_sums(self, matrix: np.ndarray) -> np.ndarray:
         """Calculate the sum of each column in the pairwise comparison matrix."""
         return matrix.sum(axis=0)
@@ -119,6 +247,128 @@ class AHPService:
             "is_consistent": cr < 0.1
         }
     
+    def rank_inconsistent_judgments(self, matrix: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Score every judgment by |a_ij * w_j / w_i - 1|, its deviation from the ratio implied by the weights.
+        Returns an n x n error matrix (zero on the diagonal).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            errors = np.abs(matrix * weights[np.newaxis, :] / weights[:, np.newaxis] - 1)
+        errors = np.nan_to_num(errors, nan=0.0, posinf=0.0)
+        np.fill_diagonal(errors, 0.0)
+        return errors
+
+    def evaluate_single_edits(self, matrix: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                              values: np.ndarray) -> np.ndarray:
+        """
+        Compute, in one batched pass, the CR obtained by setting a_ij = v (and a_ji = 1/v) for each
+        candidate (rows[c], cols[c], values[c]). Editing two cells only changes two column sums,
+        so candidate weights are derived from the current ones instead of renormalizing each matrix.
+        """
+        n = len(matrix)
+        column_sums = self.calculate_column_sums(matrix)
+        weights = self.compute_weights(matrix / column_sums)
+        candidates = np.arange(len(rows))
+
+        # Changes in column j (at row i) and column i (at row j)
+        delta_j = values - matrix[rows, cols]
+        delta_i = 1.0 / values - matrix[cols, rows]
+        new_sum_j = column_sums[cols] + delta_j
+        new_sum_i = column_sums[rows] + delta_i
+
+        new_weights = (
+            weights[np.newaxis, :]
+            + (matrix[:, cols].T * (1.0 / new_sum_j - 1.0 / column_sums[cols])[:, np.newaxis]
+               + matrix[:, rows].T * (1.0 / new_sum_i - 1.0 / column_sums[rows])[:, np.newaxis]) / n
+        )
+        new_weights[candidates, rows] += delta_j / new_sum_j / n
+        new_weights[candidates, cols] += delta_i / new_sum_i / n
+
+        # Weighted sums A'w' = Aw' plus the two edited cells
+        weighted_sums = new_weights @ matrix.T
+        weighted_sums[candidates, rows] += delta_j * new_weights[candidates, cols]
+        weighted_sums[candidates, cols] += delta_i * new_weights[candidates, rows]
+
+        consistency_vectors = np.divide(
+            weighted_sums, new_weights, out=np.zeros_like(weighted_sums), where=new_weights != 0
+        )
+        lambda_max = consistency_vectors.mean(axis=1)
+        ci = (lambda_max - n) / (n - 1) if n > 1 else np.zeros_like(lambda_max)
+        ri = self.RI_TABLE.get(n, 1.49)
+        return ci / ri if ri != 0 else np.zeros_like(lambda_max)
+
+    def suggest_consistency_improvements(self, matrix: List[List[float]], labels: Optional[List[str]] = None,
+                                         top_k: int = 10) -> ConsistencySuggestionsOutput:
+        """
+        Rank the judgments most responsible for inconsistency and, for each, the Saaty-scale value
+        that would give the lowest CR if that single judgment (and its reciprocal) were changed.
+        """
+        try:
+            if not matrix or any(len(row) != len(matrix) for row in matrix):
+                raise HTTPException(status_code=400, detail="Matrix must be square")
+            matrix_np = np.array(matrix, dtype=float)
+            if labels is not None and len(labels) != len(matrix_np):
+                raise HTTPException(status_code=400, detail="Labels must match the matrix size")
+            if not np.isfinite(matrix_np).all() or (matrix_np <= 0).any():
+                raise HTTPException(status_code=400, detail="Judgment values must be positive numbers")
+            if not np.allclose(matrix_np * matrix_np.T, 1, rtol=0, atol=self.RECIPROCAL_TOLERANCE):
+                raise HTTPException(status_code=400, detail="Matrix must be reciprocal (a_ji = 1 / a_ij, a_ii = 1)")
+
+            n = len(matrix_np)
+            norm_matrix, _ = self.normalize_matrix(matrix_np)
+            weights = self.compute_weights(norm_matrix)
+            consistency_data = self.check_consistency(matrix_np, weights)
+
+            # Upper-triangle judgments; a_ji is always edited together with a_ij
+            errors = self.rank_inconsistent_judgments(matrix_np, weights)
+            pair_rows, pair_cols = np.triu_indices(n, k=1)
+            pair_errors = np.maximum(errors[pair_rows, pair_cols], errors[pair_cols, pair_rows])
+
+            # Evaluate every (pair, Saaty value) candidate in a single batch
+            scale = self.SAATY_SCALE
+            rows = np.repeat(pair_rows, len(scale))
+            cols = np.repeat(pair_cols, len(scale))
+            values = np.tile(scale, len(pair_rows))
+            candidate_cr = self.evaluate_single_edits(matrix_np, rows, cols, values).reshape(len(pair_rows), len(scale))
+
+            # Among values tied for the lowest CR, prefer the one closest to the ratio w_i / w_j
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ideal_values = weights[pair_rows] / weights[pair_cols]
+                distance = np.abs(np.log(scale)[np.newaxis, :] - np.log(ideal_values)[:, np.newaxis])
+            best_cr = candidate_cr.min(axis=1)
+            tied = candidate_cr <= best_cr[:, np.newaxis] + self.CR_TOLERANCE
+            best_index = np.where(tied, np.nan_to_num(distance, nan=np.inf), np.inf).argmin(axis=1)
+
+            # Only suggest edits that actually lower the CR
+            improves = best_cr < consistency_data["cr"] - self.CR_TOLERANCE
+            order = [p for p in np.argsort(-pair_errors, kind="stable") if improves[p]][:max(top_k, 0)]
+            suggestions = []
+            for p in order:
+                i, j = int(pair_rows[p]), int(pair_cols[p])
+                suggestions.append(
+                    JudgmentSuggestion(
+                        row=i,
+                        column=j,
+                        row_label=labels[i] if labels else None,
+                        column_label=labels[j] if labels else None,
+                        current_value=float(matrix_np[i, j]),
+                        error=float(pair_errors[p]),
+                        ideal_value=float(ideal_values[p]) if weights[j] != 0 else 0.0,
+                        suggested_value=float(scale[best_index[p]]),
+                        resulting_cr=float(best_cr[p])
+                    )
+                )
+
+            return ConsistencySuggestionsOutput(
+                cr=consistency_data["cr"],
+                is_consistent=consistency_data["is_consistent"],
+                suggestions=suggestions
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error computing consistency suggestions: {str(e)}")
+
     def compute_criteria_weights(self, decision_id: int, input_data: PairwiseMatrixInput, 
                                 save_to_db: bool = True) -> StepByStepCalculation:
         """
@@ -160,6 +410,7 @@ class AHPService:
                     consistency_data["cr"], 
                     consistency_data["is_consistent"]
                 )
+                results_cache.invalidate(decision_id)
 
             # Create response with detailed step data
             return StepByStepCalculation(
@@ -226,6 +477,7 @@ class AHPService:
                     consistency_data["cr"], 
                     consistency_data["is_consistent"]
                 )
+                results_cache.invalidate(decision_id)
 
             # Create response with detailed step data
             return StepByStepCalculation(
@@ -253,6 +505,551 @@ class AHPService:
                 detail=f"Error in alternative weight computation for {criteria_name}: {str(e)}"
             )
     
+    def get_matrix_state(self, decision_id: int, criteria_id: Optional[int]) -> MatrixState:
+        """
+        Get the cached matrix state for a decision. The cache is only trusted while its version
+        matches the decision's matrix version in the database; otherwise the matrix is reloaded.
+        Rows and columns follow the decision's display order.
+        """
+        key = (decision_id, criteria_id)
+        version = self.db_repository.get_matrix_version(decision_id)
+        state = matrix_state_cache.get(key)
+        if state is not None and state.version == version:
+            return state
+
+        if criteria_id is None:
+            stored = self.db_repository.get_criteria_comparison_matrix(decision_id)
+        else:
+            stored = self.db_repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="No complete comparison matrix stored for this decision")
+
+        state = MatrixState(*stored, version=version)
+        matrix_state_cache.put(key, state)
+        return state
+
+    def copy_matrix_state(self, decision_id: int, criteria_id: Optional[int]) -> MatrixState:
+        """
+        Private copy of a cached matrix state. The copy is taken under the state's lock, and only
+        while the state is still cached, so it never holds a half-applied or rejected edit.
+        """
+        key = (decision_id, criteria_id)
+        for _ in range(self.MAX_UPDATE_ATTEMPTS):
+            state = self.get_matrix_state(decision_id, criteria_id)
+            with state.lock:
+                if matrix_state_cache.get(key) is state:
+                    return state.copy()
+        raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+
+    def _state_to_calculation(self, step_name: str, state: MatrixState) -> StepByStepCalculation:
+        """Build the step-by-step response from a matrix state."""
+        consistency_data = self.check_consistency(state.matrix, state.weights)
+        return StepByStepCalculation(
+            step_name=step_name,
+            original_matrix=state.matrix.tolist(),
+            column_sums=state.column_sums.tolist(),
+            normalized_matrix=state.normalized_matrix().tolist(),
+            weights=state.weights.tolist(),
+            consistency_check=ConsistencyCheck(
+                lambda_max=consistency_data["lambda_max"],
+                consistency_vector=consistency_data["consistency_vector"],
+                ci=consistency_data["ci"],
+                ri=consistency_data["ri"],
+                cr=consistency_data["cr"],
+                is_consistent=consistency_data["is_consistent"]
+            )
+        )
+
+    def save_matrix_state(self, decision_id: int, criteria_id: Optional[int], state: MatrixState,
+                          changed_cells: List[Tuple[int, int, float]]) -> Optional[StepByStepCalculation]:
+        """
+        Persist the changed cells of a matrix state together with its weights and consistency check
+        in one transaction. Only the given cells are written; the full matrix is never rewritten.
+        Returns None (and writes nothing) if the decision's matrices changed since state.version.
+        """
+        result = self._state_to_calculation(
+            "criteria_weights" if criteria_id is None else f"alternative_weights_for_{criteria_id}",
+            state
+        )
+        consistency = result.consistency_check
+
+        new_version = self.db_repository.save_matrix_update(
+            decision_id,
+            criteria_id,
+            state.version,
+            changed_cells,
+            state.ids,
+            result.weights,
+            consistency.lambda_max,
+            consistency.ci,
+            consistency.cr,
+            consistency.is_consistent
+        )
+        if new_version is None:
+            return None
+
+        state.version = new_version
+        results_cache.invalidate(decision_id)
+        return result
+
+    def update_judgment(self, decision_id: int, criteria_id: Optional[int],
+                        row: int, column: int, value: float) -> StepByStepCalculation:
+        """
+        Change a single judgment (row, column) of the criteria matrix (criteria_id=None) or of one
+        criterion's alternative matrix, indexed in the decision's display order. The reciprocal cell
+        is kept in sync, weights are updated incrementally from the cached state and only the two
+        changed cells are persisted. A concurrent write from elsewhere triggers a reload and retry.
+        """
+        key = (decision_id, criteria_id)
+        try:
+            if not math.isfinite(value) or value <= 0:
+                raise HTTPException(status_code=400, detail="Judgment value must be a positive number")
+            if row == column:
+                raise HTTPException(status_code=400, detail="Diagonal judgments are fixed at 1")
+
+            for _ in range(self.MAX_UPDATE_ATTEMPTS):
+                state = self.get_matrix_state(decision_id, criteria_id)
+                with state.lock:
+                    if not (0 <= row < state.size and 0 <= column < state.size):
+                        raise HTTPException(status_code=400, detail="Judgment index out of range")
+
+                    changed_cells = state.set_judgment(row, column, value)
+                    try:
+                        result = self.save_matrix_state(decision_id, criteria_id, state, changed_cells)
+                    except Exception:
+                        matrix_state_cache.discard(key, state)
+                        raise
+                    if result is not None:
+                        return result
+                    # Stale state: it already holds the rejected edit, so drop it (before anyone
+                    # waiting on the lock can copy it) and reload
+                    matrix_state_cache.discard(key, state)
+
+            raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+        except HTTPException:
+            raise
+        except Exception as e:
+            # The cached state may no longer match the database
+            matrix_state_cache.invalidate(decision_id)
+            raise HTTPException(status_code=500, detail=f"Error updating judgment: {str(e)}")
+
+    def _load_alternative_states(self, decision_id: int, criteria_ids: List[int]) -> Dict[int, MatrixState]:
+        """Private copies of the stored alternative matrix states, for criteria that have one."""
+        states = {}
+        for criteria_id in criteria_ids:
+            try:
+                states[criteria_id] = self.copy_matrix_state(decision_id, criteria_id)
+            except HTTPException as e:
+                if e.status_code != 404:
+                    raise
+        return states
+
+    def _save_alternative_change(self, decision_id: int, version: int, criteria_ids: List[int],
+                                 names: Dict[int, str], states: Dict[int, MatrixState],
+                                 new_cells: Dict[int, List[Tuple[int, int, float]]],
+                                 change_link) -> Optional[AlternativeChangeOutput]:
+        """
+        Persist an added or removed alternative: the link change, only the new cells, every affected
+        criterion's weights and consistency and the re-ranked final scores, in one transaction guarded
+        by the matrix version. Returns None (nothing written) if the version moved on.
+        """
+        consistency = {
+            criteria_id: self.check_consistency(state.matrix, state.weights) for criteria_id, state in states.items()
+        }
+
+        # Re-rank in one product: (alternatives x criteria) local weights times the criteria weights
+        final_scores, ranked_ids = None, None
+        criteria_weights = self.db_repository.get_criteria_weights(decision_id)
+        if (criteria_ids and len(states) == len(criteria_ids) and all(c in criteria_weights for c in criteria_ids)
+                and len({tuple(state.ids) for state in states.values()}) == 1):
+            ranked_ids = states[criteria_ids[0]].ids
+            local_weights = np.column_stack([states[c].weights for c in criteria_ids])
+            final_scores = local_weights @ np.array([criteria_weights[c] for c in criteria_ids])
+
+        with self.db_repository.transaction():
+            if not self.db_repository.claim_matrix_version(decision_id, version):
+                return None
+            change_link()
+            for criteria_id, state in states.items():
+                if new_cells.get(criteria_id):
+                    self.db_repository.save_alternative_comparison_cells(decision_id, criteria_id, new_cells[criteria_id])
+                self.db_repository.save_alternative_scores(decision_id, state.ids, criteria_id, state.weights.tolist())
+                check = consistency[criteria_id]
+                self.db_repository.save_consistency_check(
+                    decision_id, criteria_id, check["lambda_max"], check["ci"], check["cr"], check["is_consistent"]
+                )
+            if final_scores is not None:
+                self.db_repository.save_alternative_scores(decision_id, ranked_ids, None, final_scores.tolist(), True)
+
+        # The new states are exactly what was stored, so they become the cached ones
+        matrix_state_cache.invalidate(decision_id)
+        for criteria_id, state in states.items():
+            state.version = version + 1
+            matrix_state_cache.put((decision_id, criteria_id), state)
+        results_cache.invalidate(decision_id)
+
+        ranking = []
+        if final_scores is not None:
+            order = np.argsort(-final_scores, kind="stable")
+            ranking = [
+                RankedAlternative(alternative=names[ranked_ids[i]], weight=float(final_scores[i]), rank=rank + 1)
+                for rank, i in enumerate(order.tolist())
+            ]
+        return AlternativeChangeOutput(
+            decision=self.get_decision_problem(decision_id),
+            alternative_weights=[
+                CriterionAlternativeWeights(
+                    criteria_id=criteria_id,
+                    alternative_ids=state.ids,
+                    weights=state.weights.tolist(),
+                    consistency_check=ConsistencyCheck(
+                        lambda_max=consistency[criteria_id]["lambda_max"],
+                        consistency_vector=consistency[criteria_id]["consistency_vector"],
+                        ci=consistency[criteria_id]["ci"],
+                        ri=consistency[criteria_id]["ri"],
+                        cr=consistency[criteria_id]["cr"],
+                        is_consistent=consistency[criteria_id]["is_consistent"]
+                    )
+                )
+                for criteria_id, state in states.items()
+            ],
+            ranking=ranking
+        )
+
+    def add_alternative(self, decision_id: int, input_data: AlternativeAddInput) -> AlternativeChangeOutput:
+        """
+        Add an alternative to an existing decision. Only the new alternative's judgments against the
+        existing ones are needed per criterion; each stored matrix is extended in place and only the
+        2n+1 new cells are written, instead of re-entering and rewriting all (n+1)^2 cells.
+        """
+        try:
+            rows = {row.criteria_id: np.array(row.values, dtype=float) for row in input_data.judgments}
+            if len(rows) != len(input_data.judgments):
+                raise HTTPException(status_code=400, detail="Each criterion may have only one row of judgments")
+            if any(not np.isfinite(values).all() or (values <= 0).any() for values in rows.values()):
+                raise HTTPException(status_code=400, detail="Judgment values must be positive numbers")
+
+            for _ in range(self.MAX_UPDATE_ATTEMPTS):
+                version = self.db_repository.get_matrix_version(decision_id)
+                decision_data = self.db_repository.get_decision_problem(decision_id)
+                names = {a["id"]: a["name"] for a in decision_data["alternatives"]}
+                if input_data.name in names.values():
+                    raise HTTPException(status_code=400, detail=f"Alternative '{input_data.name}' is already in this decision")
+
+                criteria_ids = [c["id"] for c in decision_data["criteria"]]
+                states = self._load_alternative_states(decision_id, criteria_ids)
+                if set(rows) != set(states):
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Judgments are needed for exactly the criteria with alternative matrices: {sorted(states)}"
+                    )
+                for criteria_id, state in states.items():
+                    if len(rows[criteria_id]) != state.size:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Criterion {criteria_id} needs {state.size} judgments, one per existing alternative"
+                        )
+
+                alternative_id = self.db_repository.save_alternatives_to_db([input_data.name])[0]
+                names[alternative_id] = input_data.name
+                new_cells = {
+                    criteria_id: state.add_item(alternative_id, rows[criteria_id])
+                    for criteria_id, state in states.items()
+                }
+                result = self._save_alternative_change(
+                    decision_id, version, criteria_ids, names, states, new_cells,
+                    lambda: self.db_repository.append_alternative_to_decision(decision_id, alternative_id)
+                )
+                if result is not None:
+                    return result
+
+            raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+        except HTTPException:
+            raise
+        except Exception as e:
+            matrix_state_cache.invalidate(decision_id)
+            raise HTTPException(status_code=500, detail=f"Error adding alternative: {str(e)}")
+
+    def remove_alternative(self, decision_id: int, alternative_id: int) -> AlternativeChangeOutput:
+        """Remove an alternative from a decision, shrinking the stored matrices and re-ranking the rest."""
+        try:
+            for _ in range(self.MAX_UPDATE_ATTEMPTS):
+                version = self.db_repository.get_matrix_version(decision_id)
+                decision_data = self.db_repository.get_decision_problem(decision_id)
+                names = {a["id"]: a["name"] for a in decision_data["alternatives"]}
+                if alternative_id not in names:
+                    raise HTTPException(status_code=404, detail=f"Alternative {alternative_id} is not in this decision")
+                if len(names) <= 2:
+                    raise HTTPException(status_code=400, detail="A decision needs at least two alternatives")
+
+                criteria_ids = [c["id"] for c in decision_data["criteria"]]
+                states = self._load_alternative_states(decision_id, criteria_ids)
+                for state in states.values():
+                    if alternative_id in state.ids:
+                        state.remove_item(state.ids.index(alternative_id))
+                result = self._save_alternative_change(
+                    decision_id, version, criteria_ids, names, states, {},
+                    lambda: self.db_repository.remove_alternative_from_decision(decision_id, alternative_id)
+                )
+                if result is not None:
+                    return result
+
+            raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+        except HTTPException:
+            raise
+        except Exception as e:
+            matrix_state_cache.invalidate(decision_id)
+            raise HTTPException(status_code=500, detail=f"Error removing alternative: {str(e)}")
+
+    def compute_weight_batch(self, matrices: List[List[List[float]]]) -> List[Dict[str, Any]]:
+        """Compute weights and consistency for many pairwise matrices (used by background jobs)."""
+        results = []
+        for matrix in matrices:
+            matrix = np.array(matrix, dtype=float)
+            norm_matrix, _ = self.normalize_matrix(matrix)
+            weights = self.compute_weights(norm_matrix)
+            consistency_data = self.check_consistency(matrix, weights)
+            results.append({
+                "weights": weights.tolist(),
+                "lambda_max": float(consistency_data["lambda_max"]),
+                "ci": float(consistency_data["ci"]),
+                "cr": float(consistency_data["cr"]),
+                "is_consistent": bool(consistency_data["is_consistent"])
+            })
+        return results
+
+    def recompute_decision(self, decision_id: int) -> Dict[str, Any]:
+        """
+        Recompute and store every weight, consistency check and (when all alternative matrices are
+        complete) the final scores of a decision from its stored matrices. The results are written
+        in one transaction guarded by the matrix version, so they always match the matrices.
+        """
+        for _ in range(self.MAX_UPDATE_ATTEMPTS):
+            version = self.db_repository.get_matrix_version(decision_id)
+            stored = self.db_repository.get_criteria_comparison_matrix(decision_id)
+            if stored is None:
+                raise HTTPException(status_code=404, detail="No complete criteria matrix stored for this decision")
+            criteria_ids, criteria_matrix = stored
+            criteria_result = self.compute_weight_batch([criteria_matrix])[0]
+
+            alternative_results = []
+            for criteria_id in criteria_ids:
+                stored = self.db_repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+                if stored is not None:
+                    alternative_ids, matrix = stored
+                    result = self.compute_weight_batch([matrix])[0]
+                    alternative_results.append({"criteria_id": criteria_id, "alternative_ids": alternative_ids, **result})
+
+            final_scores = None
+            if (len(alternative_results) == len(criteria_ids)
+                    and len({tuple(r["alternative_ids"]) for r in alternative_results}) == 1):
+                local_weights = np.array([r["weights"] for r in alternative_results]).T
+                final_scores = (local_weights @ np.array(criteria_result["weights"])).tolist()
+
+            with self.db_repository.transaction():
+                if not self.db_repository.claim_matrix_version(decision_id, version):
+                    continue
+                self.db_repository.save_criteria_weights(decision_id, criteria_ids, criteria_result["weights"])
+                self.db_repository.save_consistency_check(
+                    decision_id, None, criteria_result["lambda_max"], criteria_result["ci"],
+                    criteria_result["cr"], criteria_result["is_consistent"]
+                )
+                for r in alternative_results:
+                    self.db_repository.save_alternative_scores(
+                        decision_id, r["alternative_ids"], r["criteria_id"], r["weights"]
+                    )
+                    self.db_repository.save_consistency_check(
+                        decision_id, r["criteria_id"], r["lambda_max"], r["ci"], r["cr"], r["is_consistent"]
+                    )
+                if final_scores is not None:
+                    self.db_repository.save_alternative_scores(
+                        decision_id, alternative_results[0]["alternative_ids"], None, final_scores, True
+                    )
+            results_cache.invalidate(decision_id)
+
+            return {
+                "decision_id": decision_id,
+                "criteria_ids": criteria_ids,
+                **criteria_result,
+                "alternatives": alternative_results,
+                "final_scores": final_scores
+            }
+
+        raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+
+    def set_rating_levels(self, decision_id: int, input_data: RatingLevelsInput) -> RatingLevelsOutput:
+        """
+        Define a criterion's rating levels for ratings mode from a pairwise comparison of the levels.
+        Level priorities are idealized (divided by the largest) so the best level scores 1.
+        """
+        try:
+            decision_data = self.db_repository.get_decision_problem(decision_id)
+            if input_data.criteria_id not in {c["id"] for c in decision_data["criteria"]}:
+                raise HTTPException(status_code=400, detail="Criterion does not belong to this decision")
+
+            n = len(input_data.levels)
+            if n < 2 or len(set(input_data.levels)) != n:
+                raise HTTPException(status_code=400, detail="At least two distinct rating levels are required")
+            matrix = np.array(input_data.matrix, dtype=float)
+            if matrix.shape != (n, n):
+                raise HTTPException(status_code=400, detail="Matrix size must match the number of levels")
+            if not np.isfinite(matrix).all() or (matrix <= 0).any():
+                raise HTTPException(status_code=400, detail="Judgment values must be positive numbers")
+
+            norm_matrix, _ = self.normalize_matrix(matrix)
+            weights = self.compute_weights(norm_matrix)
+            consistency_data = self.check_consistency(matrix, weights)
+            priorities = weights / weights.max()
+
+            level_ids = self.db_repository.save_rating_levels(
+                decision_id, input_data.criteria_id, input_data.levels, priorities.tolist()
+            )
+            results_cache.invalidate(decision_id)
+            return RatingLevelsOutput(
+                criteria_id=input_data.criteria_id,
+                levels=[
+                    RatingLevel(id=level_id, name=name, priority=float(priority))
+                    for level_id, name, priority in zip(level_ids, input_data.levels, priorities)
+                ],
+                consistency_check=ConsistencyCheck(
+                    lambda_max=consistency_data["lambda_max"],
+                    consistency_vector=consistency_data["consistency_vector"],
+                    ci=consistency_data["ci"],
+                    ri=consistency_data["ri"],
+                    cr=consistency_data["cr"],
+                    is_consistent=consistency_data["is_consistent"]
+                )
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error saving rating levels: {str(e)}")
+
+    def get_rating_levels(self, decision_id: int) -> List[RatingLevelsOutput]:
+        """Get the rating levels of every criterion that has them."""
+        self.db_repository.get_matrix_version(decision_id)  # 404 for unknown decisions
+        by_criteria: Dict[int, List[RatingLevel]] = {}
+        for level in self.db_repository.get_rating_levels(decision_id):
+            by_criteria.setdefault(level["criteria_id"], []).append(
+                RatingLevel(id=level["id"], name=level["name"], priority=level["priority"])
+            )
+        return [RatingLevelsOutput(criteria_id=c, levels=levels) for c, levels in by_criteria.items()]
+
+    def rate_alternatives(self, decision_id: int, input_data: AlternativeRatingsInput) -> int:
+        """Assign a rating level to alternatives per criterion. Returns the number of ratings stored."""
+        try:
+            decision_data = self.db_repository.get_decision_problem(decision_id)
+            criteria_ids = {c["id"] for c in decision_data["criteria"]}
+            alternative_ids = {a["id"] for a in decision_data["alternatives"]}
+            level_criteria = {
+                level["id"]: level["criteria_id"] for level in self.db_repository.get_rating_levels(decision_id)
+            }
+
+            ratings = []
+            for criterion in input_data.ratings:
+                if criterion.criteria_id not in criteria_ids:
+                    raise HTTPException(
+                        status_code=400, detail=f"Criterion {criterion.criteria_id} does not belong to this decision"
+                    )
+                if len(criterion.alternative_ids) != len(criterion.level_ids):
+                    raise HTTPException(status_code=400, detail="Each alternative needs exactly one level")
+                unknown = set(criterion.alternative_ids) - alternative_ids
+                if unknown:
+                    raise HTTPException(
+                        status_code=400, detail=f"Alternatives {sorted(unknown)} do not belong to this decision"
+                    )
+                if any(level_criteria.get(level_id) != criterion.criteria_id for level_id in criterion.level_ids):
+                    raise HTTPException(
+                        status_code=400, detail=f"Unknown rating level for criterion {criterion.criteria_id}"
+                    )
+                ratings.extend(
+                    (alternative_id, criterion.criteria_id, level_id)
+                    for alternative_id, level_id in zip(criterion.alternative_ids, criterion.level_ids)
+                )
+
+            self.db_repository.save_alternative_ratings(decision_id, ratings)
+            results_cache.invalidate(decision_id)
+            return len(ratings)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error saving ratings: {str(e)}")
+
+    def calculate_ratings_ranking(self, decision_id: int) -> List[RankedAlternative]:
+        """
+        Rank alternatives in ratings (absolute measurement) mode: each alternative's score is the
+        sum over criteria of criterion weight times the priority of the level it was rated at.
+
+        With L the (criteria x levels) priority table and R the (alternatives x criteria) table of
+        level positions, the scores are L[c, R[:, c]] @ w: one gather and one matrix product, so the
+        cost grows linearly with the number of alternatives instead of quadratically.
+        """
+        try:
+            decision_data = self.db_repository.get_decision_problem(decision_id)
+            criteria = decision_data["criteria"]
+            alternatives = decision_data["alternatives"]
+            criteria_ids = np.array([c["id"] for c in criteria])
+            alternative_ids = np.array([a["id"] for a in alternatives])
+
+            stored_weights = self.db_repository.get_criteria_weights(decision_id)
+            if any(c["id"] not in stored_weights for c in criteria):
+                raise HTTPException(status_code=400, detail="Criteria weights have not been computed yet")
+            criteria_weights = np.array([stored_weights[c["id"]] for c in criteria])
+
+            # L: level priorities per criterion, padded to the longest level list
+            levels = self.db_repository.get_rating_levels(decision_id)
+            criteria_index = {criteria_id: i for i, criteria_id in enumerate(criteria_ids.tolist())}
+            counts = np.zeros(len(criteria), dtype=int)
+            level_position = {}
+            for level in levels:
+                c = criteria_index.get(level["criteria_id"])
+                if c is not None:
+                    level_position[level["id"]] = counts[c]
+                    counts[c] += 1
+            if (counts == 0).any():
+                raise HTTPException(status_code=400, detail="Every criterion needs rating levels")
+            level_table = np.zeros((len(criteria), counts.max()))
+            for level in levels:
+                if level["id"] in level_position:
+                    level_table[criteria_index[level["criteria_id"]], level_position[level["id"]]] = level["priority"]
+
+            # R: level position of every (alternative, criterion) pair, -1 where unrated
+            ratings = np.array(self.db_repository.get_alternative_ratings(decision_id), dtype=np.int64).reshape(-1, 3)
+            rating_table = np.full((len(alternatives), len(criteria)), -1, dtype=np.int64)
+            if len(ratings):
+                alternative_order = np.argsort(alternative_ids)
+                criteria_order = np.argsort(criteria_ids)
+                rows = alternative_order[np.searchsorted(alternative_ids, ratings[:, 0], sorter=alternative_order)]
+                columns = criteria_order[np.searchsorted(criteria_ids, ratings[:, 1], sorter=criteria_order)]
+                positions = np.array([level_position.get(level_id, -1) for level_id in ratings[:, 2].tolist()])
+                rating_table[rows, columns] = positions
+            if (rating_table < 0).any():
+                raise HTTPException(status_code=400, detail="Every alternative must be rated on every criterion")
+
+            local_priorities = level_table[np.arange(len(criteria)), rating_table]
+            final_scores = local_priorities @ criteria_weights
+
+            self.db_repository.save_alternative_scores(
+                decision_id, alternative_ids.tolist(), None, final_scores.tolist(), True
+            )
+            self.update_decision_status(decision_id, "completed")
+
+            criteria_names = [c["name"] for c in criteria]
+            order = np.argsort(-final_scores, kind="stable")
+            return [
+                RankedAlternative(
+                    alternative=alternatives[i]["name"],
+                    weight=float(final_scores[i]),
+                    rank=rank + 1,
+                    local_weights=dict(zip(criteria_names, local_priorities[i].tolist()))
+                )
+                for rank, i in enumerate(order.tolist())
+            ]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error calculating ratings ranking: {str(e)}")
+
     def calculate_final_ranking(self, decision_id: int, alternatives: List[str], 
                               criteria_weights: List[float], alternative_weights_by_criteria: List[List[float]]) -> List[RankedAlternative]:
         """
@@ -276,7 +1073,7 @@ class AHPService:
             )
             
             # Mark decision as completed
-            self.db_repository.update_decision_status(decision_id, "completed")
+            self.update_decision_status(decision_id, "completed")
             
             # Create ranked alternatives list
             ranked_alternatives = []
@@ -0,0 +1,231 @@
+import json
+import math
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from repositories.factory import create_repository
+from services.ahp_service import AHPService
+from services.results_cache import results_cache
+
+
+# === Work run inside the pool processes (top-level so they can be pickled) ===
+
+def _with_repository(fn):
+    """Run fn(repository) with a short-lived repository connection."""
+    repository = create_repository()
+    try:
+        return fn(repository)
+    finally:
+        repository.close()
+
+
+def run_chunk(job_id: str, first: bool, fn: Callable, *args):
+    """Run one chunk of a job; the first chunk marks the job as running when it starts."""
+    try:
+        if first:
+            _with_repository(lambda repository: repository.mark_job_running(job_id))
+        return fn(*args)
+    except HTTPException as e:
+        # HTTPException loses its detail when pickled back to the parent process
+        raise RuntimeError(e.detail) from None
+
+
+def compute_weights_chunk(matrices: List[List[List[float]]]) -> List[Dict[str, Any]]:
+    return AHPService(None).compute_weight_batch(matrices)
+
+
+def recompute_decision(decision_id: int) -> Dict[str, Any]:
+    return _with_repository(lambda repository: AHPService(repository).recompute_decision(decision_id))
+
+
+def _concatenate(results: List[list]) -> list:
+    return [item for chunk in results for item in chunk]
+
+
+def _first(results: List[Any]) -> Any:
+    return results[0]
+
+
+class _Job:
+    """Bookkeeping for a job submitted by this process."""
+
+    def __init__(self, job_id: str, futures_count: int, combine: Callable[[List[Any]], Any],
+                 on_complete: Optional[Callable[[], None]] = None):
+        self.id = job_id
+        self.results: List[Any] = [None] * futures_count
+        self.remaining = futures_count
+        self.combine = combine
+        self.on_complete = on_complete
+        self.futures: List[Future] = []
+        self.finished = False
+        self.released = False
+        self.started = time.monotonic()
+
+
+class JobQueue:
+    """
+    Runs heavy AHP work in a bounded pool of worker processes so it never blocks request threads.
+
+    A job is split into chunks; progress is the fraction of finished chunks. Job status and results
+    are stored in the database (jobs table), so any API worker process can answer status requests.
+    Each API process accepts at most max_pending unfinished jobs; beyond that, submit() sheds load
+    with 429 and a Retry-After estimated from recent job durations.
+    """
+
+    WEIGHTS_CHUNK_SIZE = 16
+
+    def __init__(self, max_workers: int, max_pending: int, retention_seconds: int = 3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._jobs: Dict[str, _Job] = {}
+        # Moving average of job wall time, used for Retry-After
+        self._average_seconds = 1.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned (not forked) workers never inherit the server's threads or DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up."""
+        return max(1, math.ceil(self._average_seconds * self._pending / self.max_workers))
+
+    def submit_weights(self, matrices: List[List[List[float]]]) -> str:
+        """Queue weight and consistency computation for a batch of pairwise matrices."""
+        for matrix in matrices:
+            if not matrix or any(len(row) != len(matrix) for row in matrix):
+                raise HTTPException(status_code=400, detail="Matrix must be square")
+            if any(not math.isfinite(value) or value <= 0 for row in matrix for value in row):
+                raise HTTPException(status_code=400, detail="Judgment values must be positive numbers")
+        size = self.WEIGHTS_CHUNK_SIZE
+        chunks = [(compute_weights_chunk, (matrices[i:i + size],)) for i in range(0, len(matrices), size)]
+        return self._submit("weights", chunks, _concatenate)
+
+    def submit_recompute(self, decision_id: int) -> str:
+        """Queue recomputation of every stored weight and score of a decision."""
+        # Fail fast with 404 before queueing
+        _with_repository(lambda repository: repository.get_matrix_version(decision_id))
+        # The pool process cannot reach this process's results cache, so drop the entry here once it is done
+        return self._submit(
+            "recompute", [(recompute_decision, (decision_id,))], _first,
+            lambda: results_cache.invalidate(decision_id)
+        )
+
+    def _submit(self, kind: str, chunks: list, combine: Callable[[List[Any]], Any],
+                on_complete: Optional[Callable[[], None]] = None) -> str:
+        if not chunks:
+            raise HTTPException(status_code=400, detail="Job has no work")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many jobs queued, please retry later",
+                    headers={"Retry-After": str(self.retry_after())}
+                )
+            self._pending += 1
+            job = _Job(uuid.uuid4().hex, len(chunks), combine, on_complete)
+            self._jobs[job.id] = job
+
+        try:
+            cutoff = datetime.now() - timedelta(seconds=self.retention_seconds)
+
+            def record(repository):
+                repository.delete_finished_jobs(cutoff)
+                repository.create_job(job.id, kind)
+            _with_repository(record)
+
+            executor = self._get_executor()
+            for index, (fn, args) in enumerate(chunks):
+                future = executor.submit(run_chunk, job.id, index == 0, fn, *args)
+                job.futures.append(future)
+                future.add_done_callback(lambda f, index=index: self._chunk_done(job, index, f))
+        except Exception:
+            with self._lock:
+                job.finished = True
+            for future in job.futures:
+                future.cancel()
+            self._finish(job)
+            raise
+        return job.id
+
+    def _chunk_done(self, job: _Job, index: int, future: Future):
+        """Record a finished chunk; runs on the executor's management thread."""
+        with self._lock:
+            if job.finished or future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                job.results[index] = future.result()
+                job.remaining -= 1
+            done = error is not None or job.remaining == 0
+            if done:
+                job.finished = True
+            progress = 1 - job.remaining / len(job.results)
+
+        try:
+            if error is not None:
+                for other in job.futures:
+                    other.cancel()
+                if isinstance(error, BrokenProcessPool):
+                    self._reset_executor()
+                _with_repository(lambda r: r.update_job(job.id, "failed", progress, error=str(error)))
+            elif done:
+                result = json.dumps(job.combine(job.results))
+                if job.on_complete is not None:
+                    job.on_complete()
+                _with_repository(lambda r: r.update_job(job.id, "completed", 1.0, result=result))
+            else:
+                _with_repository(lambda r: r.update_job(job.id, "running", progress))
+        finally:
+            if done:
+                self._finish(job)
+
+    def _finish(self, job: _Job):
+        """Release the job's queue slot (once)."""
+        with self._lock:
+            if job.released:
+                return
+            job.released = True
+            self._jobs.pop(job.id, None)
+            self._pending -= 1
+            elapsed = time.monotonic() - job.started
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+
+    def _reset_executor(self):
+        """Drop a pool whose worker died so the next job starts a fresh one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the worker processes. Queued chunks are cancelled and their jobs marked failed."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            unfinished = [job for job in self._jobs.values() if not job.finished]
+            for job in unfinished:
+                job.finished = True
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for job in unfinished:
+            try:
+                _with_repository(lambda r: r.update_job(job.id, "failed", 0.0, error="Server shut down"))
+            except Exception:
+                pass
+            self._finish(job)
@@ -0,0 +1,283 @@
+import asyncio
+import math
+from typing import Dict, Optional, Tuple, Any
+from fastapi import WebSocket, WebSocketDisconnect, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from repositories.factory import create_repository
+from services.ahp_service import AHPService
+from services.matrix_state import MatrixState, matrix_state_cache
+
+
+class MatrixSession:
+    """
+    Live editing session for one decision's comparison matrices over a WebSocket.
+
+    Matrices are held as MatrixState objects (NumPy arrays) for the lifetime of the connection.
+    Bursts of cell edits are coalesced (last value per cell wins) and applied after a short
+    debounce, then updated weights and CR are streamed back. Nothing is written to the database
+    until the client sends "commit", the session goes idle, or the client disconnects.
+
+    Client messages:
+        {"type": "load", "criteria_id": null | int}
+        {"type": "edit", "criteria_id": null | int, "row": i, "column": j, "value": v}
+        {"type": "commit"}
+    Server messages: "state", "update", "committed" and "error".
+    """
+
+    DEBOUNCE_SECONDS = 0.05
+    MAX_DELAY_SECONDS = 0.25
+    IDLE_TIMEOUT_SECONDS = 300.0
+
+    def __init__(self, websocket: WebSocket, decision_id: int):
+        self.websocket = websocket
+        self.decision_id = decision_id
+        self.states: Dict[Optional[int], MatrixState] = {}
+        # Pending edits keyed by (criteria_id, row, column) with row < column
+        self.pending: Dict[Tuple[Optional[int], int, int], float] = {}
+        # Changed cells not yet persisted, keyed by criteria_id then (row_id, column_id)
+        self.dirty: Dict[Optional[int], Dict[Tuple[int, int], float]] = {}
+        self._edit_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    @staticmethod
+    def _run_with_service(fn):
+        """Run fn(AHPService) with a short-lived repository connection."""
+        repository = create_repository()
+        try:
+            return fn(AHPService(repository))
+        finally:
+            repository.close()
+
+    async def _get_state(self, criteria_id: Optional[int]) -> MatrixState:
+        """Get the session's copy of a matrix, loading it on first use."""
+        state = self.states.get(criteria_id)
+        if state is None:
+            state = await run_in_threadpool(
+                self._run_with_service,
+                lambda service: service.copy_matrix_state(self.decision_id, criteria_id)
+            )
+            self.states[criteria_id] = state
+        return state
+
+    def _state_message(self, message_type: str, criteria_id: Optional[int], state: MatrixState,
+                       include_matrix: bool = False) -> Dict[str, Any]:
+        """Serialize weights and consistency of a matrix state."""
+        consistency = AHPService(None).check_consistency(state.matrix, state.weights)
+        message = {
+            "type": message_type,
+            "criteria_id": criteria_id,
+            "ids": state.ids,
+            "weights": state.weights.tolist(),
+            "lambda_max": float(consistency["lambda_max"]),
+            "ci": float(consistency["ci"]),
+            "cr": float(consistency["cr"]),
+            "is_consistent": bool(consistency["is_consistent"])
+        }
+        if include_matrix:
+            message["matrix"] = state.matrix.tolist()
+        return message
+
+    async def _send(self, message: Dict[str, Any], notify: bool = True):
+        if notify:
+            await self.websocket.send_json(message)
+
+    async def _send_error(self, detail: str, notify: bool = True):
+        await self._send({"type": "error", "detail": detail}, notify)
+
+    def _queue_edit(self, message: Dict[str, Any]) -> Optional[str]:
+        """Validate an edit message and add it to the pending batch. Returns an error string if invalid."""
+        try:
+            criteria_id = message.get("criteria_id")
+            criteria_id = None if criteria_id is None else int(criteria_id)
+            row, column, value = int(message["row"]), int(message["column"]), float(message["value"])
+        except (KeyError, TypeError, ValueError):
+            return "Edit requires row, column and value"
+        if not math.isfinite(value) or value <= 0:
+            return "Judgment value must be a positive number"
+        if row == column:
+            return "Diagonal judgments are fixed at 1"
+
+        # a_ij = v and a_ji = 1/v are the same judgment
+        if row > column:
+            row, column, value = column, row, 1.0 / value
+        self.pending[(criteria_id, row, column)] = value
+        self._edit_event.set()
+        return None
+
+    async def flush(self, notify: bool = True):
+        """Apply all pending edits and send one update per affected matrix."""
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, {}
+
+            touched = []
+            for (criteria_id, row, column), value in batch.items():
+                try:
+                    state = await self._get_state(criteria_id)
+                except HTTPException as e:
+                    await self._send_error(e.detail, notify)
+                    continue
+                if not (0 <= row < state.size and 0 <= column < state.size):
+                    await self._send_error("Judgment index out of range", notify)
+                    continue
+
+                cells = self.dirty.setdefault(criteria_id, {})
+                for row_id, col_id, cell_value in state.set_judgment(row, column, value):
+                    cells[(row_id, col_id)] = cell_value
+                if criteria_id not in touched:
+                    touched.append(criteria_id)
+
+            for criteria_id in touched:
+                await self._send(self._state_message("update", criteria_id, self.states[criteria_id]), notify)
+
+    @staticmethod
+    def _rebase(state: MatrixState, cells: Dict[Tuple[int, int], float]) -> MatrixState:
+        """Reapply the session's changed cells, matched by ID, on top of a freshly loaded matrix."""
+        index = {id_: i for i, id_ in enumerate(state.ids)}
+        for (row_id, col_id), value in cells.items():
+            if row_id in index and col_id in index and index[row_id] < index[col_id]:
+                state.set_judgment(index[row_id], index[col_id], value)
+        return state
+
+    async def commit(self, notify: bool = True) -> int:
+        """
+        Persist every changed matrix; returns the number of matrices written.
+        If the decision was written elsewhere since a matrix was loaded (a PATCH, another session
+        or another worker), the session's edits are rebased on the current matrix and retried.
+        """
+        await self.flush(notify)
+        async with self._flush_lock:
+            if not self.dirty:
+                return 0
+            dirty, self.dirty = self.dirty, {}
+            rebased = []
+
+            def persist(service: AHPService):
+                for criteria_id in list(dirty):
+                    cells = dirty[criteria_id]
+                    state = self.states[criteria_id]
+                    for _ in range(service.MAX_UPDATE_ATTEMPTS):
+                        changed_cells = [(row_id, col_id, value) for (row_id, col_id), value in cells.items()]
+                        loaded_version = state.version
+                        if service.save_matrix_state(self.decision_id, criteria_id, state, changed_cells) is not None:
+                            # Nobody else wrote in between, so other matrices loaded at that version stay current
+                            for other in self.states.values():
+                                if other.version == loaded_version:
+                                    other.version = state.version
+                            break
+                        fresh = service.copy_matrix_state(self.decision_id, criteria_id)
+                        state = self._rebase(fresh, cells)
+                        rebased.append(criteria_id)
+                    else:
+                        raise HTTPException(status_code=409, detail="Matrix was modified concurrently, please retry")
+
+                    self.states[criteria_id] = state
+                    matrix_state_cache.put((self.decision_id, criteria_id), state.copy())
+                    del dirty[criteria_id]
+
+            written = len(dirty)
+            try:
+                await run_in_threadpool(self._run_with_service, persist)
+            except Exception:
+                # Keep the unwritten edits so a later commit can retry them
+                for criteria_id, cells in dirty.items():
+                    self.dirty.setdefault(criteria_id, {}).update(cells)
+                matrix_state_cache.invalidate(self.decision_id)
+                raise
+
+        # Matrices merged with someone else's writes changed under the client; send them again
+        for criteria_id in dict.fromkeys(rebased):
+            await self._send(
+                self._state_message("state", criteria_id, self.states[criteria_id], include_matrix=True), notify
+            )
+        return written
+
+    async def _debounce_loop(self):
+        """Wait for a quiet period (or the max delay) after edits, then flush them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._edit_event.wait()
+            burst_start = loop.time()
+            while True:
+                self._edit_event.clear()
+                remaining = self.MAX_DELAY_SECONDS - (loop.time() - burst_start)
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._edit_event.wait(), timeout=min(self.DEBOUNCE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.flush()
+            except Exception:
+                # The client went away mid-send; edits are applied and persisted on session end
+                pass
+
+    async def _handle(self, message: Dict[str, Any]):
+        message_type = message.get("type")
+        if message_type == "edit":
+            error = self._queue_edit(message)
+            if error:
+                await self._send_error(error)
+        elif message_type == "load":
+            try:
+                criteria_id = message.get("criteria_id")
+                criteria_id = None if criteria_id is None else int(criteria_id)
+                state = await self._get_state(criteria_id)
+            except (TypeError, ValueError):
+                await self._send_error("criteria_id must be an integer or null")
+                return
+            except HTTPException as e:
+                await self._send_error(e.detail)
+                return
+            await self.websocket.send_json(self._state_message("state", criteria_id, state, include_matrix=True))
+        elif message_type == "commit":
+            try:
+                written = await self.commit()
+            except Exception as e:
+                await self._send_error(f"Error committing session: {str(e)}")
+                return
+            await self.websocket.send_json({"type": "committed", "matrices": written})
+        else:
+            await self._send_error(f"Unknown message type: {message_type}")
+
+    async def run(self):
+        """Serve the session until the client disconnects or it goes idle, then persist pending edits."""
+        await self.websocket.accept()
+        debouncer = asyncio.create_task(self._debounce_loop())
+        connected = True
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        self.websocket.receive_json(), timeout=self.IDLE_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    break
+                except (ValueError, KeyError):
+                    await self._send_error("Messages must be JSON objects")
+                    continue
+                if not isinstance(message, dict):
+                    await self._send_error("Messages must be JSON objects")
+                    continue
+                await self._handle(message)
+        except WebSocketDisconnect:
+            connected = False
+        except Exception:
+            # The socket may be unusable; persist silently, then let the error propagate
+            connected = False
+            raise
+        finally:
+            # Holding the flush lock guarantees the debouncer is not halfway through a batch
+            async with self._flush_lock:
+                debouncer.cancel()
+
+            # Idle timeout, disconnect or error: apply and persist whatever is left
+            try:
+                await self.commit(notify=connected)
+                if connected:
+                    await self.websocket.close()
+            except Exception:
+                pass
@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Hashable
+import numpy as np
+
+
+class MatrixState:
+    """
+    In-memory state of one pairwise comparison matrix (criteria matrix or one criterion's
+    alternative matrix). Keeps column sums and weights so a single judgment change can be
+    applied in O(n) instead of renormalizing the whole matrix.
+
+    Rows and columns follow the decision's display order. `version` is the decision's matrix
+    version the state was loaded at; it is used to detect writes from other processes.
+
+    `matrix` is a view into a larger buffer, so items can be appended or removed in place
+    without reallocating the whole matrix each time.
+    """
+
+    def __init__(self, ids: List[int], matrix: np.ndarray, version: Optional[int] = None):
+        self.ids = list(ids)
+        self.version = version
+        self._buffer = np.array(matrix, dtype=float)
+        self.matrix = self._buffer
+        self.column_sums = self.matrix.sum(axis=0)
+        self.weights = (self.matrix / self.column_sums).mean(axis=1)
+        self.lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "MatrixState":
+        """Return an independent copy (weights are recomputed from the copied matrix)."""
+        return MatrixState(self.ids, self.matrix, self.version)
+
+    def normalized_matrix(self) -> np.ndarray:
+        """Return the matrix divided by its column sums."""
+        return self.matrix / self.column_sums
+
+    def _set_cell(self, i: int, j: int, value: float):
+        """Set cell (i, j) and update column j's sum and its contribution to the weights."""
+        n = self.size
+        old_column = self.matrix[:, j] / self.column_sums[j]
+        self.matrix[i, j] = value
+        self.column_sums[j] = self.matrix[:, j].sum()
+        self.weights += (self.matrix[:, j] / self.column_sums[j] - old_column) / n
+
+    def add_item(self, id_: int, row: np.ndarray) -> List[Tuple[int, int, float]]:
+        """
+        Append an item judged against the existing ones: row[j] is a_new,j and a_j,new = 1/row[j].
+        Returns the new cells (new row, new column and diagonal) as (row_id, column_id, value) tuples.
+        """
+        row = np.asarray(row, dtype=float)
+        n = self.size
+        if len(self._buffer) <= n:
+            # Grow geometrically so repeated appends copy the matrix only O(log n) times
+            buffer = np.empty((max(2 * n, 4), max(2 * n, 4)))
+            buffer[:n, :n] = self.matrix
+            self._buffer = buffer
+        self._buffer[n, :n] = row
+        self._buffer[:n, n] = 1.0 / row
+        self._buffer[n, n] = 1.0
+        self.matrix = self._buffer[:n + 1, :n + 1]
+        self.ids.append(id_)
+
+        # Every column gains one cell; the new column's sum is computed once
+        self.column_sums = np.append(self.column_sums + row, 1.0 + (1.0 / row).sum())
+        # All columns are renormalized, so the weights need one full (vectorized) pass
+        self.weights = (self.matrix / self.column_sums).mean(axis=1)
+        column = self.matrix[:n, n]
+        return (
+            [(id_, self.ids[j], float(row[j])) for j in range(n)]
+            + [(self.ids[j], id_, float(column[j])) for j in range(n)]
+            + [(id_, id_, 1.0)]
+        )
+
+    def remove_item(self, index: int) -> int:
+        """Remove the item at index (its row and column) in place. Returns its ID."""
+        n = self.size
+        removed_row = self.matrix[index].copy()
+        self._buffer[index:n - 1, :n] = self._buffer[index + 1:n, :n]
+        self._buffer[:n - 1, index:n - 1] = self._buffer[:n - 1, index + 1:n]
+        self.matrix = self._buffer[:n - 1, :n - 1]
+        self.column_sums = np.delete(self.column_sums - removed_row, index)
+        self.weights = (self.matrix / self.column_sums).mean(axis=1)
+        return self.ids.pop(index)
+
+    def set_judgment(self, i: int, j: int, value: float) -> List[Tuple[int, int, float]]:
+        """
+        Set judgment a_ij = value and keep the reciprocal a_ji = 1/value in sync.
+        Returns the changed cells as (row_id, column_id, value) tuples.
+        """
+        self._set_cell(i, j, value)
+        self._set_cell(j, i, 1.0 / value)
+        # Column averages sum to 1 exactly; renormalizing stops rounding error from accumulating
+        self.weights /= self.weights.sum()
+        return [
+            (self.ids[i], self.ids[j], float(self.matrix[i, j])),
+            (self.ids[j], self.ids[i], float(self.matrix[j, i]))
+        ]
+
+
+class MatrixStateCache:
+    """Thread-safe LRU cache of MatrixState objects keyed by (decision_id, criteria_id)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, MatrixState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[MatrixState]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+            return state
+
+    def put(self, key: Hashable, state: MatrixState):
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable, state: MatrixState):
+        """Drop a cached entry, but only if it is still the given state object."""
+        with self._lock:
+            if self._entries.get(key) is state:
+                del self._entries[key]
+
+    def invalidate(self, decision_id: int):
+        """Drop every cached matrix belonging to a decision."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == decision_id]:
+                del self._entries[key]
+
+
+# Shared by all requests handled by this process
+matrix_state_cache = MatrixStateCache()
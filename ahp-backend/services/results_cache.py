@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import get_settings
+
+
+class ResultsCache:
+    """
+    Read-through cache of completed decisions' results (detail, criteria weights and final ranking).
+    Completed results do not change until the decision is reopened or edited, so reads can skip the
+    database entirely. Entries live in a per-process LRU capped at RESULTS_CACHE_SIZE.
+
+    With RESULTS_SNAPSHOT_DIR set, every entry is also written as a compact JSON snapshot shared by
+    all worker processes. Memory hits are checked against the snapshot file (one stat call), so an
+    invalidation in any process - including background job workers - is seen by every process.
+    Several workers without a snapshot directory could not see each other's invalidations, so the
+    cache is then bypassed and every read goes to the database.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, Tuple[Dict[str, Any], Optional[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; results read before a bump are never stored
+        self._generation = 0
+
+    @staticmethod
+    def _snapshot_path(decision_id: int) -> Optional[str]:
+        snapshot_dir = get_settings().results_snapshot_dir
+        return os.path.join(snapshot_dir, f"decision_{decision_id}.json") if snapshot_dir else None
+
+    @staticmethod
+    def enabled() -> bool:
+        """False when other worker processes could change results without this one noticing."""
+        settings = get_settings()
+        return settings.workers <= 1 or settings.results_snapshot_dir is not None
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def generation(self) -> int:
+        """Token to pass to put(); take it before reading the results from the database."""
+        return self._generation
+
+    def get(self, decision_id: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled():
+            return None
+        path = self._snapshot_path(decision_id)
+        mtime = self._mtime(path) if path else None
+        with self._lock:
+            entry = self._entries.get(decision_id)
+            if entry is not None and (path is None or entry[1] == mtime):
+                self._entries.move_to_end(decision_id)
+                return entry[0]
+            self._entries.pop(decision_id, None)
+            generation = self._generation
+        if mtime is None:
+            return None
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                results = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # Removed or replaced while reading
+            return None
+        self._store(decision_id, results, mtime, generation)
+        return results
+
+    def put(self, decision_id: int, results: Dict[str, Any], generation: int):
+        """Store results unless the cache was invalidated since generation was taken."""
+        if not self.enabled():
+            return
+        path = self._snapshot_path(decision_id)
+        mtime = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so other processes never read a partial snapshot
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(results, f, separators=(",", ":"))
+            with self._lock:
+                if generation != self._generation:
+                    os.remove(temp_path)
+                    return
+                os.replace(temp_path, path)
+            mtime = self._mtime(path)
+        self._store(decision_id, results, mtime, generation)
+
+    def _store(self, decision_id: int, results: Dict[str, Any], mtime: Optional[int], generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[decision_id] = (results, mtime)
+            self._entries.move_to_end(decision_id)
+            while len(self._entries) > get_settings().results_cache_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, decision_id: int):
+        """Drop a decision's results here and, when snapshots are enabled, in every process."""
+        path = self._snapshot_path(decision_id)
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(decision_id, None)
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """Drop every in-memory entry (snapshot files are kept)."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Shared by all requests handled by this process
+results_cache = ResultsCache()
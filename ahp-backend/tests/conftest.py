@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules the same way run.py does, from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import get_settings
+from repositories.sqlite_repository import SQLiteRepository
+
+
+@pytest.fixture(params=["cells", "blob"])
+def repository(request):
+    """Fresh in-memory SQLite repository with the schema applied, for each matrix storage layout."""
+    repo = SQLiteRepository(":memory:")
+    repo.matrix_storage = request.param
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def sqlite_path(tmp_path, monkeypatch):
+    """Point the app's repository factory at a fresh SQLite file."""
+    path = str(tmp_path / "ahp.db")
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", path)
+    # The test client serves everything from this one process
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    get_settings.cache_clear()
+    yield path
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def client(sqlite_path):
+    from fastapi.testclient import TestClient
+    from main import app
+    from services.matrix_state import matrix_state_cache
+    from services.results_cache import results_cache
+
+    with TestClient(app) as test_client:
+        yield test_client
+    matrix_state_cache._entries.clear()
+    results_cache.clear()
@@ -0,0 +1,40 @@
+"""Shared setup for the API and repository tests."""
+import numpy as np
+
+from models.schemas import PairwiseMatrixInput
+from services.ahp_service import AHPService
+
+MATRIX = [
+    [1, 3, 5, 2],
+    [1 / 3, 1, 2, 1 / 2],
+    [1 / 5, 1 / 2, 1, 1 / 3],
+    [1 / 2, 2, 3, 1],
+]
+
+
+def full_weights(matrix):
+    result = AHPService(None).compute_criteria_weights(
+        0, PairwiseMatrixInput(criteria_names=[str(i) for i in range(len(matrix))], matrix=matrix), save_to_db=False
+    )
+    return np.array(result.weights), result.consistency_check.cr
+
+
+def setup_decision(client, criteria=("A", "B", "C", "D"), post_order=None):
+    decision = client.post(
+        "/api/ahp/decision", json={"title": "T", "criteria": list(criteria), "alternatives": ["X", "Y", "Z"]}
+    ).json()
+    names = post_order or decision["criteria"]
+    client.post(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}",
+        json={"criteria_names": names, "matrix": MATRIX}
+    )
+    return decision
+
+
+def create_decision(repository, criteria=("A", "B", "C"), alternatives=("X", "Y")):
+    decision_id = repository.create_decision_problem("Trip", "desc")
+    criteria_ids = repository.save_criteria_to_db(list(criteria))
+    alternative_ids = repository.save_alternatives_to_db(list(alternatives))
+    repository.link_criteria_to_decision(decision_id, criteria_ids)
+    repository.link_alternatives_to_decision(decision_id, alternative_ids)
+    return decision_id, criteria_ids, alternative_ids
@@ -0,0 +1,152 @@
+import numpy as np
+
+from repositories import sqlite_repository
+from repositories.sqlite_repository import SQLiteRepository
+from services.matrix_state import MatrixState
+from helpers import full_weights, setup_decision
+
+ALTERNATIVE_MATRIX = [
+    [1, 2, 4],
+    [1 / 2, 1, 3],
+    [1 / 4, 1 / 3, 1],
+]
+NEW_ROW = [1 / 2, 2, 5]  # "W" against X, Y, Z
+
+
+def setup_alternative_matrices(client):
+    decision = setup_decision(client)
+    for criteria_id, criteria_name in zip(decision["criteria_ids"], decision["criteria"]):
+        client.post("/api/ahp/alternative-matrix", json={
+            "decision_id": decision["id"], "criteria_id": criteria_id, "criteria_name": criteria_name,
+            "alternatives": decision["alternatives"], "matrix": ALTERNATIVE_MATRIX
+        })
+    return decision
+
+
+def extended_matrix():
+    matrix = np.ones((4, 4))
+    matrix[:3, :3] = ALTERNATIVE_MATRIX
+    matrix[3, :3] = NEW_ROW
+    matrix[:3, 3] = 1 / np.array(NEW_ROW)
+    return matrix
+
+
+def test_matrix_state_add_and_remove_match_full_recompute():
+    rng = np.random.default_rng(2)
+    state = MatrixState([1, 2, 3], ALTERNATIVE_MATRIX)
+    matrix = np.array(ALTERNATIVE_MATRIX, dtype=float)
+    # Enough appends to grow the buffer several times
+    for id_ in range(4, 40):
+        row = rng.choice([1 / 3, 1 / 2, 1, 2, 3], size=state.size)
+        cells = state.add_item(id_, row)
+        assert len(cells) == 2 * len(row) + 1
+        matrix = np.block([[matrix, 1 / row[:, np.newaxis]], [row[np.newaxis, :], np.ones((1, 1))]])
+    np.testing.assert_allclose(state.matrix, matrix)
+    np.testing.assert_allclose(state.weights, full_weights(matrix.tolist())[0], atol=1e-15)
+
+    assert state.remove_item(5) == 6
+    matrix = np.delete(np.delete(matrix, 5, axis=0), 5, axis=1)
+    assert 6 not in state.ids and state.size == len(matrix)
+    np.testing.assert_allclose(state.matrix, matrix)
+    np.testing.assert_allclose(state.column_sums, matrix.sum(axis=0))
+    np.testing.assert_allclose(state.weights, full_weights(matrix.tolist())[0], atol=1e-15)
+
+
+def test_add_alternative_writes_only_new_cells(client, sqlite_path):
+    decision = setup_alternative_matrices(client)
+    statements = []
+    sqlite_repository.statement_listener = statements.append
+    try:
+        response = client.post(f"/api/ahp/decision/{decision['id']}/alternatives", json={
+            "name": "W",
+            "judgments": [{"criteria_id": c, "values": NEW_ROW} for c in decision["criteria_ids"]]
+        })
+    finally:
+        sqlite_repository.statement_listener = None
+    assert response.status_code == 200
+    result = response.json()
+    assert result["decision"]["alternatives"] == ["X", "Y", "Z", "W"]
+
+    # 4 criteria x (3 new row cells + 3 new column cells + diagonal); the old 3x3 cells are untouched
+    assert sum("INTO alternative_comparisons" in s for s in statements) == 4 * 7
+
+    weights, cr = full_weights(extended_matrix().tolist())
+    for criterion in result["alternative_weights"]:
+        np.testing.assert_allclose(criterion["weights"], weights)
+        assert abs(criterion["consistency_check"]["cr"] - cr) < 1e-12
+
+    repository = SQLiteRepository(sqlite_path)
+    ids, stored = repository.get_alternative_comparison_matrix(decision["id"], decision["criteria_ids"][0])
+    repository.close()
+    assert ids == result["decision"]["alternative_ids"]
+    np.testing.assert_allclose(stored, extended_matrix())
+
+    # All criteria share the same local weights, so the final scores equal them
+    ranking = {r["alternative"]: r["weight"] for r in result["ranking"]}
+    np.testing.assert_allclose([ranking[name] for name in ["X", "Y", "Z", "W"]], weights)
+
+
+def test_remove_alternative_shrinks_matrices_and_reranks(client, sqlite_path):
+    decision = setup_alternative_matrices(client)
+    removed = decision["alternative_ids"][1]
+    response = client.delete(f"/api/ahp/decision/{decision['id']}/alternatives/{removed}")
+    assert response.status_code == 200
+    result = response.json()
+    assert result["decision"]["alternatives"] == ["X", "Z"]
+
+    matrix = np.array(ALTERNATIVE_MATRIX)[np.ix_([0, 2], [0, 2])]
+    weights, _ = full_weights(matrix.tolist())
+    assert [r["alternative"] for r in result["ranking"]] == ["X", "Z"]
+    np.testing.assert_allclose([r["weight"] for r in result["ranking"]], weights)
+
+    repository = SQLiteRepository(sqlite_path)
+    assert removed not in {s["id"] for s in repository.get_alternative_scores(decision["id"], True)}
+    repository.close()
+
+    # The cached states follow the change: a later edit works on the 2x2 matrix
+    patch = client.patch("/api/ahp/alternative-matrix", json={
+        "decision_id": decision["id"], "criteria_id": decision["criteria_ids"][0], "row": 0, "column": 1, "value": 3
+    })
+    assert patch.json()["original_matrix"] == [[1, 3], [1 / 3, 1]]
+
+
+def test_alternative_changes_are_validated(client):
+    decision = setup_alternative_matrices(client)
+    url = f"/api/ahp/decision/{decision['id']}/alternatives"
+    rows = [{"criteria_id": c, "values": NEW_ROW} for c in decision["criteria_ids"]]
+
+    assert client.post(url, json={"name": "X", "judgments": rows}).status_code == 400
+    assert client.post(url, json={"name": "W", "judgments": rows[1:]}).status_code == 400
+    assert client.post(url, json={"name": "W", "judgments": rows + rows[:1]}).status_code == 400
+    short = [{"criteria_id": c, "values": NEW_ROW[:2]} for c in decision["criteria_ids"]]
+    assert client.post(url, json={"name": "W", "judgments": short}).status_code == 400
+    assert client.delete(f"{url}/{10 ** 6}").status_code == 404
+    assert client.get(f"/api/ahp/decision/{decision['id']}").json()["alternatives"] == ["X", "Y", "Z"]
+
+
+def test_add_alternative_without_matrices_only_links_it(client):
+    decision = setup_decision(client)
+    response = client.post(f"/api/ahp/decision/{decision['id']}/alternatives", json={"name": "W"})
+    assert response.json()["decision"]["alternatives"] == ["X", "Y", "Z", "W"]
+    assert response.json()["ranking"] == []
+
+
+def test_repository_removes_alternative_from_every_matrix(repository):
+    decision_id = repository.create_decision_problem("T")
+    criteria_ids = repository.save_criteria_to_db(["A", "B"])
+    alternative_ids = repository.save_alternatives_to_db(["X", "Y", "Z"])
+    repository.link_criteria_to_decision(decision_id, criteria_ids)
+    repository.link_alternatives_to_decision(decision_id, alternative_ids[:2])
+    repository.append_alternative_to_decision(decision_id, alternative_ids[2])
+    for criteria_id in criteria_ids:
+        repository.save_alternative_comparison_matrix(decision_id, criteria_id, alternative_ids, ALTERNATIVE_MATRIX)
+
+    with repository.transaction():
+        repository.remove_alternative_from_decision(decision_id, alternative_ids[0])
+
+    decision = repository.get_decision_problem(decision_id)
+    assert [a["name"] for a in decision["alternatives"]] == ["Y", "Z"]
+    for criteria_id in criteria_ids:
+        ids, matrix = repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+        assert ids == alternative_ids[1:]
+        np.testing.assert_allclose(matrix, np.array(ALTERNATIVE_MATRIX)[1:, 1:])
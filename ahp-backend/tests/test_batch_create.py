@@ -0,0 +1,88 @@
+from repositories import sqlite_repository
+from repositories.sqlite_repository import SQLiteRepository
+
+BATCH = {"decisions": [
+    {"title": "Trip", "criteria": ["Cost", "Safety"], "alternatives": ["Hue", "Da Nang", "Hoi An"]},
+    {"title": "Laptop", "description": "Work machine", "criteria": ["Cost", "Weight", "Battery"],
+     "alternatives": ["A", "B"]},
+    {"title": "Trip 2", "criteria": ["Safety", "Cost"], "alternatives": ["Hoi An", "Hue"]},
+]}
+
+
+def count_decisions(sqlite_path):
+    repository = SQLiteRepository(sqlite_path)
+    repository.cursor.execute("SELECT COUNT(*) FROM decision_problems")
+    count = repository.cursor.fetchone()[0]
+    repository.close()
+    return count
+
+
+def test_batch_create_commits_once(client):
+    statements = []
+    sqlite_repository.statement_listener = statements.append
+    try:
+        response = client.post("/api/ahp/decisions/batch", json=BATCH)
+    finally:
+        sqlite_repository.statement_listener = None
+    assert response.status_code == 200
+    created = response.json()
+    assert [d["title"] for d in created] == ["Trip", "Laptop", "Trip 2"]
+    assert sum(s.startswith("COMMIT") for s in statements) == 1
+
+    for decision in created:
+        assert client.get(f"/api/ahp/decision/{decision['id']}").json() == decision
+    # Names are shared lookups: "Cost" has one ID in every decision
+    assert created[0]["criteria_ids"][0] == created[1]["criteria_ids"][0] == created[2]["criteria_ids"][1]
+    assert created[0]["alternative_ids"][::2] == created[2]["alternative_ids"][::-1]
+
+
+def test_idempotency_key_replays_the_first_response(client, sqlite_path):
+    headers = {"Idempotency-Key": "batch-1"}
+    first = client.post("/api/ahp/decisions/batch", json=BATCH, headers=headers).json()
+    retry = client.post("/api/ahp/decisions/batch", json=BATCH, headers=headers).json()
+    assert retry == first
+    assert count_decisions(sqlite_path) == 3
+
+    other = {"decisions": BATCH["decisions"][:1]}
+    assert client.post("/api/ahp/decisions/batch", json=other, headers=headers).status_code == 422
+    # Without a key every request creates new decisions
+    client.post("/api/ahp/decisions/batch", json=BATCH)
+    assert count_decisions(sqlite_path) == 6
+
+
+def test_concurrent_duplicate_key_rolls_back_and_replays(client, sqlite_path, monkeypatch):
+    first = client.post("/api/ahp/decisions/batch", json=BATCH, headers={"Idempotency-Key": "batch-2"}).json()
+
+    # A second request raced past the lookup before the first one committed
+    lookups = []
+    original = SQLiteRepository.get_idempotency_record
+
+    def late_lookup(self, key):
+        lookups.append(key)
+        return None if len(lookups) == 1 else original(self, key)
+
+    monkeypatch.setattr(SQLiteRepository, "get_idempotency_record", late_lookup)
+    retry = client.post("/api/ahp/decisions/batch", json=BATCH, headers={"Idempotency-Key": "batch-2"})
+    assert retry.status_code == 200
+    assert retry.json() == first
+    # The racing request's decisions were rolled back with the failed key insert
+    assert count_decisions(sqlite_path) == 3
+
+
+def test_batch_is_validated(client, sqlite_path):
+    assert client.post("/api/ahp/decisions/batch", json={"decisions": []}).status_code == 400
+    duplicate = {"decisions": [{"title": "T", "criteria": ["A", "A"], "alternatives": ["X", "Y"]}]}
+    assert client.post("/api/ahp/decisions/batch", json=duplicate).status_code == 400
+    assert count_decisions(sqlite_path) == 0
+
+
+def test_repository_batch_matches_single_creates(repository):
+    created = repository.create_decision_problems([
+        (d["title"], d.get("description"), d["criteria"], d["alternatives"]) for d in BATCH["decisions"]
+    ])
+    for (decision_id, criteria_ids, alternative_ids), d in zip(created, BATCH["decisions"]):
+        stored = repository.get_decision_problem(decision_id)
+        assert [c["name"] for c in stored["criteria"]] == d["criteria"]
+        assert [c["id"] for c in stored["criteria"]] == criteria_ids
+        assert [a["id"] for a in stored["alternatives"]] == alternative_ids
+    assert repository.save_criteria_to_db(["Battery"]) == [created[1][1][2]]
@@ -0,0 +1,21 @@
+from config import Settings, get_settings
+from repositories.factory import create_repository
+from repositories.sqlite_repository import SQLiteRepository
+
+
+def test_settings_are_read_from_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("MAX_REQUESTS", "1000")
+    monkeypatch.setenv("DB_BACKEND", "SQLite")
+    settings = Settings.from_env()
+    assert (settings.workers, settings.max_requests, settings.db_backend) == (3, 1000, "sqlite")
+
+
+def test_settings_are_loaded_once(sqlite_path):
+    assert get_settings() is get_settings()
+    repository = create_repository()
+    try:
+        assert isinstance(repository, SQLiteRepository)
+        assert repository.path == sqlite_path
+    finally:
+        repository.close()
@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from services.ahp_service import AHPService
+
+
+def random_matrix(n, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = np.ones((n, n))
+    rows, cols = np.triu_indices(n, 1)
+    values = rng.choice(AHPService.SAATY_SCALE, len(rows))
+    matrix[rows, cols] = values
+    matrix[cols, rows] = 1 / values
+    return matrix
+
+
+def brute_force_cr(service, matrix, i, j, value):
+    edited = matrix.copy()
+    edited[i, j], edited[j, i] = value, 1 / value
+    norm_matrix, _ = service.normalize_matrix(edited)
+    return service.check_consistency(edited, service.compute_weights(norm_matrix))["cr"]
+
+
+def test_batched_cr_matches_brute_force():
+    service = AHPService(None)
+    matrix = random_matrix(8)
+    rows, cols = np.triu_indices(8, 1)
+    rows = np.repeat(rows, len(service.SAATY_SCALE))
+    cols = np.repeat(cols, len(service.SAATY_SCALE))
+    values = np.tile(service.SAATY_SCALE, len(rows) // len(service.SAATY_SCALE))
+
+    batched = service.evaluate_single_edits(matrix, rows, cols, values)
+    for c in range(0, len(rows), 7):
+        assert abs(batched[c] - brute_force_cr(service, matrix, rows[c], cols[c], values[c])) < 1e-12
+
+
+def test_suggestions_lower_cr_and_are_ranked_by_error():
+    service = AHPService(None)
+    matrix = random_matrix(6, seed=3)
+    result = service.suggest_consistency_improvements(matrix.tolist(), top_k=5)
+    assert not result.is_consistent
+    assert result.suggestions
+    errors = [s.error for s in result.suggestions]
+    assert errors == sorted(errors, reverse=True)
+    for suggestion in result.suggestions:
+        assert suggestion.resulting_cr < result.cr
+        expected = brute_force_cr(service, matrix, suggestion.row, suggestion.column, suggestion.suggested_value)
+        assert abs(suggestion.resulting_cr - expected) < 1e-12
+
+
+def test_no_suggestions_when_nothing_improves():
+    service = AHPService(None)
+    assert service.suggest_consistency_improvements([[1, 2], [0.5, 1]]).suggestions == []
+
+    consistent = np.outer([4, 2, 1], [1 / 4, 1 / 2, 1])
+    assert service.suggest_consistency_improvements(consistent.tolist()).suggestions == []
+
+
+def test_ties_prefer_value_closest_to_ideal_ratio():
+    service = AHPService(None)
+    # For n = 3 several edits can reach CR = 0; the chosen one must match w_i / w_j
+    matrix = [[1, 2, 4], [1 / 2, 1, 8], [1 / 4, 1 / 8, 1]]
+    result = service.suggest_consistency_improvements(matrix, top_k=3)
+    for suggestion in result.suggestions:
+        candidates = {
+            v: brute_force_cr(service, np.array(matrix, dtype=float), suggestion.row, suggestion.column, v)
+            for v in service.SAATY_SCALE
+        }
+        best = min(candidates.values())
+        tied = [v for v, cr in candidates.items() if cr <= best + 1e-12]
+        closest = min(tied, key=lambda v: abs(np.log(v) - np.log(suggestion.ideal_value)))
+        assert suggestion.suggested_value == closest
+
+
+def test_fifty_by_fifty_is_interactive():
+    service = AHPService(None)
+    matrix = random_matrix(50).tolist()
+    service.suggest_consistency_improvements(matrix)
+    start = time.perf_counter()
+    service.suggest_consistency_improvements(matrix)
+    assert time.perf_counter() - start < 0.1
+
+
+def test_invalid_matrices_are_rejected():
+    service = AHPService(None)
+    invalid = [
+        [[1, 0], [0, 1]],
+        [[1, -2], [-0.5, 1]],
+        [[1, float("nan")], [float("nan"), 1]],
+        [[1, 2, 3], [0.5, 1]],
+        [[1, 2], [2, 1]],
+        [],
+    ]
+    for matrix in invalid:
+        with pytest.raises(HTTPException) as error:
+            service.suggest_consistency_improvements(matrix)
+        assert error.value.status_code == 400
+    # Rounded reciprocals are accepted
+    assert service.suggest_consistency_improvements([[1, 3], [0.33, 1]]).suggestions == []
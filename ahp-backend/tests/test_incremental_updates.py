@@ -0,0 +1,104 @@
+import numpy as np
+
+from repositories.sqlite_repository import SQLiteRepository
+from services.ahp_service import AHPService
+from services.matrix_state import MatrixState
+
+from helpers import MATRIX, full_weights, setup_decision
+
+
+def test_matrix_state_matches_full_recompute_after_many_edits():
+    rng = np.random.default_rng(1)
+    state = MatrixState([1, 2, 3, 4], MATRIX)
+    matrix = np.array(MATRIX, dtype=float)
+    for _ in range(500):
+        i, j = rng.choice(4, size=2, replace=False)
+        value = rng.choice(AHPService.SAATY_SCALE)
+        state.set_judgment(i, j, value)
+        matrix[i, j], matrix[j, i] = value, 1 / value
+
+    weights, _ = full_weights(matrix.tolist())
+    np.testing.assert_allclose(state.weights, weights, rtol=0, atol=1e-13)
+    np.testing.assert_allclose(state.column_sums, matrix.sum(axis=0))
+    assert abs(state.weights.sum() - 1) < 1e-15
+
+
+def test_patch_matches_full_recompute(client):
+    decision = setup_decision(client)
+    response = client.patch(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 0, "column": 2, "value": 7}
+    )
+    assert response.status_code == 200
+
+    matrix = np.array(MATRIX, dtype=float)
+    matrix[0, 2], matrix[2, 0] = 7, 1 / 7
+    weights, cr = full_weights(matrix.tolist())
+    np.testing.assert_allclose(response.json()["weights"], weights)
+    assert abs(response.json()["consistency_check"]["cr"] - cr) < 1e-12
+
+    stored = client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]
+    np.testing.assert_allclose([c["weight"] for c in stored], weights)
+
+
+def test_patch_indexes_follow_display_order(client):
+    # The matrix is posted in reverse name order, so row 0 of MATRIX belongs to "D"
+    decision = setup_decision(client, post_order=["D", "C", "B", "A"])
+    response = client.patch(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 0, "column": 1, "value": 4}
+    )
+    matrix = np.array(MATRIX, dtype=float)[::-1, ::-1].copy()
+    matrix[0, 1], matrix[1, 0] = 4, 1 / 4
+    np.testing.assert_allclose(response.json()["original_matrix"], matrix)
+
+
+def test_patch_reloads_after_write_from_another_process(client, sqlite_path):
+    decision = setup_decision(client)
+    client.patch(f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 0, "column": 1, "value": 2})
+
+    # Another worker rewrites the whole matrix behind this process's cache
+    other = SQLiteRepository(sqlite_path)
+    other.save_criteria_comparison_matrix(decision["id"], decision["criteria_ids"], np.ones((4, 4)).tolist())
+    other.close()
+
+    response = client.patch(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 0, "column": 3, "value": 3}
+    )
+    matrix = np.ones((4, 4))
+    matrix[0, 3], matrix[3, 0] = 3, 1 / 3
+    np.testing.assert_allclose(response.json()["original_matrix"], matrix)
+    np.testing.assert_allclose(response.json()["weights"], full_weights(matrix.tolist())[0])
+
+
+def test_stale_version_is_rejected_without_writing(repository):
+    decision_id = repository.create_decision_problem("T")
+    ids = repository.save_criteria_to_db(["A", "B"])
+    repository.link_criteria_to_decision(decision_id, ids)
+    repository.save_criteria_comparison_matrix(decision_id, ids, [[1, 2], [0.5, 1]])
+    version = repository.get_matrix_version(decision_id)
+
+    assert repository.save_matrix_update(
+        decision_id, None, version - 1, [(ids[0], ids[1], 9.0)], ids, [0.9, 0.1], 2, 0, 0, True
+    ) is None
+    assert repository.get_criteria_comparison_matrix(decision_id)[1][0, 1] == 2
+    assert repository.save_matrix_update(
+        decision_id, None, version, [(ids[0], ids[1], 9.0)], ids, [0.9, 0.1], 2, 0, 0, True
+    ) == version + 1
+    assert repository.get_matrix_version(decision_id) == version + 1
+
+
+def test_patch_rejects_invalid_judgments(client):
+    decision = setup_decision(client)
+    url = f"/api/ahp/criteria-matrix?decision_id={decision['id']}"
+    assert client.patch(url, json={"row": 1, "column": 1, "value": 1}).status_code == 400
+    assert client.patch(url, json={"row": 0, "column": 9, "value": 1}).status_code == 400
+    assert client.patch(url, json={"row": -1, "column": 2, "value": 1}).status_code == 400
+    assert client.patch(url, json={"row": 0, "column": 1, "value": 0}).status_code == 400
+
+
+def test_patch_without_stored_matrix_is_404(client):
+    decision = setup_decision(client)
+    response = client.patch(
+        "/api/ahp/alternative-matrix",
+        json={"decision_id": decision["id"], "criteria_id": decision["criteria_ids"][0], "row": 0, "column": 1, "value": 2}
+    )
+    assert response.status_code == 404
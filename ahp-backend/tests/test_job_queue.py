@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+
+from services.ahp_service import AHPService
+
+from helpers import MATRIX, full_weights, setup_decision
+
+
+def wait_for(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/ahp/jobs/{job_id}").json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def random_matrices(count, n, seed=0):
+    rng = np.random.default_rng(seed)
+    matrices = []
+    for _ in range(count):
+        matrix = np.ones((n, n))
+        rows, cols = np.triu_indices(n, 1)
+        values = rng.choice(AHPService.SAATY_SCALE, len(rows))
+        matrix[rows, cols], matrix[cols, rows] = values, 1 / values
+        matrices.append(matrix.tolist())
+    return matrices
+
+
+def test_weights_job_runs_in_chunks_and_returns_results(client):
+    matrices = random_matrices(40, 6)
+    response = client.post("/api/ahp/jobs", json={"kind": "weights", "matrices": matrices})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    status = wait_for(client, job_id)
+    assert (status["status"], status["progress"]) == ("completed", 1.0)
+    result = client.get(f"/api/ahp/jobs/{job_id}/result").json()["result"]
+    assert len(result) == 40
+    for matrix, item in zip(matrices, result):
+        weights, cr = full_weights(matrix)
+        np.testing.assert_allclose(item["weights"], weights)
+        assert abs(item["cr"] - cr) < 1e-12
+
+
+def test_recompute_job_restores_stored_weights(client, sqlite_path):
+    decision = setup_decision(client)
+    from repositories.sqlite_repository import SQLiteRepository
+    repository = SQLiteRepository(sqlite_path)
+    repository.save_criteria_weights(decision["id"], decision["criteria_ids"], [0.25] * 4)
+    repository.close()
+
+    job_id = client.post("/api/ahp/jobs", json={"kind": "recompute", "decision_id": decision["id"]}).json()["id"]
+    assert wait_for(client, job_id)["status"] == "completed"
+
+    stored = client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]
+    np.testing.assert_allclose([c["weight"] for c in stored], full_weights(MATRIX)[0])
+
+
+def test_failed_job_reports_error(client):
+    decision = client.post(
+        "/api/ahp/decision", json={"title": "T", "criteria": ["A", "B"], "alternatives": ["X", "Y"]}
+    ).json()
+    job_id = client.post("/api/ahp/jobs", json={"kind": "recompute", "decision_id": decision["id"]}).json()["id"]
+    status = wait_for(client, job_id)
+    assert status["status"] == "failed"
+    assert "No complete criteria matrix" in status["error"]
+    assert client.get(f"/api/ahp/jobs/{job_id}/result").status_code == 409
+
+
+def test_full_queue_sheds_load_with_retry_after(client):
+    queue = client.app.state.job_queue
+    queue._pending = queue.max_pending
+    try:
+        response = client.post("/api/ahp/jobs", json={"kind": "weights", "matrices": [MATRIX]})
+    finally:
+        queue._pending = 0
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_invalid_jobs_are_rejected(client):
+    assert client.post("/api/ahp/jobs", json={"kind": "weights", "matrices": [[[1, 2]]]}).status_code == 400
+    assert client.post("/api/ahp/jobs", json={"kind": "weights", "matrices": [[]]}).status_code == 400
+    assert client.post("/api/ahp/jobs", json={"kind": "bogus"}).status_code == 400
+    assert client.post("/api/ahp/jobs", json={"kind": "recompute", "decision_id": 999}).status_code == 404
+    assert client.get("/api/ahp/jobs/0123456789abcdef0123456789abcdef").status_code == 404
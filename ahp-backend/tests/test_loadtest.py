@@ -0,0 +1,31 @@
+import asyncio
+
+import numpy as np
+
+from loadtest import random_matrix, run_in_process
+from services.matrix_state import matrix_state_cache
+from services.results_cache import results_cache
+
+
+def test_random_matrix_is_reciprocal():
+    matrix = np.array(random_matrix(np.random.default_rng(0), 6))
+    np.testing.assert_allclose(matrix * matrix.T, np.ones((6, 6)))
+    assert np.isin(np.round(matrix[matrix >= 1], 9), np.arange(1, 10)).all()
+
+
+def test_in_process_run_reports_percentiles_and_statements(sqlite_path):
+    try:
+        report = asyncio.run(run_in_process(users=2, criteria=3, alternatives=4, flows=6))
+    finally:
+        matrix_state_cache._entries.clear()
+        results_cache.clear()
+
+    assert (report["flows"], report["failed_flows"]) == (6, 0)
+    alternative_matrix = report["endpoints"]["POST /api/ahp/alternative-matrix"]
+    assert alternative_matrix["requests"] == 18
+    for stats in report["endpoints"].values():
+        assert stats["errors"] == 0
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+    # Every flow does the same work, so it runs the same statements
+    statements = report["db_statements_per_flow"]
+    assert statements["min"] == statements["max"] > 0
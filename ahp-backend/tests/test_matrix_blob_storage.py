@@ -0,0 +1,108 @@
+import numpy as np
+
+from config import get_settings
+from databases.migrate_matrix_storage import migrate
+from repositories.sqlite_repository import SQLiteRepository
+
+from helpers import MATRIX, create_decision, full_weights, setup_decision
+
+
+def blob_repository(dtype="float64"):
+    repository = SQLiteRepository(":memory:")
+    repository.matrix_storage = "blob"
+    repository.matrix_dtype = dtype
+    return repository
+
+
+def test_float64_round_trip_is_exact_and_zero_copy():
+    repository = blob_repository()
+    decision_id, criteria_ids, _ = create_decision(repository, criteria=("A", "B", "C", "D"))
+    repository.save_criteria_comparison_matrix(decision_id, criteria_ids, MATRIX)
+
+    ids, matrix = repository.get_criteria_comparison_matrix(decision_id)
+    assert ids == criteria_ids
+    assert np.array_equal(matrix, np.array(MATRIX))
+    # A view over the fetched bytes, not a copy
+    assert not matrix.flags.owndata and not matrix.flags.writeable
+
+    rows = repository.conn.execute("SELECT COUNT(*), LENGTH(matrix) FROM criteria_matrices").fetchone()
+    assert rows == (1, 16 * 8)
+    repository.close()
+
+
+def test_float32_storage_halves_the_blob():
+    repository = blob_repository("float32")
+    decision_id, criteria_ids, _ = create_decision(repository, criteria=("A", "B", "C", "D"))
+    repository.save_criteria_comparison_matrix(decision_id, criteria_ids, MATRIX)
+
+    _, matrix = repository.get_criteria_comparison_matrix(decision_id)
+    assert matrix.dtype == np.float64
+    np.testing.assert_allclose(matrix, MATRIX, rtol=1e-7)
+    assert repository.conn.execute("SELECT LENGTH(matrix), dtype FROM criteria_matrices").fetchone() == (64, "f4")
+    repository.close()
+
+
+def test_blob_matrix_follows_display_order_and_grows_with_cells():
+    repository = blob_repository()
+    decision_id, criteria_ids, alternative_ids = create_decision(repository, alternatives=("X", "Y", "Z"))
+    criteria_id = criteria_ids[0]
+    reversed_ids = alternative_ids[::-1]
+    matrix = np.array([[1, 2, 4], [1 / 2, 1, 3], [1 / 4, 1 / 3, 1]])
+    repository.save_alternative_comparison_matrix(decision_id, criteria_id, reversed_ids[:2], matrix[:2, :2])
+
+    ids, stored = repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+    assert ids == alternative_ids[1:]
+    np.testing.assert_allclose(stored, matrix[:2, :2][::-1, ::-1])
+
+    # A third alternative added cell by cell reads as None until its row is complete
+    new_id = reversed_ids[2]
+    cells = [(new_id, new_id, 1.0), (reversed_ids[0], new_id, 4.0), (new_id, reversed_ids[0], 0.25)]
+    repository.save_alternative_comparison_cells(decision_id, criteria_id, cells)
+    assert repository.get_alternative_comparison_matrix(decision_id, criteria_id) is None
+    repository.save_alternative_comparison_cells(
+        decision_id, criteria_id, [(reversed_ids[1], new_id, 3.0), (new_id, reversed_ids[1], 1 / 3)]
+    )
+    ids, stored = repository.get_alternative_comparison_matrix(decision_id, criteria_id)
+    assert ids == alternative_ids
+    np.testing.assert_allclose(stored, matrix[::-1, ::-1])
+    repository.close()
+
+
+def test_compatibility_view_matches_cell_rows_and_migration_copies_them():
+    repository = SQLiteRepository(":memory:")
+    decision_id, criteria_ids, alternative_ids = create_decision(repository, criteria=("A", "B", "C", "D"))
+    repository.save_criteria_comparison_matrix(decision_id, criteria_ids, MATRIX)
+    alt_matrix = [[1, 5], [1 / 5, 1]]
+    repository.save_alternative_comparison_matrix(decision_id, criteria_ids[1], alternative_ids, alt_matrix)
+
+    assert migrate(repository) == 2
+    repository.matrix_storage = "blob"
+    assert np.array_equal(repository.get_criteria_comparison_matrix(decision_id)[1], np.array(MATRIX))
+    assert np.array_equal(repository.get_alternative_comparison_matrix(decision_id, criteria_ids[1])[1],
+                          np.array(alt_matrix))
+
+    def rows(query):
+        return sorted(repository.conn.execute(query).fetchall())
+    assert rows("SELECT decision_id, row_criteria_id, column_criteria_id, value FROM criteria_comparisons") == \
+        rows("SELECT * FROM v_criteria_comparisons")
+    assert rows("SELECT decision_id, criteria_id, row_alternative_id, column_alternative_id, value "
+                "FROM alternative_comparisons") == rows("SELECT * FROM v_alternative_comparisons")
+    repository.close()
+
+
+def test_patch_flow_with_blob_storage(client, sqlite_path, monkeypatch):
+    monkeypatch.setenv("MATRIX_STORAGE", "blob")
+    get_settings.cache_clear()
+    decision = setup_decision(client)
+    response = client.patch(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 1, "column": 3, "value": 5}
+    )
+    matrix = np.array(MATRIX, dtype=float)
+    matrix[1, 3], matrix[3, 1] = 5, 1 / 5
+    np.testing.assert_allclose(response.json()["original_matrix"], matrix)
+    np.testing.assert_allclose(response.json()["weights"], full_weights(matrix.tolist())[0])
+
+    repository = SQLiteRepository(sqlite_path)
+    assert repository.conn.execute("SELECT COUNT(*) FROM criteria_comparisons").fetchone() == (0,)
+    assert repository.conn.execute("SELECT COUNT(*) FROM criteria_matrices").fetchone() == (1,)
+    repository.close()
@@ -0,0 +1,120 @@
+import threading
+
+import numpy as np
+import pytest
+
+from repositories.sqlite_repository import SQLiteRepository
+from services.ahp_service import AHPService
+from services.matrix_session import MatrixSession
+from services.matrix_state import matrix_state_cache
+
+from helpers import MATRIX, full_weights, setup_decision
+
+
+def session_url(decision):
+    return f"/api/ahp/decision/{decision['id']}/session"
+
+
+def stored_matrix(sqlite_path, decision_id):
+    repository = SQLiteRepository(sqlite_path)
+    try:
+        return repository.get_criteria_comparison_matrix(decision_id)[1]
+    finally:
+        repository.close()
+
+
+def test_edits_stream_updates_and_commit_persists(client, sqlite_path):
+    decision = setup_decision(client)
+    with client.websocket_connect(session_url(decision)) as ws:
+        ws.send_json({"type": "load", "criteria_id": None})
+        assert ws.receive_json()["type"] == "state"
+        ws.send_json({"type": "edit", "criteria_id": None, "row": 0, "column": 2, "value": 7})
+        update = ws.receive_json()
+        ws.send_json({"type": "commit"})
+        assert ws.receive_json() == {"type": "committed", "matrices": 1}
+
+    matrix = np.array(MATRIX, dtype=float)
+    matrix[0, 2], matrix[2, 0] = 7, 1 / 7
+    np.testing.assert_allclose(update["weights"], full_weights(matrix.tolist())[0])
+    np.testing.assert_allclose(stored_matrix(sqlite_path, decision["id"]), matrix)
+
+
+def test_invalid_edits_are_rejected(client):
+    decision = setup_decision(client)
+    with client.websocket_connect(session_url(decision)) as ws:
+        ws.send_text('{"type": "edit", "criteria_id": null, "row": 0, "column": 1, "value": NaN}')
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "edit", "criteria_id": None, "row": 0, "column": 1, "value": 1e400})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "edit", "criteria_id": None, "row": -1, "column": 2, "value": 3})
+        assert ws.receive_json() == {"type": "error", "detail": "Judgment index out of range"}
+        ws.send_json({"type": "commit"})
+        assert ws.receive_json() == {"type": "committed", "matrices": 0}
+
+
+def test_commit_rebases_on_concurrent_patch(client, sqlite_path):
+    decision = setup_decision(client)
+    with client.websocket_connect(session_url(decision)) as ws:
+        ws.send_json({"type": "load", "criteria_id": None})
+        ws.receive_json()
+        ws.send_json({"type": "edit", "criteria_id": None, "row": 0, "column": 1, "value": 5})
+        ws.receive_json()
+
+        # A PATCH lands while the session holds its own copy of the matrix
+        response = client.patch(
+            f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 2, "column": 3, "value": 4}
+        )
+        assert response.status_code == 200
+
+        ws.send_json({"type": "commit"})
+        rebased = ws.receive_json()
+        assert rebased["type"] == "state"
+        assert ws.receive_json() == {"type": "committed", "matrices": 1}
+
+    matrix = np.array(MATRIX, dtype=float)
+    matrix[0, 1], matrix[1, 0] = 5, 1 / 5
+    matrix[2, 3], matrix[3, 2] = 4, 1 / 4
+    np.testing.assert_allclose(rebased["matrix"], matrix)
+    np.testing.assert_allclose(stored_matrix(sqlite_path, decision["id"]), matrix)
+
+    stored = client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]
+    np.testing.assert_allclose([c["weight"] for c in stored], full_weights(matrix.tolist())[0])
+
+
+def test_pending_edits_persist_when_handler_fails(client, sqlite_path, monkeypatch):
+    original_handle = MatrixSession._handle
+
+    async def failing_handle(self, message):
+        if message.get("type") == "fail":
+            raise RuntimeError("boom")
+        await original_handle(self, message)
+
+    monkeypatch.setattr(MatrixSession, "_handle", failing_handle)
+    decision = setup_decision(client)
+    with pytest.raises(RuntimeError):
+        with client.websocket_connect(session_url(decision)) as ws:
+            ws.send_json({"type": "edit", "criteria_id": None, "row": 1, "column": 3, "value": 9})
+            ws.send_json({"type": "fail"})
+            ws.receive_json()
+
+    assert stored_matrix(sqlite_path, decision["id"])[1, 3] == 9
+
+
+def test_session_copy_waits_for_in_flight_edit(client, sqlite_path):
+    decision = setup_decision(client)
+    repository = SQLiteRepository(sqlite_path)
+    service = AHPService(repository)
+    shared = service.get_matrix_state(decision["id"], None)
+    copies = []
+    copier = threading.Thread(target=lambda: copies.append(service.copy_matrix_state(decision["id"], None)))
+
+    with shared.lock:
+        # A PATCH applies its edit in place, then the save is rejected and the state dropped
+        shared.set_judgment(0, 1, 9)
+        copier.start()
+        copier.join(0.1)
+        assert not copies
+        matrix_state_cache.discard((decision["id"], None), shared)
+    copier.join()
+    repository.close()
+    np.testing.assert_allclose(copies[0].matrix, MATRIX)
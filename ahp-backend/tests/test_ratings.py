@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+
+from repositories.sqlite_repository import SQLiteRepository
+from helpers import MATRIX, setup_decision
+
+LEVELS = ["Excellent", "Good", "Poor"]
+LEVEL_MATRIX = [
+    [1, 3, 7],
+    [1 / 3, 1, 3],
+    [1 / 7, 1 / 3, 1],
+]
+
+
+def define_levels(client, decision):
+    levels = {}
+    for criteria_id in decision["criteria_ids"]:
+        response = client.post(
+            f"/api/ahp/decision/{decision['id']}/rating-levels",
+            json={"criteria_id": criteria_id, "levels": LEVELS, "matrix": LEVEL_MATRIX}
+        )
+        assert response.status_code == 200
+        levels[criteria_id] = response.json()["levels"]
+    return levels
+
+
+def test_ratings_ranking_matches_weighted_level_priorities(client):
+    decision = setup_decision(client)
+    levels = define_levels(client, decision)
+    first = levels[decision["criteria_ids"][0]]
+    assert first[0]["priority"] == 1.0
+    assert first[0]["priority"] > first[1]["priority"] > first[2]["priority"]
+
+    # Alternative i gets level (i + c) % 3 on criterion c
+    ratings = [
+        {
+            "criteria_id": criteria_id,
+            "alternative_ids": decision["alternative_ids"],
+            "level_ids": [levels[criteria_id][(i + c) % 3]["id"] for i in range(3)]
+        }
+        for c, criteria_id in enumerate(decision["criteria_ids"])
+    ]
+    response = client.put(f"/api/ahp/decision/{decision['id']}/ratings", json={"ratings": ratings})
+    assert response.json()["ratings"] == 12
+
+    ranking = client.post(f"/api/ahp/decision/{decision['id']}/ratings-ranking").json()
+
+    weights = np.array([c["weight"] for c in client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]])
+    priorities = np.array([level["priority"] for level in first])
+    expected = {
+        name: sum(weights[c] * priorities[(i + c) % 3] for c in range(4))
+        for i, name in enumerate(decision["alternatives"])
+    }
+    assert [r["alternative"] for r in ranking] == sorted(expected, key=expected.get, reverse=True)
+    for r in ranking:
+        assert abs(r["weight"] - expected[r["alternative"]]) < 1e-12
+    assert client.get(f"/api/ahp/decision/{decision['id']}").json()["status"] == "completed"
+
+
+def test_ratings_are_validated(client):
+    decision = setup_decision(client)
+    levels = define_levels(client, decision)
+    first, second = decision["criteria_ids"][:2]
+    url = f"/api/ahp/decision/{decision['id']}/ratings"
+
+    # A level of another criterion
+    wrong_level = {"criteria_id": first, "alternative_ids": decision["alternative_ids"][:1],
+                   "level_ids": [levels[second][0]["id"]]}
+    assert client.put(url, json={"ratings": [wrong_level]}).status_code == 400
+
+    unknown_alternative = {"criteria_id": first, "alternative_ids": [10 ** 6], "level_ids": [levels[first][0]["id"]]}
+    assert client.put(url, json={"ratings": [unknown_alternative]}).status_code == 400
+
+    # Ranking needs every alternative rated on every criterion
+    partial = {"criteria_id": first, "alternative_ids": decision["alternative_ids"],
+               "level_ids": [levels[first][0]["id"]] * 3}
+    assert client.put(url, json={"ratings": [partial]}).status_code == 200
+    assert client.post(f"/api/ahp/decision/{decision['id']}/ratings-ranking").status_code == 400
+
+
+def test_redefining_levels_keeps_ids_and_drops_removed_ratings(client, sqlite_path):
+    decision = setup_decision(client)
+    criteria_id = decision["criteria_ids"][0]
+    levels = define_levels(client, decision)[criteria_id]
+    client.put(f"/api/ahp/decision/{decision['id']}/ratings", json={"ratings": [
+        {"criteria_id": criteria_id, "alternative_ids": decision["alternative_ids"][:2],
+         "level_ids": [levels[0]["id"], levels[2]["id"]]}
+    ]})
+
+    response = client.post(
+        f"/api/ahp/decision/{decision['id']}/rating-levels",
+        json={"criteria_id": criteria_id, "levels": ["Excellent", "Good"], "matrix": [[1, 5], [1 / 5, 1]]}
+    )
+    assert [level["id"] for level in response.json()["levels"]] == [levels[0]["id"], levels[1]["id"]]
+
+    stored = client.get(f"/api/ahp/decision/{decision['id']}/rating-levels").json()
+    assert [len(c["levels"]) for c in stored] == [2, 3, 3, 3]
+    repository = SQLiteRepository(sqlite_path)
+    assert repository.get_alternative_ratings(decision["id"]) == [
+        (decision["alternative_ids"][0], criteria_id, levels[0]["id"])
+    ]
+    repository.close()
+
+
+def test_ratings_ranking_scales_to_thousands_of_alternatives(client):
+    alternatives = [f"Alt {i}" for i in range(3000)]
+    decision = client.post(
+        "/api/ahp/decision", json={"title": "Catalog", "criteria": ["A", "B", "C", "D"], "alternatives": alternatives}
+    ).json()
+    client.post(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}",
+        json={"criteria_names": decision["criteria"], "matrix": MATRIX}
+    )
+    levels = define_levels(client, decision)
+    rng = np.random.default_rng(0)
+    ratings = [
+        {
+            "criteria_id": criteria_id,
+            "alternative_ids": decision["alternative_ids"],
+            "level_ids": [levels[criteria_id][k]["id"] for k in rng.integers(0, 3, len(alternatives))]
+        }
+        for criteria_id in decision["criteria_ids"]
+    ]
+    client.put(f"/api/ahp/decision/{decision['id']}/ratings", json={"ratings": ratings})
+
+    started = time.perf_counter()
+    ranking = client.post(f"/api/ahp/decision/{decision['id']}/ratings-ranking").json()
+    elapsed = time.perf_counter() - started
+
+    assert len(ranking) == 3000
+    assert all(a["weight"] >= b["weight"] for a, b in zip(ranking, ranking[1:]))
+    # 3000 alternatives pairwise would be 9 million judgments per criterion
+    assert elapsed < 5
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+import main
+from config import get_settings
+from services.results_cache import results_cache
+from helpers import setup_decision
+
+
+def complete_decision(client):
+    decision = setup_decision(client)
+    criteria_weights = [c["weight"] for c in client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]]
+    response = client.post("/api/ahp/final-ranking", json={
+        "decision_id": decision["id"],
+        "alternatives": decision["alternatives"],
+        "criteria_weights": criteria_weights,
+        "alternative_weights_by_criteria": [[0.5, 0.3, 0.2], [0.2, 0.5, 0.3], [0.3, 0.3, 0.4], [0.6, 0.2, 0.2]]
+    })
+    assert response.status_code == 200
+    return decision, response.json()
+
+
+def fail_on_repository():
+    raise AssertionError("database opened for a cached read")
+
+
+def read_all(client, decision_id):
+    return [
+        client.get(f"/api/ahp/decision/{decision_id}{suffix}").json()
+        for suffix in ("", "/criteria", "/ranking")
+    ]
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    path = tmp_path / "snapshots"
+    monkeypatch.setenv("RESULTS_SNAPSHOT_DIR", str(path))
+    get_settings.cache_clear()
+    return path
+
+
+def test_completed_results_are_served_without_the_database(client, monkeypatch):
+    decision, ranking = complete_decision(client)
+    expected = read_all(client, decision["id"])
+    assert expected[0]["status"] == "completed"
+    assert [r["alternative"] for r in expected[2]] == [r["alternative"] for r in ranking]
+
+    monkeypatch.setattr(main, "create_repository", fail_on_repository)
+    assert read_all(client, decision["id"]) == expected
+
+
+def test_reopen_invalidates_cached_results(client):
+    decision, _ = complete_decision(client)
+    read_all(client, decision["id"])
+
+    response = client.post(f"/api/ahp/decision/{decision['id']}/reopen")
+    assert response.json()["status"] == "in_progress"
+    assert client.get(f"/api/ahp/decision/{decision['id']}").json()["status"] == "in_progress"
+    assert results_cache.get(decision["id"]) is None
+
+
+def test_edits_invalidate_cached_results(client):
+    decision, _ = complete_decision(client)
+    read_all(client, decision["id"])
+
+    weights = client.patch(
+        f"/api/ahp/criteria-matrix?decision_id={decision['id']}", json={"row": 0, "column": 1, "value": 9}
+    ).json()["weights"]
+    stored = client.get(f"/api/ahp/decision/{decision['id']}/criteria").json()["criteria"]
+    np.testing.assert_allclose([c["weight"] for c in stored], weights)
+
+
+def test_in_progress_decisions_are_not_cached(client):
+    decision = setup_decision(client)
+    client.get(f"/api/ahp/decision/{decision['id']}")
+    client.get(f"/api/ahp/decision/{decision['id']}/criteria")
+    assert results_cache.get(decision["id"]) is None
+    assert client.get(f"/api/ahp/decision/{decision['id']}/ranking").status_code == 404
+
+
+def test_snapshots_are_shared_and_invalidated_across_processes(snapshot_dir, client, monkeypatch):
+    decision, _ = complete_decision(client)
+    expected = read_all(client, decision["id"])
+    assert (snapshot_dir / f"decision_{decision['id']}.json").exists()
+
+    # A fresh worker process: empty memory, served from the snapshot file
+    results_cache.clear()
+    create_repository = main.create_repository
+    monkeypatch.setattr(main, "create_repository", fail_on_repository)
+    assert read_all(client, decision["id"]) == expected
+    monkeypatch.setattr(main, "create_repository", create_repository)
+
+    # Another worker reopens the decision: the snapshot goes, so this worker's memory entry is dropped too
+    (snapshot_dir / f"decision_{decision['id']}.json").unlink()
+    assert results_cache.get(decision["id"]) is None
+
+
+def test_several_workers_without_snapshots_bypass_the_cache(client, monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    get_settings.cache_clear()
+    decision, _ = complete_decision(client)
+    expected = read_all(client, decision["id"])
+    assert results_cache.get(decision["id"]) is None
+
+    # Another worker reopens the decision; this one must not keep serving the completed results
+    repository = main.create_repository()
+    repository.update_decision_status(decision["id"], "in_progress")
+    repository.close()
+    assert client.get(f"/api/ahp/decision/{decision['id']}").json()["status"] == "in_progress"
+    assert expected[0]["status"] == "completed"
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setenv("RESULTS_CACHE_SIZE", "2")
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    get_settings.cache_clear()
+    try:
+        for decision_id in range(1, 4):
+            results_cache.put(decision_id, {"decision": decision_id}, results_cache.generation())
+        assert results_cache.get(1) is None
+        assert results_cache.get(3) == {"decision": 3}
+
+        # Results read before an invalidation are never stored
+        generation = results_cache.generation()
+        results_cache.invalidate(4)
+        results_cache.put(4, {"decision": 4}, generation)
+        assert results_cache.get(4) is None
+    finally:
+        results_cache.clear()
+        get_settings.cache_clear()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from repositories.sqlite_repository import SQLiteRepository
+
+from helpers import create_decision
+
+
+def test_schema_bootstraps_on_every_memory_connection():
+    first = SQLiteRepository(":memory:")
+    second = SQLiteRepository(":memory:")
+    assert len(first.get_all_criteria()) == 6
+    assert len(second.get_all_alternatives()) == 5
+    first.close()
+    second.close()
+
+
+def test_resolve_names_keeps_order_and_duplicates(repository):
+    ids = repository.save_criteria_to_db(["New", "Độ an toàn", "New", "Other"])
+    assert ids[0] == ids[2]
+    assert len(set(ids)) == 3
+    assert repository.save_criteria_to_db(["Other", "New"]) == [ids[3], ids[0]]
+
+
+def test_get_decision_problem(repository):
+    decision_id, criteria_ids, alternative_ids = create_decision(repository)
+    data = repository.get_decision_problem(decision_id)
+    assert data["status"] == "in_progress"
+    assert [c["id"] for c in data["criteria"]] == criteria_ids
+    assert [a["name"] for a in data["alternatives"]] == ["X", "Y"]
+
+    with pytest.raises(HTTPException) as exc:
+        repository.get_decision_problem(decision_id + 100)
+    assert exc.value.status_code == 404
+
+
+def test_comparison_matrix_upsert_and_read_back(repository):
+    decision_id, criteria_ids, _ = create_decision(repository)
+    matrix = [[1, 3, 5], [1 / 3, 1, 2], [1 / 5, 1 / 2, 1]]
+    repository.save_criteria_comparison_matrix(decision_id, criteria_ids, matrix)
+    matrix[0][1], matrix[1][0] = 4, 1 / 4
+    repository.save_criteria_comparison_matrix(decision_id, criteria_ids, matrix)
+
+    ids, stored = repository.get_criteria_comparison_matrix(decision_id)
+    assert ids == criteria_ids
+    np.testing.assert_allclose(stored, matrix)
+
+    repository.save_criteria_comparison_cells(decision_id, [(criteria_ids[0], criteria_ids[2], 7.0)])
+    assert repository.get_criteria_comparison_matrix(decision_id)[1][0, 2] == 7.0
+
+
+def test_incomplete_matrix_reads_as_none(repository):
+    decision_id, criteria_ids, _ = create_decision(repository)
+    assert repository.get_criteria_comparison_matrix(decision_id) is None
+    repository.save_criteria_comparison_cells(decision_id, [(criteria_ids[0], criteria_ids[1], 2.0)])
+    assert repository.get_criteria_comparison_matrix(decision_id) is None
+
+
+def test_consistency_check_upsert_with_null_criteria(repository):
+    decision_id, criteria_ids, _ = create_decision(repository)
+    repository.save_consistency_check(decision_id, None, 3.1, 0.05, 0.08, True)
+    repository.save_consistency_check(decision_id, None, 3.3, 0.15, 0.25, False)
+    repository.save_consistency_check(decision_id, criteria_ids[0], 3.0, 0.0, 0.0, True)
+
+    rows = repository.conn.execute(
+        "SELECT criteria_id, consistency_ratio FROM consistency_checks WHERE decision_id = ? ORDER BY id",
+        (decision_id,)
+    ).fetchall()
+    assert rows == [(None, 0.25), (criteria_ids[0], 0.0)]
+
+
+def test_alternative_scores_upsert_with_null_criteria(repository):
+    decision_id, criteria_ids, alternative_ids = create_decision(repository)
+    repository.save_alternative_scores(decision_id, alternative_ids, None, [0.4, 0.6], True)
+    repository.save_alternative_scores(decision_id, alternative_ids, None, [0.7, 0.3], True)
+    repository.save_alternative_scores(decision_id, alternative_ids, criteria_ids[0], [0.5, 0.5])
+
+    final = repository.get_alternative_scores(decision_id)
+    assert [(s["score"], s["rank"]) for s in final] == [(0.7, 1), (0.3, 2)]
+    assert len(repository.get_alternative_scores(decision_id, is_final=False)) == 2
+
+
+def test_weights_and_status(repository):
+    decision_id, criteria_ids, _ = create_decision(repository)
+    repository.save_criteria_weights(decision_id, criteria_ids, [0.5, 0.3, 0.2])
+    repository.save_criteria_weights(decision_id, criteria_ids, [0.6, 0.3, 0.1])
+    assert repository.get_criteria_weights(decision_id) == dict(zip(criteria_ids, [0.6, 0.3, 0.1]))
+    assert [c["weight"] for c in repository.get_criteria_with_weights(decision_id)] == [0.6, 0.3, 0.1]
+
+    repository.update_decision_status(decision_id, "completed")
+    assert repository.get_decision_problem(decision_id)["status"] == "completed"
@@ -76,6 +76,21 @@ const ApiService = {
     }
   },
 
+  /**
+   * Change a single criteria judgment; the server keeps the reciprocal in sync
+   * @param {number} decisionId - Decision problem ID
+   * @param {Object} data - Judgment update ({ row, column, value })
+   * @returns {Promise<Object>} - Updated step-by-step calculation details
+   */
+  updateCriteriaJudgment: async (decisionId, data) => {
+    try {
+      const response = await apiClient.patch(`/criteria-matrix?decision_id=${decisionId}`, data);
+      return response.data;
+    } catch (error) {
+      handleApiError(error, 'updating criteria judgment');
+    }
+  },
+
   /**
    * Calculate alternative weights for a specific criterion with step-by-step details
    * @param {Object} data - Alternative comparison data for a criterion
@@ -90,6 +105,46 @@ const ApiService = {
     }
   },
 
+  /**
+   * Change a single alternative judgment for a criterion
+   * @param {Object} data - Judgment update ({ decision_id, criteria_id, row, column, value })
+   * @returns {Promise<Object>} - Updated step-by-step calculation details
+   */
+  updateAlternativeJudgment: async (data) => {
+    try {
+      const response = await apiClient.patch('/alternative-matrix', data);
+      return response.data;
+    } catch (error) {
+      handleApiError(error, 'updating alternative judgment');
+    }
+  },
+
+  /**
+   * Get the judgments most responsible for inconsistency with suggested fixes
+   * @param {Object} data - Matrix with optional labels ({ matrix, labels, top_k })
+   * @returns {Promise<Object>} - Current CR and ranked suggestions
+   */
+  getConsistencySuggestions: async (data) => {
+    try {
+      const response = await apiClient.post('/consistency-suggestions', data);
+      return response.data;
+    } catch (error) {
+      handleApiError(error, 'fetching consistency suggestions');
+    }
+  },
+
+  /**
+   * Open a live matrix-editing session for a decision problem.
+   * Send {type: 'edit', criteria_id, row, column, value} messages and receive
+   * 'update' messages with weights and CR; send {type: 'commit'} to persist.
+   * @param {number} decisionId - Decision problem ID
+   * @returns {WebSocket} - Open session socket
+   */
+  openMatrixSession: (decisionId) => {
+    const wsUrl = API_URL.replace(/^http/, 'ws');
+    return new WebSocket(`${wsUrl}/decision/${decisionId}/session`);
+  },
+
   /**
    * Calculate final alternative rankings
    * @param {Object} data - Final ranking input data